@@ -0,0 +1,83 @@
+"""
+bench_id_allocator.py
+--------------------------------------------------
+Measures query ID allocation throughput with many
+parallel clients and checks that no ID is issued twice.
+
+Modes:
+- alloc  : IDs only (block reservations hit MySQL)
+- submit : full create_query() round trips
+           (inserts benchmark rows — use a scratch DB)
+
+Run using:
+    CQMS_DB_NAME=cqms_bench python benchmarks/bench_id_allocator.py --threads 32 --submits 5000
+--------------------------------------------------
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from services.db_connection import pool_stats  # noqa: E402
+from services.id_allocator import BlockIdAllocator  # noqa: E402
+from services.query_actions import create_query  # noqa: E402
+
+
+def _alloc_worker(allocator, count):
+    return [allocator.next_id() for _ in range(count)]
+
+
+def _submit_worker(count):
+    return [
+        create_query(
+            "bench@example.com",
+            "9876543210",
+            "9876543210",
+            "Technical Support",
+            "Benchmark query",
+            "Generated by bench_id_allocator.py",
+        )[0]
+        for _ in range(count)
+    ]
+
+
+def run(threads, submits, mode, block_size):
+    per_thread = max(1, submits // threads)
+    allocator = BlockIdAllocator(block_size=block_size)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        if mode == "alloc":
+            futures = [pool.submit(_alloc_worker, allocator, per_thread) for _ in range(threads)]
+        else:
+            futures = [pool.submit(_submit_worker, per_thread) for _ in range(threads)]
+        ids = [i for f in futures for i in f.result()]
+    elapsed = time.perf_counter() - started
+
+    duplicates = len(ids) - len(set(ids))
+
+    print(f"🧵 threads={threads} mode={mode} block={block_size}")
+    print(f"   {len(ids):,} IDs in {elapsed:.2f}s → {len(ids) / elapsed:,.0f} per sec")
+    print(f"   duplicates: {duplicates}")
+    if mode == "alloc":
+        print(f"   block reservations: {allocator.blocks_reserved}")
+    print(f"   pool: {pool_stats()}")
+
+    return duplicates == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark query ID allocation")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--submits", type=int, default=5000)
+    parser.add_argument("--mode", choices=["alloc", "submit"], default="alloc")
+    parser.add_argument("--block-size", type=int, default=20,
+                        help="alloc mode only; submit mode uses CQMS_ID_BLOCK_SIZE")
+    args = parser.parse_args()
+
+    ok = run(args.threads, args.submits, args.mode, args.block_size)
+    sys.exit(0 if ok else 1)
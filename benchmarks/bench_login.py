@@ -0,0 +1,94 @@
+"""
+bench_login.py
+--------------------------------------------------
+Login latency under concurrent load:
+
+- legacy : the old OR-across-three-columns query
+- routed : classified identifier, single unique lookup
+- cached : routed + short-TTL user cache
+
+Run using:
+    python benchmarks/bench_login.py --identifier alice --password secret --role Client
+--------------------------------------------------
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from auth.auth_utils import clear_user_cache, hash_password, login_user  # noqa: E402
+from services.db_connection import db_session  # noqa: E402
+
+
+LEGACY_SQL = """
+    SELECT user_id, username, email, mobile_number, role
+    FROM users
+    WHERE (username = %s OR email = %s OR mobile_number = %s)
+      AND hashed_password = %s
+      AND role = %s
+"""
+
+
+def legacy_login(identifier, password, role):
+    with db_session(dictionary=True) as cur:
+        cur.execute(
+            LEGACY_SQL,
+            (identifier, identifier, identifier, hash_password(password), role),
+        )
+        return cur.fetchone() is not None
+
+
+def routed_login(identifier, password, role):
+    return login_user(identifier, password, role, use_cache=False)[0]
+
+
+def cached_login(identifier, password, role):
+    return login_user(identifier, password, role, use_cache=True)[0]
+
+
+def _timed(fn, args, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def run(variant, fn, args, threads, logins):
+    per_thread = max(1, logins // threads)
+    clear_user_cache()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(_timed, fn, args, per_thread) for _ in range(threads)]
+        samples = sorted(s for f in futures for s in f.result())
+    elapsed = time.perf_counter() - started
+
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{variant:<7} {len(samples) / elapsed:>9,.0f} logins/s   "
+        f"p50 {statistics.median(samples):6.2f} ms   p95 {p95:6.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark login lookups")
+    parser.add_argument("--identifier", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--role", default="Client", choices=["Client", "Support"])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=2000)
+    args = parser.parse_args()
+
+    login_args = (args.identifier, args.password, args.role)
+    if not routed_login(*login_args):
+        sys.exit("❌ Credentials do not log in; create the user first.")
+
+    for name, fn in (("legacy", legacy_login), ("routed", routed_login), ("cached", cached_login)):
+        run(name, fn, login_args, args.threads, args.logins)
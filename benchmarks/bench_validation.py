@@ -0,0 +1,113 @@
+"""
+bench_validation.py
+--------------------------------------------------
+Contact validation throughput on large Series:
+
+- apply      : the notebook's per-row re lambdas
+- vectorized : utils.regex_utils Series helpers
+
+Mobiles are drawn with realistic formatting noise
+(+91 / 0 prefixes, spaces, dashes, float exports).
+
+Run using:
+    python benchmarks/bench_validation.py --rows 2000000
+--------------------------------------------------
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils.regex_utils import (  # noqa: E402
+    normalize_email_series,
+    normalize_mobile_series,
+    valid_email_series,
+    valid_mobile_series,
+)
+
+
+# --------------------------------------------------
+# BASELINE (notebook cells, per-row apply)
+# --------------------------------------------------
+email_pattern = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+strict_pattern = re.compile(r"^[6-9]\d{9}$")
+
+
+def normalize_mobile(mobile):
+    mobile = str(mobile).strip()
+    mobile = re.sub(r"\D", "", mobile)
+    if mobile.startswith("91") and len(mobile) > 10:
+        mobile = mobile[-10:]
+    elif mobile.startswith("0") and len(mobile) > 10:
+        mobile = mobile[-10:]
+    return mobile
+
+
+def apply_validation(emails, mobiles):
+    emails = emails.astype(str).str.strip().str.lower()
+    valid_email = emails.apply(lambda x: bool(email_pattern.match(x)))
+    normalized = mobiles.str.split(".").str[0].apply(normalize_mobile)
+    valid_mobile = normalized.apply(lambda x: bool(strict_pattern.match(x)))
+    return normalized, valid_mobile, valid_email
+
+
+def vectorized_validation(emails, mobiles):
+    emails = normalize_email_series(emails)
+    normalized = normalize_mobile_series(mobiles)
+    return normalized, valid_mobile_series(normalized), valid_email_series(emails)
+
+
+# --------------------------------------------------
+# DATA
+# --------------------------------------------------
+def make_data(rows, seed=7):
+    rng = np.random.default_rng(seed)
+    base = pd.Series(rng.integers(0, 10**10, size=rows, dtype=np.int64)).astype(str).str.zfill(10)
+
+    style = rng.integers(0, 5, size=rows)
+    mobiles = base.copy()
+    mobiles[style == 1] = "+91 " + base[style == 1].str[:5] + " " + base[style == 1].str[5:]
+    mobiles[style == 2] = "0" + base[style == 2]
+    mobiles[style == 3] = base[style == 3].str[:5] + "-" + base[style == 3].str[5:]
+    mobiles[style == 4] = base[style == 4] + ".0"
+
+    emails = " Client" + pd.Series(np.arange(rows)).astype(str) + "@Example.com "
+    return emails, mobiles
+
+
+def _best(fn, args, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark contact validation")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    emails, mobiles = make_data(args.rows)
+    print(f"🔢 {args.rows:,} rows")
+
+    results = {}
+    for name, fn in (("apply", apply_validation), ("vectorized", vectorized_validation)):
+        seconds, results[name] = _best(fn, (emails, mobiles), args.repeat)
+        print(f"{name:<11} {seconds:8.2f} s   {args.rows / seconds:>12,.0f} rows/s")
+
+    same = all(
+        (a.astype(str).to_numpy() == b.astype(str).to_numpy()).all()
+        for a, b in zip(results["apply"], results["vectorized"])
+    )
+    print("✅ Results identical." if same else "❌ Results differ!")
@@ -0,0 +1,172 @@
+"""
+generate_dataset.py
+--------------------------------------------------
+Synthetic client query dataset generator.
+
+Produces CSVs with the same columns as
+data/raw/client_queries_5000.csv at any size. The
+category mix, per-category description pool and
+resolution-time distribution are learned from
+the bundled sample, so
+large datasets look like the real one. Rows are
+generated and written in vectorized chunks, so
+10M+ rows need only chunk-sized memory.
+
+Optional: --agents N adds an assigned_support_id
+column (S001..SNNN) for closed / in-progress rows.
+
+Run using:
+    python benchmarks/generate_dataset.py --rows 1000000 --out data/raw/synthetic_1m.csv
+--------------------------------------------------
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+
+SAMPLE_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "data", "raw", "client_queries_5000.csv"
+)
+CHUNK_ROWS = 500_000
+EMAIL_DOMAINS = np.array(["example.com", "example.net", "example.org"])
+
+
+# --------------------------------------------------
+# PROFILE (learned from the sample CSV)
+# --------------------------------------------------
+def learn_profile(sample_path=SAMPLE_PATH):
+    """
+    Extracts the distributions used for generation.
+    """
+    df = pd.read_csv(sample_path, dtype={"client_mobile": str})
+
+    category_share = df["query_heading"].value_counts(normalize=True)
+    descriptions = {
+        category: group["query_description"].unique()
+        for category, group in df.groupby("query_heading")
+    }
+
+    raised = pd.to_datetime(df["date_raised"])
+    closed = pd.to_datetime(df["date_closed"], errors="coerce")
+    resolution = (closed - raised).dt.days.dropna().astype(int)
+
+    return {
+        "categories": category_share.index.to_numpy(),
+        "category_p": category_share.to_numpy(),
+        "descriptions": descriptions,
+        "resolution_days": resolution.to_numpy(),
+    }
+
+
+# --------------------------------------------------
+# CHUNK GENERATION (VECTORIZED)
+# --------------------------------------------------
+def _mobiles(rng, n):
+    # like the sample: 10 random digits, any leading digit (so a share
+    # of numbers fail the [6-9] mobile rule, as in the real data)
+    numbers = rng.integers(0, 10**10, size=n, dtype=np.int64)
+    return pd.Series(numbers).astype(str).str.zfill(10)
+
+
+def generate_chunk(rng, profile, start, n, id_width, clients, agents,
+                   open_share, in_progress_share, start_date, span_days):
+    ids = np.arange(start + 1, start + n + 1)
+
+    categories = rng.choice(profile["categories"], size=n, p=profile["category_p"])
+    descriptions = np.empty(n, dtype=object)
+    for category in profile["categories"]:
+        mask = categories == category
+        pool = profile["descriptions"][category]
+        descriptions[mask] = pool[rng.integers(0, len(pool), size=mask.sum())]
+
+    client_ids = rng.integers(1, clients + 1, size=n)
+    domains = EMAIL_DOMAINS[client_ids % len(EMAIL_DOMAINS)]
+
+    raised = start_date + pd.to_timedelta(rng.integers(0, span_days, size=n), unit="D")
+    resolution = rng.choice(profile["resolution_days"], size=n)
+    closed = raised + pd.to_timedelta(resolution, unit="D")
+
+    roll = rng.random(n)
+    status = np.where(
+        roll < open_share,
+        "Open",
+        np.where(roll < open_share + in_progress_share, "In Progress", "Closed"),
+    )
+    is_closed = status == "Closed"
+
+    chunk = pd.DataFrame({
+        "query_id": "Q" + pd.Series(ids).astype(str).str.zfill(id_width),
+        "client_email": "client" + pd.Series(client_ids).astype(str) + "@" + domains,
+        "client_mobile": _mobiles(rng, n),
+        "query_heading": categories,
+        "query_description": descriptions,
+        "status": status,
+        "date_raised": raised.strftime("%Y-%m-%d"),
+        "date_closed": pd.Series(closed.strftime("%Y-%m-%d")).where(is_closed, ""),
+    })
+
+    if agents:
+        agent_ids = "S" + pd.Series(rng.integers(1, agents + 1, size=n)).astype(str).str.zfill(3)
+        chunk["assigned_support_id"] = agent_ids.where(status != "Open", "")
+
+    return chunk
+
+
+# --------------------------------------------------
+# GENERATE
+# --------------------------------------------------
+def generate(rows, out, agents=0, clients=None, open_share=0.01,
+             in_progress_share=0.0, start="2025-01-01", days=365, seed=42,
+             chunk_rows=CHUNK_ROWS):
+    """
+    Writes `rows` synthetic queries to `out` (CSV). Returns the path.
+    """
+    rng = np.random.default_rng(seed)
+    profile = learn_profile()
+    clients = clients or max(1, int(rows * 0.99))
+    id_width = max(4, len(str(rows)))
+    start_date = pd.Timestamp(start)
+
+    if in_progress_share and not agents:
+        raise ValueError("In Progress rows need --agents to be assigned")
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    started = time.perf_counter()
+
+    written = 0
+    while written < rows:
+        n = min(chunk_rows, rows - written)
+        chunk = generate_chunk(
+            rng, profile, written, n, id_width, clients, agents,
+            open_share, in_progress_share, start_date, days,
+        )
+        chunk.to_csv(out, mode="w" if written == 0 else "a",
+                     header=written == 0, index=False)
+        written += n
+        print(f"   ↳ {written:,} / {rows:,} rows")
+
+    print(f"✅ Wrote {rows:,} rows to {out} in {time.perf_counter() - started:.1f}s")
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic CQMS dataset")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--out", default="data/raw/synthetic_client_queries.csv")
+    parser.add_argument("--agents", type=int, default=0)
+    parser.add_argument("--clients", type=int, default=None)
+    parser.add_argument("--open-share", type=float, default=0.01)
+    parser.add_argument("--in-progress-share", type=float, default=0.0)
+    parser.add_argument("--start", default="2025-01-01")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate(
+        args.rows, args.out, args.agents, args.clients, args.open_share,
+        args.in_progress_share, args.start, args.days, args.seed,
+    )
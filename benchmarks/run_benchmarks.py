@@ -0,0 +1,227 @@
+"""
+run_benchmarks.py
+--------------------------------------------------
+End-to-end CQMS benchmark suite against a local MySQL.
+
+Times:
+- ingestion    : csv_loader.load_csv on a generated dataset
+- analytics    : load_queries (cold / warm delta cache) and
+                 every metric on each engine
+- dashboard    : queue counts, first / deep keyset pages,
+                 client "My Queries" fetch, full-text search
+
+Results are written as JSON to benchmarks/results/ so runs
+can be compared across releases; --baseline fails the run
+when any timing regresses beyond --tolerance. The
+result cache (services.result_cache) is off so the DB
+paths are timed; set CQMS_CACHE_DISABLED=0 to include it.
+
+Use a scratch database — ingestion writes to it:
+    CQMS_DB_NAME=cqms_bench python benchmarks/run_benchmarks.py --rows 1000000 --agents 50
+    CQMS_DB_NAME=cqms_bench python benchmarks/run_benchmarks.py --skip-ingest \
+        --baseline benchmarks/results/<previous>.json
+--------------------------------------------------
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ.setdefault("CQMS_CACHE_DISABLED", "1")
+
+from benchmarks.generate_dataset import generate  # noqa: E402
+from services.csv_loader import load_csv  # noqa: E402
+from services.migrations import migrate  # noqa: E402
+from services.db_connection import DB_CONFIG, db_session  # noqa: E402
+from services.delta_cache import invalidate_caches  # noqa: E402
+from services.query_frames import memory_report  # noqa: E402
+from services.query_pages import count_queue, fetch_page  # noqa: E402
+from services.search import search_queries  # noqa: E402
+from analytics.analytics import METRICS, ROLLUP_METRICS, load_queries, run_metric  # noqa: E402
+
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+# --------------------------------------------------
+# TIMING
+# --------------------------------------------------
+def timed(results, name, fn, repeat=3, **extra):
+    """
+    Runs fn `repeat` times and records min / median seconds.
+    Returns the last result of fn.
+    """
+    samples = []
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        samples.append(time.perf_counter() - start)
+
+    results.append({
+        "name": name,
+        "runs": repeat,
+        "seconds_min": round(min(samples), 6),
+        "seconds_median": round(statistics.median(samples), 6),
+        **extra,
+    })
+    print(f"⏱  {name:<45} {min(samples) * 1000:10.2f} ms")
+    return value
+
+
+# --------------------------------------------------
+# SUITES
+# --------------------------------------------------
+def seed_agents(agents):
+    with db_session() as cur:
+        cur.executemany(
+            "INSERT IGNORE INTO support_agents (support_id, support_name) VALUES (%s, %s)",
+            [(f"S{i:03d}", f"Agent {i:03d}") for i in range(1, agents + 1)],
+        )
+
+
+def bench_ingestion(results, path, chunk_size, mode):
+    summary = timed(results, "ingest.load_csv", lambda: load_csv(path, chunk_size=chunk_size, mode=mode),
+                    repeat=1, mode=mode)
+    results[-1].update(summary)
+
+
+def bench_analytics(results, repeat):
+    invalidate_caches()
+    timed(results, "analytics.load_queries.cold", load_queries, repeat=1)
+    df = timed(results, "analytics.load_queries.warm", load_queries, repeat=repeat)
+    results[-1]["memory_bytes"] = int(memory_report(df).loc["TOTAL", "bytes"])
+
+    for name in METRICS:
+        timed(results, f"analytics.{name}.pandas", lambda: run_metric(name, "pandas", df=df), repeat)
+        timed(results, f"analytics.{name}.sql", lambda: run_metric(name, "sql"), repeat)
+        if name in ROLLUP_METRICS:
+            timed(results, f"analytics.{name}.rollup", lambda: run_metric(name, "rollup"), repeat)
+
+
+def bench_dashboard(results, repeat, deep_pages):
+    for queue in ("open", "closed"):
+        timed(results, f"dashboard.count.{queue}", lambda: count_queue(queue), repeat)
+        timed(results, f"dashboard.page1.{queue}", lambda: fetch_page(queue, page_size=25), repeat)
+
+        cursor = None
+        for _ in range(deep_pages):
+            _, next_cursor = fetch_page(queue, after=cursor, page_size=25)
+            if next_cursor is None:
+                break
+            cursor = next_cursor
+        timed(results, f"dashboard.page_deep.{queue}",
+              lambda: fetch_page(queue, after=cursor, page_size=25), repeat)
+
+    with db_session() as cur:
+        cur.execute("SELECT client_email FROM client_queries LIMIT 1")
+        row = cur.fetchone()
+
+    if row:
+        def my_queries():
+            with db_session() as cur:
+                cur.execute("SELECT * FROM client_queries WHERE client_email = %s", row)
+                return cur.fetchall()
+
+        timed(results, "dashboard.client.my_queries", my_queries, repeat)
+
+    for text, mode in (("payment failed", "all"), ("login error", "any")):
+        timed(results, f"dashboard.search.{mode}", lambda: search_queries(text, 20, mode), repeat)
+
+
+# --------------------------------------------------
+# REPORTING
+# --------------------------------------------------
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def write_results(results, args):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"bench-{stamp}.json")
+
+    payload = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "database": DB_CONFIG["database"],
+        "python": platform.python_version(),
+        "rows": args.rows,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, default=str)
+
+    print(f"📝 Results written to {path}")
+    return path
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Returns names whose best time regressed more than `tolerance` (0.2 = 20%).
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        before = baseline.get(result["name"])
+        if not before or not before["seconds_min"]:
+            continue
+        ratio = result["seconds_min"] / before["seconds_min"]
+        if ratio > 1 + tolerance:
+            regressions.append(result["name"])
+            print(f"❌ {result['name']}: {ratio:.2f}x slower than baseline")
+
+    if not regressions:
+        print("✅ No regressions against baseline.")
+    return regressions
+
+
+# --------------------------------------------------
+# RUN
+# --------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CQMS benchmark suite")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--agents", type=int, default=50)
+    parser.add_argument("--csv", help="existing CSV to ingest instead of generating one")
+    parser.add_argument("--skip-ingest", action="store_true")
+    parser.add_argument("--mode", choices=["batch", "infile"], default="batch")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--deep-pages", type=int, default=200)
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = []
+    migrate()
+
+    if not args.skip_ingest:
+        seed_agents(args.agents)
+        path = args.csv or os.path.join(RESULTS_DIR, f"dataset-{args.rows}.csv")
+        if not args.csv and not os.path.exists(path):
+            generate(args.rows, path, agents=args.agents, in_progress_share=0.02)
+        bench_ingestion(results, path, args.chunk_size, args.mode)
+
+    bench_analytics(results, args.repeat)
+    bench_dashboard(results, args.repeat, args.deep_pages)
+    write_results(results, args)
+
+    if args.baseline and compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
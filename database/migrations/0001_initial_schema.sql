@@ -1,11 +1,9 @@
 -- =====================================================
+-- 0001 — Initial schema
 -- Client Query Management System (CQMS)
 -- Database Schema created by Bhuvaneswari G
 -- =====================================================
 
-CREATE DATABASE IF NOT EXISTS client_query_db;
-USE client_query_db;
-
 -- =====================================================
 -- USERS TABLE (Client & Support Login)
 -- =====================================================
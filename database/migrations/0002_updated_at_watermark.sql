@@ -0,0 +1,11 @@
+-- =====================================================
+-- 0002 — Change watermark for delta refresh
+-- Maintained by MySQL on every insert / pick / close
+-- =====================================================
+
+ALTER TABLE client_queries
+    ADD COLUMN updated_at DATETIME(6) NOT NULL
+        DEFAULT CURRENT_TIMESTAMP(6)
+        ON UPDATE CURRENT_TIMESTAMP(6);
+
+CREATE INDEX idx_query_updated_at ON client_queries(updated_at);
@@ -0,0 +1,53 @@
+-- =====================================================
+-- 0003 — Rollup tables (maintained with each insert / pick / close)
+-- Rebuild: python -m src.services.rollups
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS status_rollup (
+    status VARCHAR(20) PRIMARY KEY,
+    query_count INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS category_rollup (
+    category VARCHAR(50) PRIMARY KEY,
+    query_count INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS agent_rollup (
+    support_id VARCHAR(20) PRIMARY KEY,
+    closed_count INT NOT NULL DEFAULT 0,
+    total_resolution_days BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS daily_rollup (
+    day DATE PRIMARY KEY,
+    opened INT NOT NULL DEFAULT 0,
+    closed INT NOT NULL DEFAULT 0
+);
+
+-- Backfill (existing databases; later writes keep them current)
+INSERT IGNORE INTO status_rollup (status, query_count)
+SELECT status, COUNT(*) FROM client_queries GROUP BY status;
+
+INSERT IGNORE INTO category_rollup (category, query_count)
+SELECT category, COUNT(*) FROM client_queries GROUP BY category;
+
+INSERT IGNORE INTO agent_rollup (support_id, closed_count, total_resolution_days)
+SELECT assigned_support_id,
+       COUNT(*),
+       SUM(TIMESTAMPDIFF(DAY, query_created_time, query_closed_time))
+FROM client_queries
+WHERE status = 'Closed' AND assigned_support_id IS NOT NULL
+GROUP BY assigned_support_id;
+
+INSERT IGNORE INTO daily_rollup (day, opened, closed)
+SELECT day, SUM(opened), SUM(closed) FROM (
+    SELECT DATE(query_created_time) AS day, COUNT(*) AS opened, 0 AS closed
+    FROM client_queries GROUP BY DATE(query_created_time)
+    UNION ALL
+    SELECT DATE(query_closed_time), 0, COUNT(*)
+    FROM client_queries
+    WHERE status = 'Closed' AND query_closed_time IS NOT NULL
+    GROUP BY DATE(query_closed_time)
+) AS t
+GROUP BY day;
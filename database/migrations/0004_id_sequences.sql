@@ -0,0 +1,8 @@
+-- =====================================================
+-- 0004 — ID sequences (block-reserved query IDs)
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS id_sequences (
+    name VARCHAR(50) PRIMARY KEY,
+    next_value BIGINT NOT NULL
+);
@@ -0,0 +1,23 @@
+-- =====================================================
+-- 0005 — Composite indexes for the app's hot paths
+-- Verified by: python -m src.services.migrations --check
+-- =====================================================
+
+-- Client dashboard: WHERE client_email = ? (newest first)
+CREATE INDEX idx_query_client_created
+    ON client_queries(client_email, query_created_time);
+
+-- Support queues + claims:
+--   WHERE status = ? AND assigned_support_id IS NULL / = ?
+--   ORDER BY query_created_time, query_id
+CREATE INDEX idx_query_queue
+    ON client_queries(status, assigned_support_id, query_created_time, query_id);
+
+-- Closed queue, SLA scan, status counts:
+--   WHERE status = ? / <> ? ORDER BY / range on query_created_time
+CREATE INDEX idx_query_status_created
+    ON client_queries(status, query_created_time);
+
+-- Superseded by the composite indexes above
+-- (idx_support_agent stays: it backs the agent foreign key)
+DROP INDEX idx_query_status ON client_queries;
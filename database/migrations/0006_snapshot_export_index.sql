@@ -0,0 +1,8 @@
+-- =====================================================
+-- 0006 — Month range scans for columnar snapshot export
+-- Used by: python -m src.services.snapshot_store
+-- =====================================================
+
+-- Snapshot export: WHERE query_created_time >= ? AND < ? (one month)
+CREATE INDEX idx_query_created
+    ON client_queries(query_created_time);
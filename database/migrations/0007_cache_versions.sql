@@ -0,0 +1,13 @@
+-- =====================================================
+-- 0007 — Result-cache version counter
+-- Bumped in the same transaction as every write to
+-- client_queries, so cached reads in any process can
+-- tell they are stale
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS cache_versions (
+    scope VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL
+);
+
+INSERT IGNORE INTO cache_versions (scope, version) VALUES ('client_queries', 0);
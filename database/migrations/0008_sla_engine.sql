@@ -0,0 +1,44 @@
+-- =====================================================
+-- 0008 — SLA engine
+-- Per-category / per-status targets, an indexed due
+-- time on every unresolved query and a breach log
+-- =====================================================
+
+-- Hours from query_created_time; category '*' is the default
+CREATE TABLE IF NOT EXISTS sla_targets (
+    category VARCHAR(50) NOT NULL,
+    status ENUM('Open','In Progress') NOT NULL,
+    target_hours INT NOT NULL,
+    PRIMARY KEY (category, status)
+);
+
+INSERT IGNORE INTO sla_targets (category, status, target_hours) VALUES
+    ('*', 'Open', 72),
+    ('*', 'In Progress', 72);
+
+-- NULL once closed (or when no target applies)
+ALTER TABLE client_queries
+    ADD COLUMN sla_due_at DATETIME NULL;
+
+-- "Breached now" / "breaching within N hours" are range scans
+CREATE INDEX idx_query_sla_due ON client_queries(sla_due_at);
+
+-- One row per query per missed due time (sweeps are idempotent)
+CREATE TABLE IF NOT EXISTS sla_breach_events (
+    event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    query_id VARCHAR(20) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    assigned_support_id VARCHAR(20),
+    sla_due_at DATETIME NOT NULL,
+    detected_at DATETIME NOT NULL,
+    UNIQUE KEY uq_breach (query_id, status, sla_due_at),
+    KEY idx_breach_detected (detected_at)
+);
+
+-- Backfill due times of unresolved queries
+UPDATE client_queries q
+LEFT JOIN sla_targets t ON t.category = q.category AND t.status = q.status
+LEFT JOIN sla_targets d ON d.category = '*' AND d.status = q.status
+SET q.sla_due_at = q.query_created_time + INTERVAL COALESCE(t.target_hours, d.target_hours) HOUR
+WHERE q.status IN ('Open', 'In Progress');
@@ -0,0 +1,8 @@
+-- =====================================================
+-- 0009 — Agent capacity for auto-assignment
+-- Max In Progress queries per agent (NULL = scheduler
+-- default, CQMS_AGENT_CAPACITY)
+-- =====================================================
+
+ALTER TABLE support_agents
+    ADD COLUMN max_in_progress INT NULL;
@@ -0,0 +1,8 @@
+-- =====================================================
+-- 0010 — Full-text search over query text
+-- InnoDB keeps the index current on every insert, so new
+-- queries are searchable as soon as they commit
+-- =====================================================
+
+CREATE FULLTEXT INDEX ft_query_text
+    ON client_queries(query_heading, query_description);
@@ -0,0 +1,24 @@
+-- =====================================================
+-- 0011 — Near-duplicate detection (MinHash / LSH)
+-- Only unresolved "root" queries are indexed; a query
+-- matching one is linked to it via duplicate_of
+-- =====================================================
+
+ALTER TABLE client_queries
+    ADD COLUMN duplicate_of VARCHAR(20) NULL,
+    ADD COLUMN duplicate_score FLOAT NULL;
+
+-- MinHash signature per indexed query (uint32 x NUM_PERM)
+CREATE TABLE IF NOT EXISTS query_minhash (
+    query_id VARCHAR(20) PRIMARY KEY,
+    signature VARBINARY(1024) NOT NULL
+);
+
+-- One row per LSH band: candidate lookup is a PK range read
+CREATE TABLE IF NOT EXISTS query_lsh_buckets (
+    band TINYINT UNSIGNED NOT NULL,
+    bucket BIGINT NOT NULL,
+    query_id VARCHAR(20) NOT NULL,
+    PRIMARY KEY (band, bucket, query_id),
+    KEY idx_lsh_query (query_id)
+);
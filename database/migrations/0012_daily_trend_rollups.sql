@@ -0,0 +1,52 @@
+-- =====================================================
+-- 0012 — Daily trend rollups
+-- Per-day, per-category opened / closed counts and
+-- resolution days, and per-day, per-agent closes, so
+-- trend charts read date buckets instead of rescanning
+-- client_queries. Maintained with each insert / close;
+-- the 'rollups' version is bumped on every rebuild so
+-- incremental trend caches know to reload
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS daily_category_rollup (
+    day DATE NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    opened INT NOT NULL DEFAULT 0,
+    closed INT NOT NULL DEFAULT 0,
+    total_resolution_days BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, category)
+);
+
+CREATE TABLE IF NOT EXISTS daily_agent_rollup (
+    day DATE NOT NULL,
+    support_id VARCHAR(20) NOT NULL,
+    closed INT NOT NULL DEFAULT 0,
+    total_resolution_days BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, support_id)
+);
+
+INSERT IGNORE INTO cache_versions (scope, version) VALUES ('rollups', 0);
+
+-- Backfill
+INSERT IGNORE INTO daily_category_rollup (day, category, opened, closed, total_resolution_days)
+SELECT day, category, SUM(opened), SUM(closed), SUM(days) FROM (
+    SELECT DATE(query_created_time) AS day, category,
+           COUNT(*) AS opened, 0 AS closed, 0 AS days
+    FROM client_queries
+    GROUP BY DATE(query_created_time), category
+    UNION ALL
+    SELECT DATE(query_closed_time), category,
+           0, COUNT(*), SUM(TIMESTAMPDIFF(DAY, query_created_time, query_closed_time))
+    FROM client_queries
+    WHERE status = 'Closed' AND query_closed_time IS NOT NULL
+    GROUP BY DATE(query_closed_time), category
+) AS t
+GROUP BY day, category;
+
+INSERT IGNORE INTO daily_agent_rollup (day, support_id, closed, total_resolution_days)
+SELECT DATE(query_closed_time), assigned_support_id,
+       COUNT(*), SUM(TIMESTAMPDIFF(DAY, query_created_time, query_closed_time))
+FROM client_queries
+WHERE status = 'Closed' AND query_closed_time IS NOT NULL
+  AND assigned_support_id IS NOT NULL
+GROUP BY DATE(query_closed_time), assigned_support_id;
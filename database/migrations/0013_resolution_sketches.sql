@@ -0,0 +1,39 @@
+-- =====================================================
+-- 0013 — Resolution-time quantile sketches
+-- Log-bucketed (DDSketch) counts of resolution days per
+-- agent / category and close month, updated with each
+-- close. Merging sketches is SUM(n) GROUP BY bucket
+-- Repair: python -m src.services.sketches --rebuild
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS resolution_sketches (
+    dimension ENUM('agent','category') NOT NULL,
+    dim_key VARCHAR(50) NOT NULL,
+    month INT NOT NULL,                 -- YYYYMM of query_closed_time
+    bucket SMALLINT NOT NULL,
+    n INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, dim_key, month, bucket)
+);
+
+-- Backfill (same buckets as services.sketches: 1% accuracy, 60s floor)
+INSERT IGNORE INTO resolution_sketches (dimension, dim_key, month, bucket, n)
+SELECT 'agent', assigned_support_id AS dim_key,
+       EXTRACT(YEAR_MONTH FROM query_closed_time) AS month,
+       CASE WHEN TIMESTAMPDIFF(SECOND, query_created_time, query_closed_time) < 60 THEN -32768
+         ELSE CEIL(LN(TIMESTAMPDIFF(SECOND, query_created_time, query_closed_time) / 86400) / 0.020000666706669435) END AS bucket,
+       COUNT(*)
+FROM client_queries
+WHERE status = 'Closed' AND query_closed_time IS NOT NULL
+  AND assigned_support_id IS NOT NULL
+GROUP BY dim_key, month, bucket;
+
+INSERT IGNORE INTO resolution_sketches (dimension, dim_key, month, bucket, n)
+SELECT 'category', category AS dim_key,
+       EXTRACT(YEAR_MONTH FROM query_closed_time) AS month,
+       CASE WHEN TIMESTAMPDIFF(SECOND, query_created_time, query_closed_time) < 60 THEN -32768
+         ELSE CEIL(LN(TIMESTAMPDIFF(SECOND, query_created_time, query_closed_time) / 86400) / 0.020000666706669435) END AS bucket,
+       COUNT(*)
+FROM client_queries
+WHERE status = 'Closed' AND query_closed_time IS NOT NULL
+  AND category IS NOT NULL
+GROUP BY dim_key, month, bucket;
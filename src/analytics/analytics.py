@@ -1,33 +1,67 @@
-import pandas as pd
-from services.db_connection import get_db_connection
+import os
+
+from services.delta_cache import cached_queries
+from services.result_cache import cached_read
+from services.query_frames import ANALYTICS_COLUMNS, apply_query_dtypes, memory_report
+from services.snapshot_store import read_snapshot
+from services import rollups
+from analytics import analytics_sql
+from utils.date_utils import derive_columns
+
+
+QUERY_COLUMNS = [
+    "query_id",
+    "client_email",
+    "client_mobile",
+    "normalized_mobile",
+    "is_valid_mobile",
+    "is_valid_email",
+    "category",
+    "query_heading",
+    "query_description",
+    "status",
+    "assigned_support_id",
+    "query_created_time",
+    "query_closed_time",
+    "issue_image_path",
+]
+
+
+# db       : delta-refreshed cache of the live table
+# snapshot : columnar month files (services.snapshot_store)
+ANALYTICS_SOURCE = os.environ.get("CQMS_ANALYTICS_SOURCE", "db")
 
 
 # --------------------------------------------------
 # Load all query data
 # --------------------------------------------------
-def load_queries():
-    conn = get_db_connection()
-    df = pd.read_sql("SELECT * FROM client_queries", conn)
-    conn.close()
-
-    df["query_created_time"] = pd.to_datetime(df["query_created_time"])
-    df["query_closed_time"] = pd.to_datetime(
-        df["query_closed_time"], errors="coerce"
-    )
-
-    df["query_age_days"] = (
-        (df["query_closed_time"].fillna(pd.Timestamp.now()))
-        - df["query_created_time"]
-    ).dt.days
-
-    return df
+@cached_read()
+def load_queries(source=None, columns=ANALYTICS_COLUMNS):
+    """
+    Typed frame of the requested columns (default: what the metrics
+    use, no free text) plus query_age_days. Pass QUERY_COLUMNS for
+    full rows.
+    """
+    source = source or ANALYTICS_SOURCE
+    columns = list(columns)
+
+    if source == "db":
+        # Delta-refreshed: only rows changed since the last call are fetched
+        df = cached_queries("analytics:" + ",".join(columns), columns)
+    elif source == "snapshot":
+        # Local files, no OLTP load; as fresh as the last export
+        df = apply_query_dtypes(read_snapshot(columns))
+    else:
+        raise ValueError(f"Unknown analytics source: {source}")
+
+    return derive_columns(df, "query_age_days")
 
 
 # --------------------------------------------------
 # Service Efficiency Metrics
 # --------------------------------------------------
 def service_efficiency_metrics(df):
-    closed_df = df[df["status"] == "Closed"].copy()
+    closed_df = df[df["status"] == "Closed"]
 
     if closed_df.empty:
         return {
@@ -35,10 +69,9 @@ def service_efficiency_metrics(df):
             "median_resolution": None
         }
 
-    resolution_days = (
-        closed_df["query_closed_time"]
-        - closed_df["query_created_time"]
-    ).dt.days
+    resolution_days = derive_columns(closed_df.copy(deep=False), "resolution_days")[
+        "resolution_days"
+    ]
 
     return {
         "avg_resolution": round(resolution_days.mean(), 2),
@@ -51,7 +84,7 @@ def service_efficiency_metrics(df):
 # --------------------------------------------------
 def support_load_metrics(df):
     return (
-        df.groupby("category")
+        df.groupby("category", observed=True)
         .size()
         .reset_index(name="query_count")
         .sort_values("query_count", ascending=False)
@@ -65,7 +98,7 @@ def agent_workload(df):
     closed = df[df["status"] == "Closed"]
 
     leaderboard = (
-        closed.groupby("assigned_support_id")
+        closed.groupby("assigned_support_id", observed=True)
         .agg(
             closed_queries=("query_id", "count"),
             avg_resolution_days=("query_age_days", "mean")
@@ -83,6 +116,8 @@ def agent_workload(df):
 
 # --------------------------------------------------
 # SLA Breach Detection
+# (flat age threshold for ad-hoc analysis; live SLA
+#  views use services.sla per-category due times)
 # --------------------------------------------------
 def sla_breaches(df, sla_days=3):
     return df[
@@ -91,3 +126,99 @@ def sla_breaches(df, sla_days=3):
     ][
         ["query_id", "assigned_support_id", "query_age_days", "status"]
     ]
+
+
+# --------------------------------------------------
+# Engine Selection (pandas / sql)
+# --------------------------------------------------
+METRICS = (
+    "service_efficiency_metrics",
+    "support_load_metrics",
+    "agent_workload",
+    "sla_breaches",
+)
+
+
+ROLLUP_METRICS = {
+    "support_load_metrics": rollups.read_category_counts,
+    "agent_workload": rollups.read_agent_leaderboard,
+}
+
+
+def run_metric(name, engine="pandas", df=None, **kwargs):
+    """
+    Computes a metric with the chosen engine.
+
+    pandas : aggregates the cached DataFrame (df or load_queries())
+    sql    : pushes the aggregation down into MySQL (analytics_sql)
+    rollup : reads the pre-aggregated rollup tables (where available)
+    """
+    if name not in METRICS:
+        raise ValueError(f"Unknown metric: {name}")
+
+    if engine == "sql":
+        return getattr(analytics_sql, name)(**kwargs)
+
+    if engine == "rollup":
+        if name not in ROLLUP_METRICS:
+            raise ValueError(f"No rollup available for: {name}")
+        return ROLLUP_METRICS[name](**kwargs)
+
+    if engine != "pandas":
+        raise ValueError(f"Unknown analytics engine: {engine}")
+
+    if df is None:
+        df = load_queries()
+    return globals()[name](df, **kwargs)
+
+
+def _normalized(result, sort_by):
+    if isinstance(result, dict):
+        return result
+    return (
+        result.sort_values(sort_by)
+        .reset_index(drop=True)
+        .astype({col: "object" for col in result.columns})
+    )
+
+
+def compare_engines(df=None, sla_days=3):
+    """
+    Runs every metric on both engines and reports whether they agree.
+    Returns {metric: True/False}.
+    """
+    if df is None:
+        df = load_queries()
+
+    sort_keys = {
+        "support_load_metrics": ["category"],
+        "agent_workload": ["assigned_support_id"],
+        "sla_breaches": ["query_id"],
+    }
+
+    report = {}
+    for name in METRICS:
+        kwargs = {"sla_days": sla_days} if name == "sla_breaches" else {}
+        pandas_result = run_metric(name, "pandas", df=df, **kwargs)
+        sql_result = run_metric(name, "sql", **kwargs)
+
+        if isinstance(pandas_result, dict):
+            report[name] = pandas_result == sql_result
+        else:
+            keys = sort_keys[name]
+            report[name] = _normalized(pandas_result, keys).equals(
+                _normalized(sql_result, keys)
+            )
+
+    return report
+
+
+if __name__ == "__main__":
+    # Run from src/:  python -m analytics.analytics [--memory]
+    import sys
+
+    if "--memory" in sys.argv:
+        print(memory_report(load_queries()).to_string())
+    else:
+        for metric, same in compare_engines().items():
+            print(f"{'✅' if same else '❌'} {metric}")
@@ -0,0 +1,145 @@
+"""
+analytics_sql.py
+--------------------------------------------------
+SQL-backed versions of the CQMS analytics metrics.
+
+Each function returns the same shape as its pandas
+counterpart in analytics.py, but the aggregation runs
+inside MySQL so only the (tiny) result set crosses
+the wire instead of the whole client_queries table.
+
+Resolution / age days use TIMESTAMPDIFF(DAY, ...),
+which matches pandas `.dt.days` for non-negative
+durations. Results are cached until the next write
+(services.result_cache).
+--------------------------------------------------
+"""
+
+from datetime import datetime
+
+import pandas as pd
+from services.db_connection import db_session
+from services.result_cache import cached_read
+
+
+# --------------------------------------------------
+# Service Efficiency Metrics
+# --------------------------------------------------
+@cached_read()
+def service_efficiency_metrics():
+    # Exact median via window functions (MySQL 8+):
+    # average of the middle one or two rows
+    sql = """
+        WITH res AS (
+            SELECT TIMESTAMPDIFF(DAY, query_created_time, query_closed_time) AS d
+            FROM client_queries
+            WHERE status = 'Closed'
+        ),
+        ranked AS (
+            SELECT d,
+                   ROW_NUMBER() OVER (ORDER BY d) AS rn,
+                   COUNT(*) OVER () AS cnt
+            FROM res
+        )
+        SELECT
+            (SELECT AVG(d) FROM res) AS avg_resolution,
+            (SELECT AVG(d) FROM ranked
+             WHERE rn IN (FLOOR((cnt + 1) / 2), FLOOR((cnt + 2) / 2))) AS median_resolution
+    """
+
+    with db_session() as cur:
+        cur.execute(sql)
+        avg_res, median_res = cur.fetchone()
+
+    if avg_res is None:
+        return {
+            "avg_resolution": None,
+            "median_resolution": None
+        }
+
+    return {
+        "avg_resolution": round(float(avg_res), 2),
+        "median_resolution": int(median_res)
+    }
+
+
+# --------------------------------------------------
+# Support Load Monitoring
+# --------------------------------------------------
+@cached_read()
+def support_load_metrics():
+    with db_session() as cur:
+        cur.execute(
+            """
+            SELECT category, COUNT(*) AS query_count
+            FROM client_queries
+            GROUP BY category
+            ORDER BY query_count DESC
+            """
+        )
+        rows = cur.fetchall()
+
+    return pd.DataFrame(rows, columns=["category", "query_count"])
+
+
+# --------------------------------------------------
+# Agent Workload Analytics
+# --------------------------------------------------
+@cached_read()
+def agent_workload():
+    with db_session() as cur:
+        cur.execute(
+            """
+            SELECT assigned_support_id,
+                   COUNT(*) AS closed_queries,
+                   AVG(TIMESTAMPDIFF(DAY, query_created_time, query_closed_time))
+                       AS avg_resolution_days
+            FROM client_queries
+            WHERE status = 'Closed'
+              AND assigned_support_id IS NOT NULL
+            GROUP BY assigned_support_id
+            ORDER BY closed_queries DESC
+            """
+        )
+        rows = cur.fetchall()
+
+    leaderboard = pd.DataFrame(
+        rows,
+        columns=["assigned_support_id", "closed_queries", "avg_resolution_days"],
+    )
+
+    leaderboard["avg_resolution_days"] = (
+        leaderboard["avg_resolution_days"].astype(float).round(1)
+    )
+
+    return leaderboard
+
+
+# --------------------------------------------------
+# SLA Breach Detection
+# --------------------------------------------------
+@cached_read()
+def sla_breaches(sla_days=3, now=None):
+    # age > sla_days  <=>  created <= now - (sla_days + 1) days,
+    # which keeps the filter sargable on query_created_time
+    now = now or datetime.now()
+
+    with db_session() as cur:
+        cur.execute(
+            """
+            SELECT query_id,
+                   assigned_support_id,
+                   TIMESTAMPDIFF(DAY, query_created_time, %s) AS query_age_days,
+                   status
+            FROM client_queries
+            WHERE status <> 'Closed'
+              AND query_created_time <= %s - INTERVAL %s DAY
+            """,
+            (now, now, sla_days + 1),
+        )
+        rows = cur.fetchall()
+
+    return pd.DataFrame(
+        rows,
+        columns=["query_id", "assigned_support_id", "query_age_days", "status"],
+    )
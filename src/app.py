@@ -9,11 +9,16 @@ Responsibilities:
 - Session management
 - Sidebar navigation
 - Role-based routing
+- Page render timing (services.instrumentation)
 --------------------------------------------------
 """
 
 import streamlit as st
 
+from services.assignment import start_worker
+from services.instrumentation import start_metrics_server, time_page
+from services.sla import start_sweeper
+
 
 # --------------------------------------------------
 # PAGE CONFIG
@@ -25,6 +30,16 @@ st.set_page_config(
 )
 
 
+# Optional /metrics endpoint (CQMS_METRICS_PORT), started once per process
+start_metrics_server()
+
+# Background SLA breach sweep (CQMS_SLA_SWEEP_SECONDS), once per process
+start_sweeper()
+
+# Optional auto-assignment worker (CQMS_ASSIGN_INTERVAL), once per process
+start_worker()
+
+
 # --------------------------------------------------
 # SESSION STATE INITIALIZATION
 # --------------------------------------------------
@@ -76,20 +91,29 @@ def render_sidebar():
 def route_page():
     page = st.session_state.get("page")
 
-    if page == "login":
-        from auth.login import login_page
-        login_page()
+    # Hidden admin page, not linked from the sidebar
+    if st.query_params.get("admin") == "metrics":
+        page = "admin_metrics"
+
+    with time_page(page or "none"):
+        if page == "login":
+            from auth.login import login_page
+            login_page()
 
-    elif page == "client_dashboard":
-        from client.client_dashboard import client_dashboard
-        client_dashboard()
+        elif page == "client_dashboard":
+            from client.client_dashboard import client_dashboard
+            client_dashboard()
 
-    elif page == "support_dashboard":
-        from support.support_dashboard import support_dashboard
-        support_dashboard()
+        elif page == "support_dashboard":
+            from support.support_dashboard import support_dashboard
+            support_dashboard()
 
-    else:
-        st.error("Page not found.")
+        elif page == "admin_metrics":
+            from support.metrics_page import metrics_page
+            metrics_page()
+
+        else:
+            st.error("Page not found.")
 
 
 # --------------------------------------------------
@@ -8,7 +8,10 @@ Features:
 - Password hashing (SHA-256)
 - Register user
 - Login using username OR email OR mobile number
+  (identifier is classified first, so each login is
+  a single unique-index lookup)
 - Role-based validation
+- Short-TTL user record cache for login bursts
 
 Tech:
 - Python
@@ -18,7 +21,14 @@ Tech:
 """
 
 import hashlib
-from services.db_connection import get_db_connection, close_db_connection
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from services.db_connection import db_session
+from utils.regex_utils import is_valid_mobile, looks_like_phone, normalize_mobile
 
 
 # --------------------------------------------------
@@ -31,6 +41,119 @@ def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode()).hexdigest()
 
 
+# --------------------------------------------------
+# IDENTIFIER ROUTING
+# --------------------------------------------------
+def classify_identifier(identifier):
+    """
+    Returns (kind, value) with kind in {"email", "mobile", "username"}.
+    """
+    identifier = identifier.strip()
+
+    if "@" in identifier:
+        return "email", identifier
+
+    if looks_like_phone(identifier):
+        mobile = normalize_mobile(identifier)
+        if is_valid_mobile(mobile):
+            return "mobile", mobile
+
+    return "username", identifier
+
+
+USER_COLUMNS = "user_id, username, email, mobile_number, role, hashed_password"
+
+LOOKUP_SQL = {
+    "email": f"SELECT {USER_COLUMNS} FROM users WHERE email = %s",
+    # normalized form first, raw input for rows stored before normalization
+    "mobile": f"SELECT {USER_COLUMNS} FROM users WHERE mobile_number IN (%s, %s)",
+    "username": f"SELECT {USER_COLUMNS} FROM users WHERE username = %s",
+}
+
+
+# --------------------------------------------------
+# USER RECORD CACHE (bounded, short TTL)
+# --------------------------------------------------
+LOGIN_CACHE_TTL = float(os.environ.get("CQMS_LOGIN_CACHE_TTL", 30))   # 0 disables
+LOGIN_CACHE_SIZE = int(os.environ.get("CQMS_LOGIN_CACHE_SIZE", 1024))
+
+
+class UserCache:
+    """
+    LRU cache of user rows keyed by (kind, value), entries expire after ttl.
+    Only found users are cached; misses always go to the database.
+    """
+
+    def __init__(self, ttl=LOGIN_CACHE_TTL, maxsize=LOGIN_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, record = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return record
+
+    def put(self, key, record):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, record)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_user_cache = UserCache()
+
+
+def find_user(identifier, use_cache=True):
+    """
+    Fetches the user row for an identifier with one unique-index lookup.
+    Returns the row dict (including hashed_password) or None.
+    """
+    kind, value = classify_identifier(identifier)
+    key = (kind, value.lower() if kind == "email" else value)
+
+    if use_cache:
+        cached = _user_cache.get(key)
+        if cached is not None:
+            return cached
+
+    with db_session(dictionary=True) as cursor:
+        params = (value, identifier.strip()) if kind == "mobile" else (value,)
+        cursor.execute(LOOKUP_SQL[kind], params)
+        user = cursor.fetchone()
+
+        # All-digit usernames look like mobiles: one more unique lookup
+        if user is None and kind == "mobile":
+            cursor.execute(LOOKUP_SQL["username"], (identifier.strip(),))
+            user = cursor.fetchone()
+
+    if user is not None and use_cache:
+        _user_cache.put(key, user)
+
+    return user
+
+
+def clear_user_cache():
+    _user_cache.clear()
+
+
 # --------------------------------------------------
 # REGISTER USER
 # --------------------------------------------------
@@ -39,36 +162,34 @@ def register_user(username, email, mobile, password, role):
     Registers a new user (Client or Support).
     Returns (success, message).
     """
-    conn = get_db_connection()
-    if not conn:
-        return False, "Database connection failed."
-
-    cursor = conn.cursor()
-
     try:
         hashed_pwd = hash_password(password)
 
+        # Store normalized mobiles so mobile logins are a single lookup
+        normalized = normalize_mobile(mobile)
+        if is_valid_mobile(normalized):
+            mobile = normalized
+
         query = """
             INSERT INTO users
             (username, email, mobile_number, hashed_password, role)
             VALUES (%s, %s, %s, %s, %s)
         """
 
-        cursor.execute(query, (username, email, mobile, hashed_pwd, role))
-        conn.commit()
+        with db_session() as cursor:
+            cursor.execute(query, (username, email, mobile, hashed_pwd, role))
+
+        clear_user_cache()
         return True, "User registered successfully."
 
     except Exception as e:
         return False, str(e)
 
-    finally:
-        close_db_connection(conn, cursor)
-
 
 # --------------------------------------------------
 # LOGIN USER
 # --------------------------------------------------
-def login_user(identifier, password, role):
+def login_user(identifier, password, role, use_cache=True):
     """
     Logs in user using:
     - Username OR
@@ -78,40 +199,17 @@ def login_user(identifier, password, role):
     Role must match (Client / Support).
     Returns (success, user_data or error_message).
     """
-    conn = get_db_connection()
-    if not conn:
-        return False, "Database connection failed."
-
-    cursor = conn.cursor(dictionary=True)
-
     try:
-        hashed_pwd = hash_password(password)
-
-        query = """
-            SELECT user_id, username, email, mobile_number, role
-            FROM users
-            WHERE (username = %s OR email = %s OR mobile_number = %s)
-              AND hashed_password = %s
-              AND role = %s
-        """
-
-        cursor.execute(query, (
-            identifier,
-            identifier,
-            identifier,
-            hashed_pwd,
-            role
-        ))
-
-        user = cursor.fetchone()
-
-        if user:
-            return True, user
+        user = find_user(identifier, use_cache=use_cache)
+
+        if (
+            user
+            and user["role"] == role
+            and hmac.compare_digest(user["hashed_password"], hash_password(password))
+        ):
+            return True, {k: v for k, v in user.items() if k != "hashed_password"}
         else:
             return False, "Invalid credentials."
 
     except Exception as e:
         return False, str(e)
-
-    finally:
-        close_db_connection(conn, cursor)
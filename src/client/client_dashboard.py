@@ -1,8 +1,26 @@
 import streamlit as st
 import pandas as pd
-import re
 from datetime import datetime
-from services.db_connection import get_db_connection
+from services.db_connection import pooled_connection
+from services.image_store import InvalidImage, store_image
+from services.query_actions import client_scope, create_query
+from services.result_cache import cached_read
+from utils.date_utils import derive_columns
+from utils.export_widgets import export_controls
+from utils.regex_utils import is_valid_mobile, normalize_mobile
+
+
+# ===================================================
+# DATA (cached until the next write)
+# ===================================================
+@cached_read(scope=client_scope)
+def _load_client_queries(client_email):
+    with pooled_connection() as conn:
+        return pd.read_sql(
+            "SELECT * FROM client_queries WHERE client_email=%s",
+            conn,
+            params=(client_email,),
+        )
 
 
 # ===================================================
@@ -55,13 +73,7 @@ def client_dashboard():
     # ---------------------------------------------------
     # FETCH DATA
     # ---------------------------------------------------
-    conn = get_db_connection()
-    df = pd.read_sql(
-        "SELECT * FROM client_queries WHERE client_email=%s",
-        conn,
-        params=(client_email,),
-    )
-    conn.close()
+    df = _load_client_queries(client_email)
 
     if df.empty:
         st.info("No queries found.")
@@ -71,6 +83,8 @@ def client_dashboard():
     df["query_closed_time"] = pd.to_datetime(
         df["query_closed_time"], errors="coerce"
     )
+    # one clock for every derived column of this render
+    derive_columns(df, "query_age_days", "resolution_days")
 
     # ---------------------------------------------------
     # APPLY FILTERS
@@ -107,12 +121,8 @@ def client_dashboard():
         open_q = (df["status"] == "Open").sum()
         closed_q = (df["status"] == "Closed").sum()
 
-        df_closed = df[df["status"] == "Closed"].copy()
+        df_closed = df[df["status"] == "Closed"]
         if not df_closed.empty:
-            df_closed["resolution_days"] = (
-                df_closed["query_closed_time"]
-                - df_closed["query_created_time"]
-            ).dt.days
             avg_res = round(df_closed["resolution_days"].mean(), 1)
         else:
             avg_res = "—"
@@ -154,6 +164,7 @@ def client_dashboard():
             "status",
             "query_created_time",
             "query_closed_time",
+            "query_age_days",
             "is_valid_mobile",
         ]
 
@@ -173,11 +184,16 @@ def client_dashboard():
             """
         )
 
-        st.download_button(
-            "⬇ Download CSV",
-            filtered_df.to_csv(index=False),
-            "my_queries.csv",
-            "text/csv",
+        # Streamed from MySQL to a file, same filters as above
+        start, end = date_range if len(date_range) == 2 else (None, None)
+        export_controls(
+            "client_export",
+            "my_queries",
+            client_email=client_email,
+            status=status_filter,
+            category=category_filter,
+            start=start,
+            end=end,
         )
 
     # ===================================================
@@ -186,12 +202,9 @@ def client_dashboard():
     with tab_new:
         st.subheader("➕ Raise New Query")
 
-        def normalize_mobile(m):
-            digits = re.sub(r"\D", "", m)
-            return digits[-10:] if len(digits) >= 10 else None
-
-        def valid_mobile(m):
-            return bool(re.match(r"^[6-9]\d{9}$", m))
+        notice = st.session_state.pop("duplicate_notice", None)
+        if notice:
+            st.info(notice)
 
         with st.form("new_query"):
             category = st.selectbox(
@@ -229,48 +242,33 @@ def client_dashboard():
                 return
 
             nm = normalize_mobile(client_mobile)
-            if not nm or not valid_mobile(nm):
+            if not is_valid_mobile(nm):
                 st.error("Invalid registered mobile number.")
                 return
 
-            conn = get_db_connection()
-            cur = conn.cursor()
-
-            # Generate next CQ ID
-            cur.execute(
-                "SELECT query_id FROM client_queries ORDER BY query_created_time DESC LIMIT 1"
-            )
-            last = cur.fetchone()
-            next_id = (
-                f"CQ{int(last[0][2:]) + 1:03d}"
-                if last
-                else "CQ001"
-            )
+            # Hash-named + deduplicated; thumbnail is built in the background
+            try:
+                image_path = store_image(image.getvalue(), image.name)
+            except InvalidImage as e:
+                st.error(str(e))
+                return
 
-            cur.execute(
-                """
-                INSERT INTO client_queries
-                (query_id, client_email, client_mobile,
-                 normalized_mobile, is_valid_mobile,
-                 category, query_heading, query_description,
-                 status, query_created_time)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,'Open',NOW())
-                """,
-                (
-                    next_id,
-                    client_email,
-                    client_mobile,
-                    nm,
-                    1,
-                    category,
-                    heading,
-                    description,
-                ),
+            # linked to the same issue already open for this client?
+            new_id, similar = create_query(
+                client_email,
+                client_mobile,
+                nm,
+                category,
+                heading,
+                description,
+                image_path,
             )
 
-            conn.commit()
-            cur.close()
-            conn.close()
+            if similar:
+                st.session_state["duplicate_notice"] = (
+                    f"{new_id} looks like your open query {similar[0]} "
+                    f"({similar[1]:.0%} similar) — support will handle them together."
+                )
 
             st.success("Query submitted successfully!")
             st.rerun()
@@ -0,0 +1,475 @@
+"""
+assignment.py
+--------------------------------------------------
+Load-balanced auto-assignment of open queries.
+
+- Unassigned Open queries form a priority queue:
+  earliest SLA due time first, pulled forward by a
+  per-category boost, oldest first on ties
+- Only active agents (support_agents.active_status)
+  receive work, least utilised first (In Progress
+  load / max_in_progress), never above capacity
+- One run assigns up to `batch_size` queries in a
+  single transaction (rows are locked with SKIP
+  LOCKED, so manual Picks and other workers never
+  block or double-assign)
+- Each run reports throughput and fairness (Jain's
+  index over agent utilisation); totals feed the
+  metrics exposition
+- --simulate replays the sample dataset offline and
+  compares the scheduler with round-robin
+
+Run using:
+    python -m src.services.assignment --once --batch 50
+    python -m src.services.assignment --loop       # every CQMS_ASSIGN_INTERVAL s
+    python -m src.services.assignment --simulate --agents 20 --capacity 10
+--------------------------------------------------
+"""
+
+import argparse
+import heapq
+import os
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from . import rollups, sla
+from .instrumentation import register_collector
+from .query_actions import CLAIMABLE, client_scope
+from .query_pages import queue_scope
+from .result_cache import QUERIES, touch, write_session
+
+
+DEFAULT_CAPACITY = int(os.environ.get("CQMS_AGENT_CAPACITY", 10))
+ASSIGN_BATCH = int(os.environ.get("CQMS_ASSIGN_BATCH", 50))
+ASSIGN_INTERVAL = float(os.environ.get("CQMS_ASSIGN_INTERVAL", 0))   # 0 = no background worker
+CANDIDATE_WINDOW = 4     # candidates read per run, as a multiple of batch_size
+DEFAULT_DUE = timedelta(hours=72)   # queries without a due time
+
+# Hours a category is pulled forward in the queue
+CATEGORY_BOOST_HOURS = {
+    "Payment Failure": 12,
+    "Login Issue": 6,
+    "Technical Support": 6,
+}
+
+SAMPLE_CSV = "data/processed/cleaned_client_queries.csv"
+POLICIES = ("least_loaded", "round_robin")
+
+
+# --------------------------------------------------
+# PLANNING (pure: shared by live runs and simulation)
+# --------------------------------------------------
+def priority_key(query):
+    """
+    Sort key, smallest first: boosted due time, then age, then id.
+    query needs query_id, category, query_created_time, sla_due_at.
+    """
+    created = query["query_created_time"]
+    due = query.get("sla_due_at")
+    if due is None or pd.isna(due):
+        due = created + DEFAULT_DUE
+    boost = timedelta(hours=CATEGORY_BOOST_HOURS.get(query["category"], 0))
+    return (due - boost, created, query["query_id"])
+
+
+def plan_assignments(queries, agents, batch_size, policy="least_loaded"):
+    """
+    Decides who gets what.
+
+    queries : iterable of query dicts (see priority_key)
+    agents  : {support_id: (load, capacity)}; mutated loads are
+              not written back
+    policy  : least_loaded (priority order, least utilised agent)
+              or round_robin (FIFO order, agents in turn)
+
+    Returns {support_id: [query_id, ...]} in assignment order.
+    """
+    plan = {}
+    loads = {a: load for a, (load, cap) in agents.items() if load < cap}
+    if not loads or batch_size <= 0:
+        return plan
+    capacity = {a: agents[a][1] for a in loads}
+
+    # never pick more than the free capacity (partial sort)
+    limit = min(batch_size, sum(capacity[a] - loads[a] for a in loads))
+
+    if policy == "least_loaded":
+        order = heapq.nsmallest(limit, queries, key=priority_key)
+        heap = [(loads[a] / capacity[a], loads[a], a) for a in loads]
+        heapq.heapify(heap)
+
+        for query in order:
+            if not heap:
+                break
+            _, load, agent = heapq.heappop(heap)
+            plan.setdefault(agent, []).append(query["query_id"])
+            load += 1
+            if load < capacity[agent]:
+                heapq.heappush(heap, (load / capacity[agent], load, agent))
+
+    elif policy == "round_robin":
+        order = heapq.nsmallest(
+            limit, queries, key=lambda q: (q["query_created_time"], q["query_id"])
+        )
+        ring = sorted(loads)
+        turn = 0
+
+        for query in order:
+            if not ring:
+                break
+            agent = ring[turn % len(ring)]
+            plan.setdefault(agent, []).append(query["query_id"])
+            loads[agent] += 1
+            if loads[agent] >= capacity[agent]:
+                ring.remove(agent)
+            else:
+                turn += 1
+
+    else:
+        raise ValueError(f"Unknown policy: {policy}")
+
+    return plan
+
+
+def jain_index(values):
+    """
+    Jain's fairness index: 1.0 = perfectly even, 1/n = one takes all.
+    """
+    values = np.asarray(list(values), dtype=float)
+    if not len(values) or not values.any():
+        return 1.0
+    return float(values.sum() ** 2 / (len(values) * (values ** 2).sum()))
+
+
+# --------------------------------------------------
+# LIVE RUN (one transaction)
+# --------------------------------------------------
+_totals = {"runs": 0, "assigned": 0, "seconds": 0.0, "last_fairness": 1.0}
+_totals_lock = threading.Lock()
+
+
+def assignment_stats():
+    """
+    Cumulative scheduler counters for this process.
+    """
+    with _totals_lock:
+        return dict(_totals)
+
+
+register_collector("assignment", assignment_stats)
+
+
+def _active_agents(cur):
+    """
+    {support_id: (in_progress_load, capacity)} for active agents.
+    """
+    cur.execute(
+        """
+        SELECT support_id, COALESCE(max_in_progress, %s)
+        FROM support_agents
+        WHERE active_status = TRUE
+        """,
+        (DEFAULT_CAPACITY,),
+    )
+    capacity = dict(cur.fetchall())
+    if not capacity:
+        return {}
+
+    cur.execute(
+        """
+        SELECT assigned_support_id, COUNT(*)
+        FROM client_queries
+        WHERE status = 'In Progress'
+        GROUP BY assigned_support_id
+        """
+    )
+    loads = {agent: int(n) for agent, n in cur.fetchall() if agent in capacity}
+    return {agent: (loads.get(agent, 0), cap) for agent, cap in capacity.items()}
+
+
+def _candidates(cur, limit):
+    """
+    Locks up to `limit` claimable queries, earliest due first
+    (deadline index), then undated ones oldest first.
+    """
+    columns = ["query_id", "client_email", "category", "query_created_time", "sla_due_at"]
+    select = f"SELECT {', '.join(columns)} FROM client_queries"
+    cur.execute(
+        f"""
+        {select}
+        WHERE sla_due_at IS NOT NULL AND {CLAIMABLE}
+        ORDER BY sla_due_at
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+        """,
+        (limit,),
+    )
+    rows = cur.fetchall()
+
+    if len(rows) < limit:
+        cur.execute(
+            f"""
+            {select}
+            WHERE sla_due_at IS NULL AND {CLAIMABLE}
+            ORDER BY query_created_time, query_id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+            """,
+            (limit - len(rows),),
+        )
+        rows += cur.fetchall()
+
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def run_assignment(batch_size=ASSIGN_BATCH):
+    """
+    Assigns up to batch_size queries to active agents.
+    Returns a summary dict (assigned, per_agent, seconds,
+    throughput_per_s, fairness).
+    """
+    started = time.perf_counter()
+    per_agent = {}
+
+    with write_session() as cur:
+        agents = _active_agents(cur)
+        queries = _candidates(cur, batch_size * CANDIDATE_WINDOW) if agents else []
+        plan = plan_assignments(queries, agents, batch_size)
+
+        for agent, query_ids in plan.items():
+            placeholders = ",".join(["%s"] * len(query_ids))
+            cur.execute(
+                f"""
+                UPDATE client_queries
+                SET assigned_support_id=%s,
+                    status='In Progress'
+                WHERE query_id IN ({placeholders}) AND {CLAIMABLE}
+                """,
+                (agent, *query_ids),
+            )
+            per_agent[agent] = cur.rowcount
+            rollups.record_status_change(cur, "Open", "In Progress", per_agent[agent])
+            sla.assign_due(cur, query_ids)
+
+        planned = {q for ids in plan.values() for q in ids}
+        touch()
+        if planned:
+            touch(
+                QUERIES, queue_scope("open"),
+                *(queue_scope("in_progress", agent) for agent in plan),
+                *{client_scope(q["client_email"]) for q in queries if q["query_id"] in planned},
+            )
+
+    seconds = time.perf_counter() - started
+    assigned = sum(per_agent.values())
+    fairness = jain_index(
+        (load + per_agent.get(agent, 0)) / cap for agent, (load, cap) in agents.items()
+    )
+
+    with _totals_lock:
+        _totals["runs"] += 1
+        _totals["assigned"] += assigned
+        _totals["seconds"] += seconds
+        _totals["last_fairness"] = round(fairness, 4)
+
+    return {
+        "assigned": assigned,
+        "per_agent": per_agent,
+        "seconds": round(seconds, 3),
+        "throughput_per_s": round(assigned / seconds, 1) if seconds else None,
+        "fairness": round(fairness, 4),
+    }
+
+
+# --------------------------------------------------
+# BACKGROUND WORKER
+# --------------------------------------------------
+def _worker_loop(interval, batch_size):
+    while True:
+        try:
+            summary = run_assignment(batch_size)
+            if summary["assigned"]:
+                print(
+                    f"🤖 Auto-assigned {summary['assigned']} queries "
+                    f"(fairness {summary['fairness']})"
+                )
+        except Exception as e:   # keep the daemon alive: start_worker won't restart it
+            print(f"❌ Auto-assignment failed: {e!r}")
+        time.sleep(interval)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_worker(interval=ASSIGN_INTERVAL, batch_size=ASSIGN_BATCH):
+    """
+    Runs run_assignment() every `interval` seconds in a daemon
+    thread, once per process. No-op when interval is 0.
+    """
+    global _worker
+
+    if not interval:
+        return None
+
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(
+                target=_worker_loop, args=(interval, batch_size),
+                name="cqms-assign", daemon=True,
+            )
+            _worker.start()
+
+    return _worker
+
+
+# --------------------------------------------------
+# SIMULATION (offline, sample dataset)
+# --------------------------------------------------
+def _load_sample(path, seed):
+    """
+    Arrivals spread over their raise day, service times from
+    the dataset's resolution days (sampled where missing).
+    """
+    df = pd.read_csv(
+        path,
+        usecols=["query_id", "category", "query_created_time", "resolution_time_days"],
+        parse_dates=["query_created_time"],
+    )
+    rng = np.random.default_rng(seed)
+
+    df["query_created_time"] += pd.to_timedelta(rng.uniform(0, 24, len(df)), unit="h")
+
+    days = df["resolution_time_days"]
+    known = days.dropna().to_numpy()
+    missing = days.isna().to_numpy()
+    if len(known):
+        days = days.to_numpy(copy=True)
+        days[missing] = rng.choice(known, missing.sum())
+    else:
+        days = rng.exponential(3.0, len(df))
+    hours = np.asarray(days, dtype=float) * 24
+    hours = np.where(hours <= 0, rng.uniform(1, 24, len(df)), hours)   # same-day fixes
+    df["service"] = pd.to_timedelta(hours, unit="h")
+
+    return df.sort_values("query_created_time").reset_index(drop=True)
+
+
+def simulate(path=SAMPLE_CSV, agents=20, capacity=DEFAULT_CAPACITY, policy="least_loaded",
+             tick=timedelta(hours=1), pickup_target=timedelta(hours=24), seed=7):
+    """
+    Replays arrivals hour by hour: finished work frees capacity,
+    then one scheduler run assigns pending queries. A query
+    breaches when it is assigned after its pickup due time.
+    Returns a metrics dict (waits, SLA breach rate, throughput,
+    fairness of assigned work across agents).
+    """
+    if agents < 1 or capacity < 1:
+        raise ValueError("simulate needs at least one agent with capacity >= 1")
+
+    df = _load_sample(path, seed)
+    arrivals = [
+        {"query_id": qid, "category": cat, "query_created_time": created,
+         "sla_due_at": created + pickup_target, "service": timedelta(seconds=service)}
+        for qid, cat, created, service in zip(
+            df["query_id"], df["category"],
+            df["query_created_time"].dt.to_pydatetime(), df["service"].dt.total_seconds(),
+        )
+    ]
+
+    agent_ids = [f"SIM{i:03d}" for i in range(1, agents + 1)]
+    load = dict.fromkeys(agent_ids, 0)
+    assigned_total = dict.fromkeys(agent_ids, 0)
+    finishing = []   # (finish_time, seq, agent)
+    pending = {}
+    waits, breaches, seq, i = [], 0, 0, 0
+
+    hour = lambda t: t.replace(minute=0, second=0, microsecond=0)
+    now = hour(arrivals[0]["query_created_time"]) if arrivals else None
+    started_at = now
+
+    while i < len(arrivals) or pending:
+        now += tick
+
+        while finishing and finishing[0][0] <= now:
+            _, _, agent = heapq.heappop(finishing)
+            load[agent] -= 1
+
+        while i < len(arrivals) and arrivals[i]["query_created_time"] <= now:
+            pending[arrivals[i]["query_id"]] = arrivals[i]
+            i += 1
+
+        if not pending:
+            # idle: jump to the next arrival
+            if i < len(arrivals):
+                now = hour(arrivals[i]["query_created_time"])
+            continue
+
+        plan = plan_assignments(
+            pending.values(), {a: (load[a], capacity) for a in agent_ids},
+            batch_size=len(pending), policy=policy,
+        )
+        for agent, query_ids in plan.items():
+            for query_id in query_ids:
+                q = pending.pop(query_id)
+                done = now + q["service"]
+                waits.append((now - q["query_created_time"]).total_seconds() / 3600)
+                breaches += now > q["sla_due_at"]
+                load[agent] += 1
+                assigned_total[agent] += 1
+                seq += 1
+                heapq.heappush(finishing, (done, seq, agent))
+
+    days = max((now - started_at).total_seconds() / 86400, 1) if arrivals else 1
+    waits = np.asarray(waits)
+    return {
+        "policy": policy,
+        "agents": agents,
+        "capacity": capacity,
+        "queries": len(arrivals),
+        "sim_days": round(days, 1),
+        "throughput_per_day": round(len(waits) / days, 1),
+        "wait_p50_h": round(float(np.percentile(waits, 50)), 1) if len(waits) else 0.0,
+        "wait_p95_h": round(float(np.percentile(waits, 95)), 1) if len(waits) else 0.0,
+        "sla_breach_rate": round(breaches / len(waits), 4) if len(waits) else 0.0,
+        "fairness": round(jain_index(assigned_total.values()), 4),
+        "max_min_assigned": (max(assigned_total.values()), min(assigned_total.values())),
+    }
+
+
+# --------------------------------------------------
+# RUN
+# --------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CQMS auto-assignment scheduler")
+    parser.add_argument("--once", action="store_true", help="one assignment run")
+    parser.add_argument("--loop", action="store_true", help="run every --interval seconds")
+    parser.add_argument("--interval", type=float, default=ASSIGN_INTERVAL or 60)
+    parser.add_argument("--batch", type=int, default=ASSIGN_BATCH)
+    parser.add_argument("--simulate", action="store_true", help="offline replay of --csv")
+    parser.add_argument("--csv", default=SAMPLE_CSV)
+    parser.add_argument("--agents", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY)
+    parser.add_argument("--policy", choices=POLICIES + ("both",), default="both")
+    args = parser.parse_args()
+
+    if args.simulate and (args.agents < 1 or args.capacity < 1):
+        parser.error("--agents and --capacity must be at least 1")
+
+    if args.simulate:
+        policies = POLICIES if args.policy == "both" else (args.policy,)
+        results = pd.DataFrame([
+            simulate(args.csv, args.agents, args.capacity, policy) for policy in policies
+        ]).set_index("policy")
+        print(results.T.to_string())
+    elif args.loop:
+        print(f"🤖 Auto-assigning every {args.interval:g}s (batch {args.batch})...")
+        _worker_loop(args.interval, args.batch)
+    elif args.once:
+        print("✅", run_assignment(args.batch))
+    else:
+        parser.print_help()
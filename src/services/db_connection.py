@@ -4,13 +4,35 @@ db_connection.py
 Reusable MySQL database connection utility
 for Client Query Management System (CQMS)
 
+Provides a process-wide connection pool so every
+Streamlit session, page and CLI job reuses a small
+set of authenticated connections instead of paying
+the TCP + auth handshake per statement.
+
+Usage:
+    with db_session() as cur:
+        cur.execute("SELECT ...", params)
+        rows = cur.fetchall()
+
+    with pooled_connection() as conn:
+        df = pd.read_sql(sql, conn)
+
 Tech:
 - mysql-connector-python
 --------------------------------------------------
 """
 
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+from .instrumentation import instrument_connection, register_collector
 
 
 # --------------------------------------------------
@@ -20,16 +42,251 @@ DB_CONFIG = {
     "host": "localhost", # Localhost for development
     "user": "root", # Default root user for local dev
     "password": "",   # cdefault no password for local dev
-    "database": "client_query_db" # My project database name
+    "database": os.environ.get("CQMS_DB_NAME", "client_query_db") # My project database name
 }
 
 
 # --------------------------------------------------
-# GET DATABASE CONNECTION
+# POOL CONFIGURATION (override via environment)
+# --------------------------------------------------
+POOL_SIZE = int(os.environ.get("CQMS_DB_POOL_SIZE", 10))          # max open connections
+POOL_TIMEOUT = float(os.environ.get("CQMS_DB_POOL_TIMEOUT", 5))    # seconds to wait for a free slot
+POOL_RECYCLE = float(os.environ.get("CQMS_DB_POOL_RECYCLE", 1800)) # max connection lifetime (s)
+POOL_PING_AFTER = float(os.environ.get("CQMS_DB_POOL_PING_AFTER", 30))  # ping if idle longer (s)
+
+
+class PoolTimeout(PoolError):
+    """
+    Raised when no pooled connection frees up within the wait timeout.
+    """
+
+
+# --------------------------------------------------
+# CONNECTION POOL
+# --------------------------------------------------
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of MySQL connections.
+
+    - At most `size` connections are checked out at once;
+      extra callers wait up to `timeout` seconds.
+    - Idle connections are health-checked (ping) on checkout
+      when they sat unused for more than `ping_after` seconds.
+    - Connections older than `recycle` seconds are replaced.
+    """
+
+    def __init__(self, config, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 recycle=POOL_RECYCLE, ping_after=POOL_PING_AFTER):
+        self._config = dict(config)
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()   # (conn, created_at, last_used)
+        self._born = {}                  # id(conn) -> created_at
+        self._lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "created": 0,
+            "recycled": 0,
+        }
+
+    # ----------------------------------------------
+    # Counters
+    # ----------------------------------------------
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self):
+        """
+        Returns a snapshot of pool counters and current occupancy.
+        """
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["open"] = len(self._born)
+        snapshot["idle"] = self._idle.qsize()
+        snapshot["in_use"] = snapshot["open"] - snapshot["idle"]
+        snapshot["size"] = self.size
+        return snapshot
+
+    # ----------------------------------------------
+    # Connection lifecycle
+    # ----------------------------------------------
+    def _create(self):
+        conn = mysql.connector.connect(**self._config)
+        with self._lock:
+            self._born[id(conn)] = time.monotonic()
+            self._stats["created"] += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._born.pop(id(conn), None)
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def _is_healthy(self, conn, created_at, last_used):
+        now = time.monotonic()
+
+        if now - created_at > self.recycle:
+            return False
+
+        if now - last_used > self.ping_after:
+            try:
+                conn.ping(reconnect=False)
+            except Error:
+                return False
+
+        return True
+
+    def _take_idle(self):
+        while True:
+            try:
+                conn, created_at, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+
+            if self._is_healthy(conn, created_at, last_used):
+                return conn
+
+            self._discard(conn)
+            self._count("recycled")
+
+    # ----------------------------------------------
+    # Checkout / return
+    # ----------------------------------------------
+    def acquire(self):
+        """
+        Checks out a live connection, waiting up to `timeout` seconds.
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count("waits")
+            if not self._slots.acquire(timeout=self.timeout):
+                self._count("timeouts")
+                raise PoolTimeout(
+                    msg=f"No database connection available within {self.timeout}s"
+                )
+
+        try:
+            conn = self._take_idle() or self._create()
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._count("checkouts")
+        return conn
+
+    def release(self, conn, discard=False):
+        """
+        Returns a connection to the pool (or closes it if broken).
+        Any open transaction is rolled back so the next borrower
+        never inherits a stale read snapshot.
+        """
+        try:
+            if not discard:
+                try:
+                    conn.rollback()
+                except Error:
+                    discard = True
+
+            if discard:
+                self._discard(conn)
+                return
+
+            with self._lock:
+                created_at = self._born.get(id(conn), time.monotonic())
+            self._idle.put((conn, created_at, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        """
+        Closes every idle connection (checked-out ones close on return).
+        """
+        while True:
+            try:
+                conn, _, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+# --------------------------------------------------
+# PROCESS-WIDE POOL
+# --------------------------------------------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the shared connection pool, creating it on first use.
+    """
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_CONFIG)
+
+    return _pool
+
+
+def pool_stats():
+    """
+    Returns counters for the shared pool (checkouts, waits, created, recycled ...).
+    """
+    return get_pool().stats()
+
+
+register_collector("db_pool", pool_stats)
+
+
+@contextmanager
+def pooled_connection():
+    """
+    Yields a pooled connection; uncommitted work is rolled back
+    when the connection goes back to the pool. Statements run on
+    it are timed by services.instrumentation.
+    """
+    pool = get_pool()
+    conn = pool.acquire()
+
+    try:
+        yield instrument_connection(conn)
+    finally:
+        pool.release(conn)
+
+
+@contextmanager
+def db_session(dictionary=False):
+    """
+    Yields a cursor on a pooled connection.
+    Commits when the block succeeds, rolls back on error.
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor(dictionary=dictionary)
+        try:
+            yield cursor
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+# --------------------------------------------------
+# GET DATABASE CONNECTION (UNPOOLED)
 # --------------------------------------------------
 def get_db_connection(): # Returns database connection
     """
-    Creates and returns a MySQL database connection.
+    Creates and returns a standalone MySQL database connection.
+    Prefer db_session() / pooled_connection() in application code.
     """
     try:
         connection = mysql.connector.connect(**DB_CONFIG)
@@ -60,7 +317,8 @@ def close_db_connection(connection, cursor=None): # Closes connection and safety
 # TEST CONNECTION (OPTIONAL)
 # --------------------------------------------------
 if __name__ == "__main__":
-    conn = get_db_connection()
-    if conn:
-        print("✅ Database connection successful!")
-        close_db_connection(conn)
+    with db_session() as cur:
+        cur.execute("SELECT 1")
+        cur.fetchall()
+    print("✅ Database connection successful!")
+    print("📊 Pool stats:", pool_stats())
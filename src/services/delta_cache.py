@@ -0,0 +1,244 @@
+"""
+delta_cache.py
+--------------------------------------------------
+In-process, delta-refreshed DataFrame cache of
+client_queries for CQMS dashboards and analytics.
+
+The first call loads the table once. Every later
+refresh only fetches rows whose `updated_at`
+watermark moved since the previous refresh, and
+patches them into the cached frame by query_id.
+`updated_at` is maintained by MySQL on every
+insert / pick / close (ON UPDATE CURRENT_TIMESTAMP),
+so steady-state refreshes cost O(changes).
+
+The cache owns its frame and patches changed rows in
+place; new rows wait in a tail list. get() hands out
+a snapshot: the first one after a change appends the
+tail (one concat), and a patch after a get() copies
+each column it touches once, so earlier snapshots
+never change under their readers.
+
+Notes:
+- A small overlap window is re-read on every refresh
+  so rows committed late with an older timestamp are
+  still picked up (patching is idempotent).
+- Rows are never deleted by the app, so deletes are
+  not tracked.
+- Frames use the compact dtypes of query_frames
+  (categoricals / bools), so cache columns sparingly.
+--------------------------------------------------
+"""
+
+import threading
+from datetime import timedelta
+
+import pandas as pd
+
+from .db_connection import pooled_connection
+from .query_frames import align_categories, apply_query_dtypes
+
+
+OVERLAP = timedelta(seconds=5)
+
+
+# --------------------------------------------------
+# DELTA FRAME CACHE
+# --------------------------------------------------
+class DeltaFrameCache:
+    """
+    Cached DataFrame of selected client_queries columns,
+    indexed internally by query_id and patched incrementally.
+    """
+
+    def __init__(self, columns, overlap=OVERLAP):
+        self.columns = list(columns)
+        self.overlap = overlap
+        self._frame = None        # owned: patched in place, never handed out
+        self._tail = []           # new rows since the last snapshot
+        self._snapshot = None     # last frame handed out (None: stale)
+        self._shared = set()      # columns whose arrays the snapshot uses
+        self._watermark = None
+        self._lock = threading.Lock()
+        self.full_loads = 0
+        self.delta_rows = 0
+
+    # ----------------------------------------------
+    # DB access
+    # ----------------------------------------------
+    def _fetch(self, since=None):
+        select_cols = ", ".join(dict.fromkeys(self.columns + ["query_id", "updated_at"]))
+        sql = f"SELECT {select_cols} FROM client_queries"
+        params = None
+
+        if since is not None:
+            sql += " WHERE updated_at >= %s"
+            params = (since.to_pydatetime(),)
+
+        with pooled_connection() as conn:
+            df = pd.read_sql(sql, conn, params=params)
+
+        return self._prepare(df)
+
+    @staticmethod
+    def _prepare(df):
+        df = apply_query_dtypes(df)   # datetimes, categoricals, bools
+        df = df.set_index("query_id", drop=False)
+        df.index.name = None
+        return df
+
+    # ----------------------------------------------
+    # Patch
+    # ----------------------------------------------
+    @staticmethod
+    def _differs(new, old):
+        # object compare: categoricals with different categories can't be compared
+        new, old = new.astype(object), old.astype(object)
+        return (new != old) & ~(new.isna() & old.isna())
+
+    def _changed_rows(self, delta):
+        """
+        Drops overlap rows the cache already holds: older
+        updated_at, or the same updated_at and the same values.
+        """
+        frame = self._frame
+        known = delta.index.isin(frame.index)
+        if not known.any():
+            return delta
+
+        seen = delta[known]
+        cached = frame.loc[seen.index, seen.columns]
+        newer = seen["updated_at"] > cached["updated_at"]
+        same = seen["updated_at"] == cached["updated_at"]
+        # DATETIME(6) from the statement's start time: two writes can
+        # share a stamp, so equal stamps are compared by value
+        edited = same & self._differs(seen, cached).any(axis=1)
+
+        keep = ~known
+        keep[known] = (newer | edited).to_numpy()
+        return delta[keep]
+
+    def _patch(self, delta):
+        """
+        Queues new rows and updates known ones in place. O(delta),
+        plus one copy of each touched column still in the snapshot.
+        """
+        frame = self._frame
+        known = delta.index.isin(frame.index)
+        self._snapshot = None
+
+        if not known.all():
+            self._tail.append(delta[~known])
+        if not known.any():
+            return
+
+        # new categories (e.g. a new agent) must exist before .loc
+        frame, changed = align_categories(frame, delta[known])
+        cached = frame.loc[changed.index, changed.columns]
+        for col in changed.columns:
+            if not self._differs(changed[col], cached[col]).any():
+                continue
+            if col in self._shared:
+                # readers of the last snapshot keep the old values
+                frame[col] = frame[col].copy()
+                self._shared.discard(col)
+            frame.loc[changed.index, col] = changed[col]
+
+    def _append_tail(self):
+        rows = pd.concat(self._tail)
+        # a row re-read before this get() is kept in its latest version
+        rows = rows[~rows.index.duplicated(keep="last")]
+        frame, rows = align_categories(self._frame, rows)
+        self._frame = pd.concat([frame, rows])
+        self._tail = []
+
+    # ----------------------------------------------
+    # Public API
+    # ----------------------------------------------
+    def refresh(self):
+        """
+        Loads the table on first use, afterwards fetches and
+        patches only rows changed since the last watermark.
+        """
+        with self._lock:
+            if self._frame is None:
+                self._frame = self._fetch()
+                self._tail, self._snapshot, self._shared = [], None, set()
+                self.full_loads += 1
+                self._watermark = (
+                    self._frame["updated_at"].max()
+                    if not self._frame.empty else pd.Timestamp("1970-01-01")
+                )
+                return
+
+            delta = self._fetch(self._watermark - self.overlap)
+            if delta.empty:
+                return
+            self._watermark = max(self._watermark, delta["updated_at"].max())
+
+            delta = self._changed_rows(delta)
+            if delta.empty:
+                return   # only the overlap came back: nothing to copy
+            self._patch(delta)
+            self.delta_rows += len(delta)
+
+    def get(self):
+        """
+        Refreshes and returns a snapshot of the cached frame.
+        The snapshot is a shallow copy: adding columns is safe,
+        in-place edits of existing values are not.
+        """
+        self.refresh()
+
+        with self._lock:
+            if self._snapshot is None:
+                if self._tail:
+                    self._append_tail()
+                self._snapshot = self._frame.copy(deep=False)
+                self._shared = set(self._frame.columns)
+            return self._snapshot.copy(deep=False)
+
+    def invalidate(self):
+        """
+        Drops the cached frame; the next get() reloads it fully.
+        """
+        with self._lock:
+            self._frame = None
+            self._tail, self._snapshot, self._shared = [], None, set()
+            self._watermark = None
+
+
+# --------------------------------------------------
+# SHARED CACHES (one per column set, per process)
+# --------------------------------------------------
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name, columns):
+    """
+    Returns the process-wide cache registered under `name`.
+    """
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = DeltaFrameCache(columns)
+            _caches[name] = cache
+    return cache
+
+
+def cached_queries(name, columns):
+    """
+    Shortcut: delta-refreshed snapshot of `columns` for cache `name`.
+    """
+    return get_cache(name, columns).get()
+
+
+def invalidate_caches():
+    """
+    Drops every registered cache (e.g. after a bulk load).
+    """
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        cache.invalidate()
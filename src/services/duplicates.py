@@ -0,0 +1,318 @@
+"""
+duplicates.py
+--------------------------------------------------
+Near-duplicate detection for client queries
+(MinHash signatures + LSH banding).
+
+- heading + description are normalised and cut into
+  character 5-gram shingles; a MinHash signature of
+  NUM_PERM values estimates their Jaccard similarity
+- The signature is split into BANDS bands; each band
+  hashes to a bucket in query_lsh_buckets, so finding
+  candidates is a handful of primary-key lookups, not
+  a comparison against every row
+- Candidates are verified on the full signature
+  (>= CQMS_DUP_THRESHOLD) before a query is linked
+  via client_queries.duplicate_of
+- Only unresolved "root" queries are indexed: a new
+  query that matches one is linked to it and not
+  indexed itself, so repeated issues never pile up in
+  one bucket. Closing a root removes it from the index
+
+Used by query_actions.create_query (same transaction
+as the insert); the match it returns lets the client
+dashboard warn about the client's own look-alikes.
+
+Run using:
+    python -m src.services.duplicates --rebuild     # index unresolved queries
+    python -m src.services.duplicates --check "Form validation not working"
+--------------------------------------------------
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+
+from .db_connection import db_session
+from .result_cache import write_session
+
+
+NUM_PERM = 128
+BANDS = 16                      # 16 bands x 8 rows: candidate threshold ~0.7
+ROWS = NUM_PERM // BANDS
+SHINGLE = 5                     # characters
+THRESHOLD = float(os.environ.get("CQMS_DUP_THRESHOLD", 0.8))
+CANDIDATE_LIMIT = 50
+REBUILD_CHUNK = 5000
+
+_PRIME = np.uint64(4294967311)  # > 2**32, keeps a * x + b inside uint64
+_rng = np.random.default_rng(20240601)   # fixed: signatures must match across processes
+_A = _rng.integers(1, 2**32 - 1, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2**32 - 1, NUM_PERM, dtype=np.uint64)
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+# --------------------------------------------------
+# SIGNATURES
+# --------------------------------------------------
+def normalize_text(heading, description):
+    return _NON_WORD.sub(" ", f"{heading} {description}".lower()).strip()
+
+
+def shingles(text):
+    """
+    Stable 32-bit hashes of the character shingles of text.
+    """
+    if len(text) <= SHINGLE:
+        grams = {text}
+    else:
+        grams = {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+    return np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)
+    )
+
+
+def signature(heading, description):
+    """
+    MinHash signature (uint32 x NUM_PERM) of heading + description.
+    """
+    hashes = shingles(normalize_text(heading, description))
+    permuted = (_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def similarity(sig_a, sig_b):
+    """
+    Estimated Jaccard similarity of two signatures.
+    """
+    return float(np.mean(sig_a == sig_b))
+
+
+def band_buckets(sig):
+    """
+    [(band, bucket)] LSH keys; bucket is a signed 64-bit hash.
+    """
+    return [
+        (band, int.from_bytes(
+            hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(),
+            "big", signed=True,
+        ))
+        for band in range(BANDS)
+    ]
+
+
+# --------------------------------------------------
+# LOOKUP
+# --------------------------------------------------
+def _best_match(cur, sig, client_email=None, exclude=None):
+    """
+    (root_query_id, score, root_client_email) of the most similar
+    indexed query, or None below THRESHOLD.
+    """
+    keys = band_buckets(sig)
+    where = " OR ".join(["(b.band = %s AND b.bucket = %s)"] * len(keys))
+    params = [v for key in keys for v in key]
+
+    client_filter = ""
+    if client_email is not None:
+        client_filter = " AND q.client_email = %s"
+        params.append(client_email)
+
+    cur.execute(
+        f"""
+        SELECT b.query_id, m.signature, q.client_email, COUNT(*) AS bands
+        FROM query_lsh_buckets b
+        JOIN query_minhash m ON m.query_id = b.query_id
+        JOIN client_queries q ON q.query_id = b.query_id
+        WHERE ({where}){client_filter}
+        GROUP BY b.query_id, m.signature, q.client_email
+        ORDER BY bands DESC, b.query_id
+        LIMIT %s
+        """,
+        (*params, CANDIDATE_LIMIT),
+    )
+
+    best = None
+    for query_id, blob, email, _ in cur.fetchall():
+        if query_id == exclude:
+            continue
+        score = similarity(sig, np.frombuffer(blob, dtype=np.uint32))
+        if score >= THRESHOLD and (best is None or score > best[1]):
+            best = (query_id, score, email)
+    return best
+
+
+def find_duplicates(heading, description, client_email=None):
+    """
+    Most similar unresolved query as (query_id, score), or None.
+    Pass client_email to only consider that client's queries.
+    """
+    with db_session() as cur:
+        match = _best_match(cur, signature(heading, description), client_email)
+    return match[:2] if match else None
+
+
+# --------------------------------------------------
+# INDEX MAINTENANCE (caller's transaction)
+# --------------------------------------------------
+def _add_root(cur, query_id, sig):
+    cur.execute(
+        "INSERT INTO query_minhash (query_id, signature) VALUES (%s, %s)",
+        (query_id, sig.tobytes()),
+    )
+    cur.executemany(
+        "INSERT IGNORE INTO query_lsh_buckets (band, bucket, query_id) VALUES (%s, %s, %s)",
+        [(band, bucket, query_id) for band, bucket in band_buckets(sig)],
+    )
+
+
+def index_new_query(cur, query_id, heading, description):
+    """
+    Links a just-inserted query to its near-duplicate root, or
+    indexes it as a new root. Returns (root_id, score,
+    root_client_email) or None.
+    """
+    sig = signature(heading, description)
+    match = _best_match(cur, sig, exclude=query_id)
+
+    if match is None:
+        _add_root(cur, query_id, sig)
+        return None
+
+    cur.execute(
+        "UPDATE client_queries SET duplicate_of = %s, duplicate_score = %s WHERE query_id = %s",
+        (match[0], round(match[1], 3), query_id),
+    )
+    return match
+
+
+def unindex_query(cur, query_id):
+    """
+    Drops a resolved root from the index (links to it stay).
+    """
+    cur.execute("DELETE FROM query_lsh_buckets WHERE query_id = %s", (query_id,))
+    cur.execute("DELETE FROM query_minhash WHERE query_id = %s", (query_id,))
+
+
+# --------------------------------------------------
+# BATCH JOB
+# --------------------------------------------------
+def rebuild_index(chunk_size=REBUILD_CHUNK):
+    """
+    Re-indexes every unresolved query, oldest first, so the
+    earliest of a group becomes its root. Banding runs in
+    memory; rows are written in bulk. Returns (roots, linked).
+
+    Only the queries read here are replaced: one submitted while
+    the index is built keeps the entry create_query gave it.
+    """
+    started = time.perf_counter()
+    buckets = {}       # (band, bucket) -> [root_id]
+    roots = {}         # root_id -> signature
+    links = []
+    read_ids = []
+
+    with db_session() as cur:
+        cur.execute(
+            """
+            SELECT query_id, query_heading, query_description
+            FROM client_queries
+            WHERE status IN ('Open', 'In Progress')
+            ORDER BY query_created_time, query_id
+            """
+        )
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+
+            for query_id, heading, description in rows:
+                read_ids.append(query_id)
+                sig = signature(heading, description)
+                keys = band_buckets(sig)
+
+                best = None
+                candidates = {r for key in keys for r in buckets.get(key, ())}
+                for root in candidates:
+                    score = similarity(sig, roots[root])
+                    if score >= THRESHOLD and (best is None or score > best[1]):
+                        best = (root, score)
+
+                if best is None:
+                    roots[query_id] = sig
+                    for key in keys:
+                        buckets.setdefault(key, []).append(query_id)
+                else:
+                    links.append((best[0], round(best[1], 3), query_id))
+
+    with write_session() as cur:
+        for start in range(0, len(read_ids), chunk_size):
+            batch = read_ids[start:start + chunk_size]
+            placeholders = ",".join(["%s"] * len(batch))
+            cur.execute(f"DELETE FROM query_lsh_buckets WHERE query_id IN ({placeholders})", batch)
+            cur.execute(f"DELETE FROM query_minhash WHERE query_id IN ({placeholders})", batch)
+            cur.execute(
+                f"""
+                UPDATE client_queries SET duplicate_of = NULL, duplicate_score = NULL
+                WHERE query_id IN ({placeholders}) AND duplicate_of IS NOT NULL
+                """,
+                batch,
+            )
+
+        items = list(roots.items())
+        for start in range(0, len(items), chunk_size):
+            batch = items[start:start + chunk_size]
+            cur.executemany(
+                "INSERT INTO query_minhash (query_id, signature) VALUES (%s, %s)",
+                [(query_id, sig.tobytes()) for query_id, sig in batch],
+            )
+            cur.executemany(
+                "INSERT IGNORE INTO query_lsh_buckets (band, bucket, query_id) VALUES (%s, %s, %s)",
+                [(band, bucket, query_id)
+                 for query_id, sig in batch for band, bucket in band_buckets(sig)],
+            )
+
+        for start in range(0, len(links), chunk_size):
+            cur.executemany(
+                "UPDATE client_queries SET duplicate_of = %s, duplicate_score = %s WHERE query_id = %s",
+                links[start:start + chunk_size],
+            )
+
+        # roots closed since the read, and leftovers of closed / deleted queries
+        for table in ("query_lsh_buckets", "query_minhash"):
+            cur.execute(
+                f"""
+                DELETE t FROM {table} t
+                LEFT JOIN client_queries q ON q.query_id = t.query_id
+                WHERE q.query_id IS NULL OR q.status = 'Closed'
+                """
+            )
+
+    print(
+        f"✅ Near-duplicate index: {len(roots):,} roots, {len(links):,} linked "
+        f"({time.perf_counter() - started:.1f}s)"
+    )
+    return len(roots), len(links)
+
+
+# --------------------------------------------------
+# RUN
+# --------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CQMS near-duplicate index")
+    parser.add_argument("--rebuild", action="store_true", help="index unresolved queries")
+    parser.add_argument("--check", metavar="TEXT", help="closest indexed query for TEXT")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_index()
+    elif args.check:
+        print(find_duplicates("", args.check) or "No near-duplicate.")
+    else:
+        parser.print_help()
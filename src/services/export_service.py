@@ -0,0 +1,215 @@
+"""
+export_service.py
+--------------------------------------------------
+Streaming exports of client_queries to a file.
+
+Rows are read with an unbuffered (server-side
+streamed) cursor and written chunk by chunk, so
+memory stays bounded by `chunk_size` whatever the
+export size. Exports use their own connection, not
+a pool slot, so a long export never starves the
+dashboards. The finished file path is handed to the
+download buttons.
+
+Formats:
+- csv     : plain CSV
+- csv.gz  : gzip-compressed CSV
+- parquet : needs pyarrow (optional dependency)
+
+Filters are shared by the client and support
+dashboards: client email, status, category,
+assigned agent and created-date range.
+--------------------------------------------------
+"""
+
+import gzip
+import os
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+
+import mysql.connector
+import pandas as pd
+
+from .db_connection import DB_CONFIG
+from .instrumentation import instrument_connection
+
+
+EXPORT_DIR = os.environ.get(
+    "CQMS_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "cqms_exports")
+)
+EXPORT_CHUNK = int(os.environ.get("CQMS_EXPORT_CHUNK", 10000))   # rows per fetch / write
+EXPORT_MAX_AGE = 3600   # seconds before finished exports are purged
+
+FORMATS = {"csv": ".csv", "csv.gz": ".csv.gz", "parquet": ".parquet"}
+MIME_TYPES = {
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "parquet": "application/octet-stream",
+}
+
+EXPORT_COLUMNS = [
+    "query_id",
+    "client_email",
+    "client_mobile",
+    "category",
+    "query_heading",
+    "query_description",
+    "status",
+    "assigned_support_id",
+    "query_created_time",
+    "query_closed_time",
+    "is_valid_mobile",
+]
+
+
+# --------------------------------------------------
+# FILTERS
+# --------------------------------------------------
+def build_filters(client_email=None, status=None, category=None,
+                  assigned_support_id=None, start=None, end=None):
+    """
+    Returns (where_sql, params). None / "All" means no filter;
+    start / end are inclusive dates on query_created_time.
+    """
+    clauses, params = [], []
+
+    for column, value in (
+        ("client_email", client_email),
+        ("status", status),
+        ("category", category),
+        ("assigned_support_id", assigned_support_id),
+    ):
+        if value not in (None, "All"):
+            clauses.append(f"{column} = %s")
+            params.append(value)
+
+    if start is not None:
+        clauses.append("query_created_time >= %s")
+        params.append(start)
+    if end is not None:
+        clauses.append("query_created_time < %s")
+        params.append(end + timedelta(days=1))
+
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return where, tuple(params)
+
+
+# --------------------------------------------------
+# STREAMING READ
+# --------------------------------------------------
+def stream_chunks(where="", params=(), columns=EXPORT_COLUMNS, chunk_size=EXPORT_CHUNK):
+    """
+    Yields DataFrames of at most chunk_size rows, streamed from MySQL.
+    """
+    sql = f"SELECT {', '.join(columns)} FROM client_queries{where} ORDER BY query_created_time, query_id"
+
+    conn = instrument_connection(mysql.connector.connect(**DB_CONFIG))
+    cursor = conn.cursor(buffered=False)
+    finished = False
+
+    try:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield pd.DataFrame(rows, columns=columns)
+        finished = True
+    finally:
+        if finished:
+            cursor.close()
+            conn.close()
+        else:
+            # abandoned mid-stream: close the socket instead of draining rows
+            # (shutdown() is not implemented by the C extension)
+            cursor.finish()
+            try:
+                conn.close()
+            except (mysql.connector.Error, OSError):
+                pass   # never mask the error that abandoned the stream
+
+
+# --------------------------------------------------
+# WRITERS
+# --------------------------------------------------
+def _write_csv(chunks, path, columns, compress):
+    opener = gzip.open if compress else open
+    rows = 0
+    with opener(path, "wt", newline="", encoding="utf-8") as f:
+        f.write(",".join(columns) + "\n")
+        for chunk in chunks:
+            chunk.to_csv(f, header=False, index=False)
+            rows += len(chunk)
+    return rows
+
+
+def _write_parquet(chunks, path, columns):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        (col, pa.timestamp("s") if col.endswith("_time") else
+         pa.int8() if col.startswith("is_valid") else pa.string())
+        for col in columns
+    ])
+
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    return rows
+
+
+# --------------------------------------------------
+# EXPORT
+# --------------------------------------------------
+def purge_exports(max_age=EXPORT_MAX_AGE):
+    """
+    Deletes finished exports older than max_age seconds.
+    """
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass   # purged concurrently by another session
+
+
+def export_queries(fmt="csv", columns=EXPORT_COLUMNS, chunk_size=EXPORT_CHUNK, **filters):
+    """
+    Streams the filtered queries into a new file.
+    Returns (path, row_count).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    purge_exports()
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+
+    path = os.path.join(EXPORT_DIR, f"queries_{uuid.uuid4().hex}{FORMATS[fmt]}")
+    tmp = path + ".part"
+    where, params = build_filters(**filters)
+    chunks = stream_chunks(where, params, columns, chunk_size)
+
+    try:
+        if fmt == "parquet":
+            rows = _write_parquet(chunks, tmp, columns)
+        else:
+            rows = _write_csv(chunks, tmp, columns, compress=fmt == "csv.gz")
+        os.replace(tmp, path)
+    finally:
+        chunks.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    return path, rows
@@ -0,0 +1,108 @@
+"""
+id_allocator.py
+--------------------------------------------------
+Contention-free query ID allocation for CQMS.
+
+IDs come from a one-row-per-sequence table
+(id_sequences). Each app process reserves a block of
+numbers with a single atomic UPDATE ... LAST_INSERT_ID()
+and then hands them out from memory, so a submit costs
+O(1) and never collides with another process or thread.
+
+Trade-off: numbers left in a block when a process
+exits are skipped (gaps), never reused.
+--------------------------------------------------
+"""
+
+import os
+import threading
+
+from .db_connection import db_session
+
+
+ID_PREFIX = "CQ"
+SEQUENCE_NAME = "client_query"
+BLOCK_SIZE = int(os.environ.get("CQMS_ID_BLOCK_SIZE", 20))
+
+
+# --------------------------------------------------
+# BLOCK ALLOCATOR
+# --------------------------------------------------
+class BlockIdAllocator:
+    """
+    Hands out formatted IDs from blocks reserved in id_sequences.
+    """
+
+    def __init__(self, name=SEQUENCE_NAME, prefix=ID_PREFIX, block_size=BLOCK_SIZE):
+        self.name = name
+        self.prefix = prefix
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+        self.blocks_reserved = 0
+
+    def _seed(self, cur):
+        # First use only: start after the highest existing <prefix><n> ID
+        cur.execute(
+            """
+            INSERT IGNORE INTO id_sequences (name, next_value)
+            SELECT %s, COALESCE(MAX(CAST(SUBSTRING(query_id, %s) AS UNSIGNED)), 0) + 1
+            FROM client_queries
+            WHERE query_id LIKE %s
+            """,
+            (self.name, len(self.prefix) + 1, f"{self.prefix}%"),
+        )
+
+    def _reserve_block(self):
+        """
+        Atomically advances the sequence by one block.
+        Returns the first number of the reserved block.
+        """
+        with db_session() as cur:
+            for _ in range(2):
+                cur.execute(
+                    """
+                    UPDATE id_sequences
+                    SET next_value = LAST_INSERT_ID(next_value + %s)
+                    WHERE name = %s
+                    """,
+                    (self.block_size, self.name),
+                )
+                if cur.rowcount:
+                    break
+                self._seed(cur)
+            else:
+                raise RuntimeError(f"Could not initialise sequence {self.name!r}")
+
+            cur.execute("SELECT LAST_INSERT_ID()")
+            (end,) = cur.fetchone()
+
+        self.blocks_reserved += 1
+        return int(end) - self.block_size
+
+    def next_number(self):
+        with self._lock:
+            if self._next >= self._end:
+                start = self._reserve_block()
+                self._next, self._end = start, start + self.block_size
+
+            number = self._next
+            self._next += 1
+            return number
+
+    def next_id(self):
+        return f"{self.prefix}{self.next_number():04d}"
+
+
+# --------------------------------------------------
+# PROCESS-WIDE ALLOCATOR
+# --------------------------------------------------
+_allocator = BlockIdAllocator()
+
+
+def next_query_id():
+    """
+    Returns a new unique client query ID (e.g. CQ5211).
+    """
+    return _allocator.next_id()
@@ -0,0 +1,214 @@
+"""
+image_store.py
+--------------------------------------------------
+Issue screenshot storage for CQMS.
+
+- Content-addressed: uploads are stored as
+  uploads/issues/<ab>/<sha256>.<ext>, so the same
+  screenshot uploaded twice is written once
+- Thumbnails are generated in a background thread
+  pool; submitting a query only hashes + writes bytes
+- The relative path is what client_queries stores
+  in issue_image_path
+- Support pages ask for thumbnails of the rows on
+  screen only; missing ones are queued, not built
+  inline
+
+Thumbnails need Pillow (installed with streamlit).
+
+Run using:
+    python -m src.services.image_store --import-legacy
+    (re-stores uploads/issues/<query_id>_<name>.png
+     files and points their queries at them)
+--------------------------------------------------
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .result_cache import write_session
+
+
+UPLOAD_ROOT = Path(os.environ.get(
+    "CQMS_UPLOAD_DIR", Path(__file__).resolve().parents[2] / "uploads"
+))
+ISSUES_DIR = "issues"
+THUMBS_DIR = "thumbs"
+
+THUMB_SIZE = (320, 320)
+THUMB_WORKERS = int(os.environ.get("CQMS_THUMB_WORKERS", 2))
+
+# extension -> leading magic bytes
+ALLOWED_TYPES = {
+    ".png": b"\x89PNG\r\n\x1a\n",
+    ".jpg": b"\xff\xd8\xff",
+    ".jpeg": b"\xff\xd8\xff",
+}
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+# --------------------------------------------------
+# PATHS
+# --------------------------------------------------
+def resolve(image_path):
+    """
+    Absolute path of a stored issue_image_path.
+    """
+    return UPLOAD_ROOT / image_path
+
+
+def thumbnail_path(image_path):
+    """
+    Relative thumbnail path for a stored image (always PNG).
+    """
+    digest = Path(image_path).stem
+    return f"{THUMBS_DIR}/{digest[:2]}/{digest}.png"
+
+
+def _write_atomic(target, data):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+
+# --------------------------------------------------
+# THUMBNAILS (background)
+# --------------------------------------------------
+_executor = ThreadPoolExecutor(max_workers=THUMB_WORKERS, thread_name_prefix="thumbs")
+_pending = set()
+_failed = set()       # corrupt / missing images: not retried in this process
+_pending_lock = threading.Lock()
+
+
+def _make_thumbnail(image_path):
+    tmp = None
+    try:
+        from PIL import Image
+
+        target = resolve(thumbnail_path(image_path))
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+
+        with Image.open(resolve(image_path)) as img:
+            img.thumbnail(THUMB_SIZE)
+            img.save(tmp, format="PNG", optimize=True)
+        os.replace(tmp, target)
+
+    except Exception as e:
+        print(f"❌ Thumbnail failed for {image_path}: {e}")
+        with _pending_lock:
+            _failed.add(image_path)
+        if tmp is not None:
+            tmp.unlink(missing_ok=True)
+
+    finally:
+        with _pending_lock:
+            _pending.discard(image_path)
+
+
+def schedule_thumbnail(image_path):
+    """
+    Queues thumbnail generation unless it exists, is already
+    queued or already failed.
+    """
+    if resolve(thumbnail_path(image_path)).exists():
+        return
+
+    with _pending_lock:
+        if image_path in _pending or image_path in _failed:
+            return
+        _pending.add(image_path)
+
+    _executor.submit(_make_thumbnail, image_path)
+
+
+def get_thumbnail(image_path):
+    """
+    Absolute thumbnail path if ready, else None (and queues it).
+    Call only for rows being rendered.
+    """
+    if not image_path or not resolve(image_path).exists():
+        return None
+
+    thumb = resolve(thumbnail_path(image_path))
+    if thumb.exists():
+        return thumb
+
+    schedule_thumbnail(image_path)
+    return None
+
+
+# --------------------------------------------------
+# STORE
+# --------------------------------------------------
+def store_image(data, filename):
+    """
+    Stores upload bytes content-addressed and queues the thumbnail.
+    Returns the relative path to save in issue_image_path.
+    """
+    ext = Path(filename).suffix.lower()
+    if ext not in ALLOWED_TYPES or not data.startswith(ALLOWED_TYPES[ext]):
+        raise InvalidImage("Only PNG / JPG screenshots are accepted.")
+
+    digest = hashlib.sha256(data).hexdigest()
+    image_path = f"{ISSUES_DIR}/{digest[:2]}/{digest}{'.jpg' if ext == '.jpeg' else ext}"
+
+    target = resolve(image_path)
+    if not target.exists():   # identical upload already stored
+        _write_atomic(target, data)
+
+    schedule_thumbnail(image_path)
+    return image_path
+
+
+# --------------------------------------------------
+# LEGACY UPLOADS (uploads/issues/<query_id>_<name>)
+# --------------------------------------------------
+def import_legacy_uploads():
+    """
+    Re-stores flat legacy files content-addressed and updates
+    issue_image_path of the query named in the file prefix.
+    Returns (files, queries_updated).
+    """
+    legacy = [
+        p for p in (UPLOAD_ROOT / ISSUES_DIR).glob("*")
+        if p.is_file() and p.suffix.lower() in ALLOWED_TYPES
+    ]
+
+    updated = 0
+    with write_session() as cur:
+        for path in legacy:
+            image_path = store_image(path.read_bytes(), path.name)
+            query_id = path.name.split("_", 1)[0]
+            cur.execute(
+                """
+                UPDATE client_queries SET issue_image_path = %s
+                WHERE query_id = %s AND issue_image_path IS NULL
+                """,
+                (image_path, query_id),
+            )
+            updated += cur.rowcount
+            print(f"   ↳ {path.name} -> {image_path}")
+
+    print(f"✅ Imported {len(legacy)} files, updated {updated} queries.")
+    return len(legacy), updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CQMS issue image store")
+    parser.add_argument("--import-legacy", action="store_true")
+    args = parser.parse_args()
+
+    if args.import_legacy:
+        import_legacy_uploads()
+        _executor.shutdown(wait=True)
+    else:
+        parser.print_help()
@@ -0,0 +1,465 @@
+"""
+instrumentation.py
+--------------------------------------------------
+In-process timing of CQMS hot paths.
+
+- Every statement run on a pooled connection is
+  timed (execute + fetch), with rows and approximate
+  bytes fetched, keyed by its SQL fingerprint
+  (literals / IN lists collapsed, no parameters)
+- Page renders are timed by app.route_page
+- Each series keeps a rolling window of recent
+  samples for p50 / p95 / p99, plus running totals
+- Statements slower than CQMS_SLOW_QUERY_MS are
+  appended to the slow-query log
+- render_exposition() returns the Prometheus text
+  format; set CQMS_METRICS_PORT to also serve it on
+  http://127.0.0.1:<port>/metrics
+
+Metrics live in the Streamlit server process, so
+CLI jobs only see their own statements.
+--------------------------------------------------
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+
+METRICS_WINDOW = int(os.environ.get("CQMS_METRICS_WINDOW", 1024))       # samples per series
+SLOW_QUERY_MS = float(os.environ.get("CQMS_SLOW_QUERY_MS", 250))
+SLOW_QUERY_LOG = Path(os.environ.get(
+    "CQMS_SLOW_QUERY_LOG", Path(__file__).resolve().parents[2] / "logs" / "slow_queries.log"
+))
+METRICS_PORT = int(os.environ.get("CQMS_METRICS_PORT", 0))              # 0 = no HTTP endpoint
+
+QUANTILES = (0.5, 0.95, 0.99)
+BYTES_SAMPLE_ROWS = 64   # rows sized per fetch; the rest is extrapolated
+
+
+# --------------------------------------------------
+# ROLLING SERIES
+# --------------------------------------------------
+class Series:
+    """
+    Rolling latency window plus running totals for one
+    statement fingerprint or page.
+    """
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.samples = deque(maxlen=window)   # seconds
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.errors = 0
+
+    def observe(self, seconds, rows=0, nbytes=0, error=False):
+        self.samples.append(seconds)
+        self.count += 1
+        self.seconds += seconds
+        self.rows += rows
+        self.bytes += nbytes
+        self.errors += int(error)
+
+    def quantiles(self, qs=QUANTILES):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in qs}
+        last = len(ordered) - 1
+        return {q: ordered[min(last, int(q * len(ordered)))] for q in qs}
+
+
+_series = {}              # (kind, name) -> Series
+_series_lock = threading.Lock()
+_collectors = {}          # name -> fn() returning {key: number}
+
+
+def observe(kind, name, seconds, rows=0, nbytes=0, error=False):
+    """
+    Records one timed call ("db" statement or "page" render).
+    """
+    with _series_lock:
+        series = _series.get((kind, name))
+        if series is None:
+            series = _series[(kind, name)] = Series()
+        series.observe(seconds, rows, nbytes, error)
+
+
+def snapshot(kind):
+    """
+    List of dicts (name, calls, p50/p95/p99 ms, rows, bytes, errors)
+    for one kind, slowest p95 first.
+    """
+    with _series_lock:
+        items = [(name, s) for (k, name), s in _series.items() if k == kind]
+        stats = []
+        for name, s in items:
+            q = s.quantiles()
+            stats.append({
+                "name": name,
+                "calls": s.count,
+                "p50_ms": round(q[0.5] * 1000, 2),
+                "p95_ms": round(q[0.95] * 1000, 2),
+                "p99_ms": round(q[0.99] * 1000, 2),
+                "total_s": s.seconds,
+                "rows": s.rows,
+                "bytes": s.bytes,
+                "errors": s.errors,
+            })
+    return sorted(stats, key=lambda r: r["p95_ms"], reverse=True)
+
+
+def reset():
+    """
+    Clears every series (collectors stay registered).
+    """
+    with _series_lock:
+        _series.clear()
+
+
+def register_collector(name, fn):
+    """
+    Adds gauges read at exposition time, e.g. pool occupancy.
+    """
+    _collectors[name] = fn
+
+
+# --------------------------------------------------
+# SQL FINGERPRINTS / SIZES
+# --------------------------------------------------
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(\)\s*,\s*\((?:[^()]|\([^()]*\))*)+(?=\))", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=512)
+def fingerprint(sql):
+    """
+    Statement label: whitespace collapsed, literals -> ?,
+    IN (...) and multi-row VALUES lists folded.
+    """
+    text = _SPACE.sub(" ", sql).strip()
+    text = _STRING_LITERAL.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _IN_LIST.sub("IN (...)", text)
+    text = _VALUES_ROWS.sub("), (...", text)
+    return text[:200]
+
+
+def _value_bytes(value):
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    return 8
+
+
+def estimate_bytes(rows):
+    """
+    Approximate payload size of fetched rows, sized from the
+    first BYTES_SAMPLE_ROWS rows and scaled to the full count.
+    """
+    if not rows:
+        return 0
+    sample = rows[:BYTES_SAMPLE_ROWS]
+    size = sum(
+        _value_bytes(v)
+        for row in sample
+        for v in (row.values() if isinstance(row, dict) else row)
+    )
+    return size * len(rows) // len(sample)
+
+
+# --------------------------------------------------
+# SLOW-QUERY LOG
+# --------------------------------------------------
+_slow_logger = None
+_slow_lock = threading.Lock()
+
+
+def _get_slow_logger():
+    global _slow_logger
+
+    if _slow_logger is None:
+        with _slow_lock:
+            if _slow_logger is None:
+                logger = logging.getLogger("cqms.slow_query")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                SLOW_QUERY_LOG.parent.mkdir(parents=True, exist_ok=True)
+                handler = RotatingFileHandler(
+                    SLOW_QUERY_LOG, maxBytes=5 * 1024**2, backupCount=3, encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter("%(asctime)s | %(message)s"))
+                logger.addHandler(handler)
+                _slow_logger = logger
+
+    return _slow_logger
+
+
+def _log_slow(label, seconds, rows, nbytes):
+    try:
+        _get_slow_logger().info(
+            "%.1f ms | rows=%d | bytes~%d | %s", seconds * 1000, rows, nbytes, label
+        )
+    except OSError as e:
+        print(f"❌ Slow-query log unavailable: {e}")
+
+
+def read_slow_log(lines=50):
+    """
+    Last `lines` entries of the slow-query log (newest last).
+    """
+    if not SLOW_QUERY_LOG.exists():
+        return []
+    with open(SLOW_QUERY_LOG, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in deque(f, maxlen=lines)]
+
+
+def _record_statement(label, seconds, rows, nbytes, error=False):
+    observe("db", label, seconds, rows, nbytes, error)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        _log_slow(label, seconds, rows, nbytes)
+
+
+# --------------------------------------------------
+# CURSOR / CONNECTION WRAPPERS
+# --------------------------------------------------
+class InstrumentedCursor:
+    """
+    Cursor proxy timing each statement from execute until
+    the next execute / close, fetches included.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._label = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        row = self.fetchone()
+        while row is not None:
+            yield row
+            row = self.fetchone()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _start(self, operation):
+        self.finish()
+        self._label = fingerprint(operation)
+        self._seconds = 0.0
+        self._rows = 0
+        self._bytes = 0
+        self._fetched = False
+
+    def _timed(self, fn, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            self._seconds += time.perf_counter() - started
+            _record_statement(self._label, self._seconds, self._rows, self._bytes, error=True)
+            self._label = None
+            raise
+        finally:
+            if self._label is not None:
+                self._seconds += time.perf_counter() - started
+
+    def execute(self, operation, *args, **kwargs):
+        self._start(operation)
+        return self._timed(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        self._start(operation)
+        return self._timed(self._cursor.executemany, operation, *args, **kwargs)
+
+    def _fetch(self, fn, *args):
+        result = self._timed(fn, *args)
+        if self._label is not None:
+            self._fetched = True
+            if isinstance(result, list):
+                self._rows += len(result)
+                self._bytes += estimate_bytes(result)
+            elif result is not None:
+                self._rows += 1
+                self._bytes += estimate_bytes([result])
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(self._cursor.fetchmany, *args)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def finish(self):
+        """
+        Records the current statement (also done by execute / close).
+        """
+        if self._label is None:
+            return
+        rows = self._rows
+        if not self._fetched:   # writes: affected rows
+            rows = max(getattr(self._cursor, "rowcount", 0) or 0, 0)
+        _record_statement(self._label, self._seconds, rows, self._bytes)
+        self._label = None
+
+    def close(self):
+        self.finish()
+        return self._cursor.close()
+
+
+class InstrumentedConnection:
+    """
+    Connection proxy whose cursors are InstrumentedCursors.
+    Works with pd.read_sql (DBAPI fallback) and db_session.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+
+def instrument_connection(conn):
+    return InstrumentedConnection(conn)
+
+
+# --------------------------------------------------
+# PAGES
+# --------------------------------------------------
+@contextmanager
+def time_page(name):
+    """
+    Times one page render. Streamlit's rerun / stop exceptions
+    pass through and still count as a render.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("page", name, time.perf_counter() - started)
+
+
+# --------------------------------------------------
+# TEXT EXPOSITION (Prometheus format)
+# --------------------------------------------------
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _summary(lines, metric, help_text, label, stats):
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} summary")
+    for s in stats:
+        name = _label(s["name"])
+        for q in QUANTILES:
+            lines.append(f'{metric}{{{label}="{name}",quantile="{q}"}} {s[f"p{round(q * 100)}_ms"] / 1000:.6f}')
+        lines.append(f'{metric}_sum{{{label}="{name}"}} {s["total_s"]:.6f}')
+        lines.append(f'{metric}_count{{{label}="{name}"}} {s["calls"]}')
+
+
+def _counter(lines, metric, help_text, label, stats, key):
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} counter")
+    for s in stats:
+        lines.append(f'{metric}{{{label}="{_label(s["name"])}"}} {s[key]}')
+
+
+def render_exposition():
+    """
+    All metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    db = snapshot("db")
+    pages = snapshot("page")
+
+    _summary(lines, "cqms_db_statement_seconds", "DB statement latency, execute + fetch.", "statement", db)
+    _counter(lines, "cqms_db_rows_total", "Rows fetched (or affected by writes).", "statement", db, "rows")
+    _counter(lines, "cqms_db_bytes_total", "Approximate bytes fetched.", "statement", db, "bytes")
+    _counter(lines, "cqms_db_errors_total", "Statements that raised.", "statement", db, "errors")
+    _summary(lines, "cqms_page_render_seconds", "Streamlit page render time.", "page", pages)
+
+    for name, fn in list(_collectors.items()):
+        try:
+            values = fn()
+        except Exception as e:
+            lines.append(f"# collector {name} failed: {_label(e)}")
+            continue
+        for key, value in values.items():
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE cqms_{name}_{key} gauge")
+                lines.append(f"cqms_{name}_{key} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+# --------------------------------------------------
+# LOCAL SCRAPE ENDPOINT (optional)
+# --------------------------------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_exposition().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT, host="127.0.0.1"):
+    """
+    Serves /metrics from a daemon thread, once per process.
+    No-op when port is 0. Returns the server (or None).
+    """
+    global _server
+
+    if not port:
+        return None
+
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                print(f"❌ Metrics endpoint not started on {host}:{port}: {e}")
+                return None
+            threading.Thread(
+                target=_server.serve_forever, name="cqms-metrics", daemon=True
+            ).start()
+
+    return _server
@@ -0,0 +1,300 @@
+"""
+migrations.py
+--------------------------------------------------
+Versioned schema migrations for CQMS.
+
+Migrations live in database/migrations/ as
+NNNN_description.sql and are applied in order; each
+applied version is recorded in schema_migrations.
+
+Statements that only fail because the object already
+exists (table / column / index) are skipped, so a
+database created by the legacy schema.py or
+database/schema.sql is adopted without manual steps.
+
+Run using:
+    python -m src.services.migrations            # apply pending
+    python -m src.services.migrations --status   # list versions
+    python -m src.services.migrations --check    # EXPLAIN hot paths
+--------------------------------------------------
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+import mysql.connector
+from .db_connection import DB_CONFIG
+from .query_pages import QUEUES, count_sql, page_sql
+
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "database" / "migrations"
+
+# errno -> reason the statement is already satisfied
+ALREADY_APPLIED = {
+    1050: "table exists",
+    1060: "column exists",
+    1061: "index exists",
+    1091: "already dropped",
+}
+
+
+# --------------------------------------------------
+# HOT-PATH QUERIES (must never full-scan)
+# --------------------------------------------------
+# Sample agent / keyset cursor for the queue pages
+_HOT_AGENT = "S001"
+_HOT_CURSOR = ("2024-01-01 00:00:00", "Q000001")
+
+
+def _queue_hot_paths():
+    """
+    First and deep (keyset) page of every queue, built by
+    query_pages itself so the check tracks the real SQL.
+    """
+    entries = {}
+    for queue, (_, needs_agent, _) in QUEUES.items():
+        agent = _HOT_AGENT if needs_agent else None
+        entries[f"support.{queue}_page"] = page_sql(queue, agent)
+        entries[f"support.{queue}_page_deep"] = page_sql(queue, agent, after=_HOT_CURSOR)
+    entries["support.open_queue_count"] = count_sql("open")
+    return entries
+
+
+HOT_PATH_QUERIES = {
+    "client_dashboard.my_queries": (
+        "SELECT * FROM client_queries WHERE client_email = %s",
+        ("client@example.com",),
+    ),
+    **_queue_hot_paths(),
+    "support.claim_next": (
+        """
+        SELECT query_id FROM client_queries
+        WHERE status = 'Open' AND assigned_support_id IS NULL
+        ORDER BY query_created_time, query_id
+        LIMIT 5
+        """,
+        (),
+    ),
+    "auth.login_by_email": (
+        "SELECT user_id FROM users WHERE email = %s",
+        ("client@example.com",),
+    ),
+    "auth.login_by_mobile": (
+        "SELECT user_id FROM users WHERE mobile_number IN (%s, %s)",
+        ("9876543210", "+91 98765 43210"),
+    ),
+    "auth.login_by_username": (
+        "SELECT user_id FROM users WHERE username = %s",
+        ("S001",),
+    ),
+    "delta_cache.refresh": (
+        "SELECT query_id, status FROM client_queries WHERE updated_at >= %s",
+        ("2100-01-01",),
+    ),
+    "snapshot.export_month": (
+        """
+        SELECT query_id FROM client_queries
+        WHERE query_created_time >= %s AND query_created_time < %s
+        """,
+        ("2100-01-01", "2100-02-01"),
+    ),
+    "sla.breached_now": (
+        "SELECT query_id FROM client_queries WHERE sla_due_at <= %s",
+        ("1970-01-02",),
+    ),
+    "sla.breaching_within": (
+        "SELECT query_id FROM client_queries WHERE sla_due_at > %s AND sla_due_at <= %s",
+        ("2100-01-01", "2100-01-02"),
+    ),
+    "search.fulltext": (
+        """
+        SELECT query_id FROM client_queries
+        WHERE MATCH(query_heading, query_description) AGAINST (%s IN BOOLEAN MODE)
+        LIMIT 20
+        """,
+        ("+payment*",),
+    ),
+    "trends.delta_category": (
+        "SELECT day, category, closed FROM daily_category_rollup WHERE day >= %s",
+        ("2100-01-01",),
+    ),
+    "trends.delta_agent": (
+        "SELECT day, support_id, closed FROM daily_agent_rollup WHERE day >= %s",
+        ("2100-01-01",),
+    ),
+    "sketches.percentiles": (
+        """
+        SELECT dim_key, bucket, SUM(n) FROM resolution_sketches
+        WHERE dimension = %s
+        GROUP BY dim_key, bucket
+        """,
+        ("agent",),
+    ),
+    "analytics.sla_breaches": (
+        """
+        SELECT query_id FROM client_queries
+        WHERE status <> 'Closed'
+          AND query_created_time <= NOW() - INTERVAL 4 DAY
+        """,
+        (),
+    ),
+}
+
+
+# --------------------------------------------------
+# HELPERS
+# --------------------------------------------------
+def _connect():
+    """
+    Connects without selecting a database, then creates / selects it.
+    """
+    config = {k: v for k, v in DB_CONFIG.items() if k != "database"}
+    conn = mysql.connector.connect(**config)
+    cur = conn.cursor()
+    cur.execute(f"CREATE DATABASE IF NOT EXISTS `{DB_CONFIG['database']}`")
+    cur.execute(f"USE `{DB_CONFIG['database']}`")
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cur.close()
+    return conn
+
+
+def discover_migrations():
+    """
+    Returns [(version, name, path)] sorted by version.
+    """
+    found = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        match = re.match(r"^(\d+)_(.+)\.sql$", path.name)
+        if match:
+            found.append((int(match.group(1)), match.group(2), path))
+    return found
+
+
+def split_statements(sql):
+    """
+    Splits a migration file into statements (drops -- comments).
+    """
+    lines = [
+        line for line in sql.splitlines()
+        if not line.strip().startswith("--")
+    ]
+    return [s.strip() for s in "\n".join(lines).split(";") if s.strip()]
+
+
+def applied_versions(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT version FROM schema_migrations")
+    versions = {row[0] for row in cur.fetchall()}
+    cur.close()
+    return versions
+
+
+# --------------------------------------------------
+# MIGRATE
+# --------------------------------------------------
+def migrate():
+    """
+    Applies every pending migration in version order.
+    """
+    conn = _connect()
+    cur = conn.cursor()
+
+    try:
+        done = applied_versions(conn)
+
+        for version, name, path in discover_migrations():
+            if version in done:
+                continue
+
+            print(f"📦 Applying {version:04d}_{name}...")
+            for statement in split_statements(path.read_text(encoding="utf-8")):
+                try:
+                    cur.execute(statement)
+                except mysql.connector.Error as e:
+                    if e.errno not in ALREADY_APPLIED:
+                        raise
+                    print(f"   ↳ skipped ({ALREADY_APPLIED[e.errno]})")
+
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name),
+            )
+            conn.commit()
+
+        print("✅ Database schema is up to date.")
+
+    finally:
+        cur.close()
+        conn.close()
+
+
+def print_status():
+    conn = _connect()
+    try:
+        done = applied_versions(conn)
+        for version, name, _ in discover_migrations():
+            mark = "✅" if version in done else "⏳"
+            print(f"{mark} {version:04d}_{name}")
+    finally:
+        conn.close()
+
+
+# --------------------------------------------------
+# EXPLAIN CHECK
+# --------------------------------------------------
+def check_hot_paths():
+    """
+    EXPLAINs every hot-path query. Returns the names of queries
+    whose plan contains a full table scan (type = ALL).
+
+    Run against a representatively sized database: on a nearly
+    empty table the optimizer may legitimately prefer a scan.
+    """
+    conn = _connect()
+    cur = conn.cursor(dictionary=True)
+    failures = []
+
+    try:
+        for name, (sql, params) in HOT_PATH_QUERIES.items():
+            cur.execute(f"EXPLAIN {sql}", params)
+            plan = cur.fetchall()
+            scans = [row for row in plan if row.get("type") == "ALL"]
+
+            if scans:
+                failures.append(name)
+                print(f"❌ {name}: full scan on {scans[0].get('table')}")
+            else:
+                keys = ", ".join(str(row.get("key")) for row in plan)
+                print(f"✅ {name}: {keys}")
+    finally:
+        cur.close()
+        conn.close()
+
+    return failures
+
+
+# --------------------------------------------------
+# RUN
+# --------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CQMS schema migrations")
+    parser.add_argument("--status", action="store_true", help="list applied / pending")
+    parser.add_argument("--check", action="store_true", help="fail on hot-path full scans")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+    elif args.check:
+        sys.exit(1 if check_hot_paths() else 0)
+    else:
+        migrate()
@@ -0,0 +1,206 @@
+"""
+query_actions.py
+--------------------------------------------------
+Write paths for client queries (create / pick /
+close). Each action runs in a single transaction
+together with the rollup table, SLA due-time and
+near-duplicate index updates it causes. After commit
+the result-cache scopes it touched are bumped: the
+queues the query left / entered, its client's
+queries and the QUERIES aggregate (write_session).
+--------------------------------------------------
+"""
+
+from .result_cache import QUERIES, touch, write_session
+from . import duplicates, rollups, sketches, sla
+from .id_allocator import next_query_id
+from .query_pages import queue_scope
+
+
+def client_scope(client_email):
+    """
+    Result-cache scope of one client's queries.
+    """
+    return f"client:{client_email}"
+
+
+def _lock_row(cur, query_id):
+    """
+    (status, assigned_support_id, client_email), or None.
+    """
+    cur.execute(
+        """
+        SELECT status, assigned_support_id, client_email
+        FROM client_queries WHERE query_id = %s FOR UPDATE
+        """,
+        (query_id,),
+    )
+    return cur.fetchone()
+
+
+# --------------------------------------------------
+# CREATE
+# --------------------------------------------------
+def create_query(client_email, client_mobile, normalized_mobile,
+                 category, heading, description, issue_image_path=None):
+    """
+    Inserts a new Open query. Returns (query_id, duplicate):
+    duplicate is (root_id, score) when the query was linked to
+    one of the client's own open queries, else None.
+    issue_image_path is the image_store path of the screenshot.
+    """
+    # O(1), collision-free under concurrent submits
+    next_id = next_query_id()
+
+    with write_session() as cur:
+        cur.execute(
+            """
+            INSERT INTO client_queries
+            (query_id, client_email, client_mobile,
+             normalized_mobile, is_valid_mobile,
+             category, query_heading, query_description,
+             issue_image_path, status, query_created_time)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,'Open',NOW())
+            """,
+            (
+                next_id,
+                client_email,
+                client_mobile,
+                normalized_mobile,
+                1,
+                category,
+                heading,
+                description,
+                issue_image_path,
+            ),
+        )
+
+        rollups.record_new_query(cur, next_id)
+        sla.assign_due(cur, [next_id])
+        match = duplicates.index_new_query(cur, next_id, heading, description)
+        touch(QUERIES, queue_scope("open"), client_scope(client_email))
+
+    if match and match[2] == client_email:
+        return next_id, match[:2]
+    return next_id, None
+
+
+# --------------------------------------------------
+# CLAIM (PICK)
+# --------------------------------------------------
+CLAIMABLE = "status = 'Open' AND assigned_support_id IS NULL"
+
+
+def claim_query(support_id, query_id):
+    """
+    Claims one Open, unassigned query for an agent.
+
+    The UPDATE is conditional, so when two agents click the same
+    row exactly one succeeds. Returns False if the race was lost.
+    """
+    with write_session() as cur:
+        cur.execute(
+            f"""
+            UPDATE client_queries
+            SET assigned_support_id=%s,
+                status='In Progress'
+            WHERE query_id=%s AND {CLAIMABLE}
+            """,
+            (support_id, query_id),
+        )
+        claimed = cur.rowcount == 1
+        touch()
+
+        if claimed:
+            rollups.record_status_change(cur, "Open", "In Progress")
+            sla.assign_due(cur, [query_id])   # In Progress target
+            (client_email,) = _lock_row(cur, query_id)[2:]
+            touch(
+                QUERIES, queue_scope("open"), queue_scope("in_progress", support_id),
+                client_scope(client_email),
+            )
+
+    return claimed
+
+
+def claim_next_queries(support_id, count):
+    """
+    Claims up to `count` of the oldest Open, unassigned queries
+    in one transaction. Rows locked by concurrent claimers are
+    skipped (SKIP LOCKED) instead of waited on.
+    Returns the list of claimed query_ids.
+    """
+    with write_session() as cur:
+        cur.execute(
+            f"""
+            SELECT query_id, client_email
+            FROM client_queries
+            WHERE {CLAIMABLE}
+            ORDER BY query_created_time, query_id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+            """,
+            (count,),
+        )
+        rows = cur.fetchall()
+        query_ids = [row[0] for row in rows]
+
+        if not query_ids:
+            touch()
+            return []
+
+        placeholders = ",".join(["%s"] * len(query_ids))
+        cur.execute(
+            f"""
+            UPDATE client_queries
+            SET assigned_support_id=%s,
+                status='In Progress'
+            WHERE query_id IN ({placeholders}) AND {CLAIMABLE}
+            """,
+            (support_id, *query_ids),
+        )
+
+        rollups.record_status_change(cur, "Open", "In Progress", cur.rowcount)
+        sla.assign_due(cur, query_ids)
+        touch(
+            QUERIES, queue_scope("open"), queue_scope("in_progress", support_id),
+            *{client_scope(row[1]) for row in rows},
+        )
+
+    return query_ids
+
+
+# --------------------------------------------------
+# CLOSE
+# --------------------------------------------------
+def close_query(query_id):
+    """
+    Closes a query. Returns False if it was already closed.
+    """
+    with write_session() as cur:
+        row = _lock_row(cur, query_id)
+        if row is None or row[0] == "Closed":
+            touch()
+            return False
+        old_status, support_id, client_email = row
+
+        cur.execute(
+            """
+            UPDATE client_queries
+            SET status='Closed',
+                query_closed_time=NOW(),
+                sla_due_at=NULL
+            WHERE query_id=%s
+            """,
+            (query_id,),
+        )
+
+        rollups.record_close(cur, query_id, old_status)
+        sketches.record_resolution(cur, query_id)
+        duplicates.unindex_query(cur, query_id)
+        touch(
+            QUERIES, queue_scope("closed"), client_scope(client_email),
+            queue_scope("open") if old_status == "Open" else queue_scope("in_progress", support_id),
+        )
+
+    return True
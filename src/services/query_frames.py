@@ -0,0 +1,110 @@
+"""
+query_frames.py
+--------------------------------------------------
+Typed, memory-lean DataFrames of client_queries.
+
+- Projection: callers ask for the columns they use
+  (ANALYTICS_COLUMNS leaves out the free-text fields)
+- status / category / assigned_support_id become
+  categoricals (a few distinct values per column)
+- is_valid_* become bool, day counts the smallest
+  integer type that fits
+- memory_report() shows per-column resident bytes
+
+Used by the delta cache, analytics.load_queries and
+the support dashboard pages.
+--------------------------------------------------
+"""
+
+import pandas as pd
+
+
+# Columns the metrics / dashboards actually read
+ANALYTICS_COLUMNS = [
+    "query_id",
+    "category",
+    "status",
+    "assigned_support_id",
+    "query_created_time",
+    "query_closed_time",
+]
+
+STATUS_DTYPE = pd.CategoricalDtype(["Open", "In Progress", "Closed"])
+
+QUERY_DTYPES = {
+    "status": STATUS_DTYPE,
+    "category": "category",
+    "assigned_support_id": "category",
+    "is_valid_mobile": "bool",
+    "is_valid_email": "bool",
+}
+
+DATETIME_COLUMNS = ("query_created_time", "query_closed_time", "updated_at", "sla_due_at")
+
+
+# --------------------------------------------------
+# DTYPES
+# --------------------------------------------------
+def apply_query_dtypes(df):
+    """
+    Converts the known client_queries columns present in df
+    to their compact dtypes (in place). Returns df.
+    """
+    for col in DATETIME_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+
+    for col, dtype in QUERY_DTYPES.items():
+        if col not in df.columns:
+            continue
+        if dtype == "bool":
+            df[col] = df[col].fillna(0).astype(bool)
+        elif df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+
+    return df
+
+
+def compact_days(series):
+    """
+    Day counts as the smallest integer dtype that fits (float if NaN present).
+    """
+    return pd.to_numeric(series, downcast="integer")
+
+
+def align_categories(frame, delta):
+    """
+    Gives categorical columns shared by both frames identical
+    categories, so .loc updates and concat keep the dtype.
+    """
+    for col in frame.columns.intersection(delta.columns):
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            if not isinstance(delta[col].dtype, pd.CategoricalDtype):
+                delta[col] = delta[col].astype("category")
+            new = delta[col].cat.categories.difference(frame[col].cat.categories)
+            if len(new):
+                frame[col] = frame[col].cat.add_categories(new)
+            delta[col] = delta[col].cat.set_categories(frame[col].cat.categories)
+    return frame, delta
+
+
+# --------------------------------------------------
+# MEMORY REPORT
+# --------------------------------------------------
+def memory_report(df):
+    """
+    Per-column resident memory (deep), largest first, with a total row.
+    """
+    usage = df.memory_usage(deep=True, index=True)
+    report = pd.DataFrame({
+        "dtype": [str(df.index.dtype) if c == "Index" else str(df[c].dtype) for c in usage.index],
+        "bytes": usage.to_numpy(),
+    }, index=usage.index)
+    report["mb"] = (report["bytes"] / 1024**2).round(2)
+    report = report.sort_values("bytes", ascending=False)
+
+    total = pd.DataFrame(
+        {"dtype": [""], "bytes": [report["bytes"].sum()], "mb": [round(report["bytes"].sum() / 1024**2, 2)]},
+        index=["TOTAL"],
+    )
+    return pd.concat([report, total])
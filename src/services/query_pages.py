@@ -0,0 +1,129 @@
+"""
+query_pages.py
+--------------------------------------------------
+Keyset (seek) pagination over client_queries
+for the support dashboard queues.
+
+Pages are ordered by (query_created_time, query_id)
+and each page starts strictly after the last row of
+the previous one, so page cost stays flat no matter
+how deep the agent scrolls or how big the table is.
+Only the columns rendered in the queues are fetched
+(no TEXT descriptions). Counts and pages are cached
+until the next write to their queue (queue_scope,
+services.result_cache).
+--------------------------------------------------
+"""
+
+from .db_connection import db_session
+from .result_cache import cached_read
+
+
+# --------------------------------------------------
+# QUEUE DEFINITIONS
+# --------------------------------------------------
+PAGE_COLUMNS = """
+    query_id, category, status, assigned_support_id,
+    query_created_time, query_closed_time, issue_image_path,
+    duplicate_of
+"""
+
+QUEUES = {
+    # queue -> (WHERE clause, needs support_id, newest first?)
+    "open": ("status = 'Open' AND assigned_support_id IS NULL", False, False),
+    "in_progress": ("status = 'In Progress' AND assigned_support_id = %s", True, False),
+    "closed": ("status = 'Closed'", False, True),
+}
+
+
+def _queue_filter(queue, support_id=None):
+    where, needs_agent, descending = QUEUES[queue]
+    params = (support_id,) if needs_agent else ()
+    return where, params, descending
+
+
+def queue_scope(queue, support_id=None, *_, **__):
+    """
+    Result-cache scope of a queue (in-progress: per agent).
+    Takes fetch_page / count_queue arguments as they are.
+    """
+    if QUEUES[queue][1]:
+        return f"queue:{queue}:{support_id}"
+    return f"queue:{queue}"
+
+
+# --------------------------------------------------
+# SQL (also EXPLAINed by migrations --check)
+# --------------------------------------------------
+def count_sql(queue, support_id=None):
+    """
+    (sql, params) counting the rows of a queue.
+    """
+    where, params, _ = _queue_filter(queue, support_id)
+    return f"SELECT COUNT(*) FROM client_queries WHERE {where}", params
+
+
+def page_sql(queue, support_id=None, after=None, page_size=25):
+    """
+    (sql, params) of one page; fetches page_size + 1 rows so
+    the caller can tell whether another page follows.
+    """
+    where, params, descending = _queue_filter(queue, support_id)
+    op, direction = ("<", "DESC") if descending else (">", "ASC")
+
+    if after is not None:
+        created, query_id = after
+        where += f"""
+            AND (query_created_time {op} %s
+                 OR (query_created_time = %s AND query_id {op} %s))
+        """
+        params += (created, created, query_id)
+
+    sql = f"""
+        SELECT {PAGE_COLUMNS}
+        FROM client_queries
+        WHERE {where}
+        ORDER BY query_created_time {direction}, query_id {direction}
+        LIMIT %s
+    """
+    return sql, params + (page_size + 1,)
+
+
+# --------------------------------------------------
+# COUNT
+# --------------------------------------------------
+@cached_read(scope=queue_scope)
+def count_queue(queue, support_id=None):
+    """
+    Returns the total number of rows in a queue.
+    """
+    with db_session() as cur:
+        cur.execute(*count_sql(queue, support_id))
+        (total,) = cur.fetchone()
+
+    return total
+
+
+# --------------------------------------------------
+# PAGE FETCH
+# --------------------------------------------------
+@cached_read(scope=queue_scope)
+def fetch_page(queue, support_id=None, after=None, page_size=25):
+    """
+    Fetches one page of a queue.
+
+    after: (query_created_time, query_id) of the last row
+           on the previous page, or None for the first page.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    with db_session(dictionary=True) as cur:
+        cur.execute(*page_sql(queue, support_id, after, page_size))
+        rows = cur.fetchall()
+
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, (last["query_created_time"], last["query_id"])
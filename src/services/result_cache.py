@@ -0,0 +1,300 @@
+"""
+result_cache.py
+--------------------------------------------------
+Write-aware, in-process cache of read results for
+CQMS pages.
+
+- @cached_read keys on function + arguments
+- Entries expire after a TTL and the least recently
+  used ones are evicted past CQMS_CACHE_MAX_ENTRIES
+- Every entry remembers the data version of its scope
+  (e.g. one queue, one client's queries; default: the
+  QUERIES aggregate) it was read at. Write paths bump
+  the scopes they touch (write_session + touch, or
+  bump_version), so a cached read is never served
+  after our own write, while entries of other queues
+  and clients stay warm. A write that names no scope
+  bumps ALL, which every entry depends on
+- Versions are kept in the cache_versions table too,
+  hashed into CQMS_CACHE_VERSION_STRIPES rows, so
+  writes from other processes (CSV loads, other app
+  servers) are seen within CQMS_CACHE_VERSION_POLL
+  seconds. They are bumped right after the commit, in
+  their own short statement: write transactions never
+  queue on a shared counter row
+
+Cached values are shared between sessions: DataFrames
+are handed out as shallow copies (adding columns is
+safe), other values must not be mutated.
+
+Usage:
+    @cached_read()
+    def read_status_counts(): ...
+
+    @cached_read(scope=lambda email: f"client:{email}")
+    def read_client_queries(email): ...
+
+    with write_session() as cur:
+        cur.execute("UPDATE client_queries ...")
+        touch(QUERIES, f"client:{email}")
+--------------------------------------------------
+"""
+
+import functools
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+from mysql.connector import Error
+
+from .db_connection import db_session
+from .instrumentation import register_collector
+
+
+CACHE_TTL = float(os.environ.get("CQMS_CACHE_TTL", 60))                  # seconds
+CACHE_MAX_ENTRIES = int(os.environ.get("CQMS_CACHE_MAX_ENTRIES", 256))
+VERSION_POLL = float(os.environ.get("CQMS_CACHE_VERSION_POLL", 2))      # seconds between DB checks
+CACHE_DISABLED = os.environ.get("CQMS_CACHE_DISABLED") == "1"
+VERSION_STRIPES = int(os.environ.get("CQMS_CACHE_VERSION_STRIPES", 64))
+
+ALL = "client_queries"    # every entry depends on it (bulk jobs, unscoped writes)
+QUERIES = "queries"       # default scope: reads over many queries (counts, analytics)
+
+
+# --------------------------------------------------
+# DATA VERSIONS
+# --------------------------------------------------
+_local_versions = {}      # scope -> count, bumped after our own commits
+_db_versions = None       # cache_versions rows as last read
+_db_checked = 0.0
+_version_lock = threading.Lock()
+
+
+def _db_row(scope):
+    """
+    cache_versions row holding a scope's version: ALL has its
+    own, other scopes share VERSION_STRIPES hashed rows.
+    """
+    if scope == ALL:
+        return ALL
+    return f"stripe:{zlib.crc32(scope.encode('utf-8')) % VERSION_STRIPES}"
+
+
+def _read_db_versions():
+    try:
+        with db_session() as cur:
+            cur.execute("SELECT scope, version FROM cache_versions")
+            return dict(cur.fetchall())
+    except Error:
+        return None   # table missing / DB down: TTL still bounds staleness
+
+
+def current_version(scope=QUERIES):
+    """
+    Version tuple of a scope: (local ALL, local scope, db ALL,
+    db scope). The DB half is re-read at most every VERSION_POLL
+    seconds.
+    """
+    global _db_versions, _db_checked
+
+    now = time.monotonic()
+    if now - _db_checked >= VERSION_POLL:
+        versions = _read_db_versions()
+        with _version_lock:
+            _db_versions, _db_checked = versions, now
+
+    db = _db_versions
+    return (
+        _local_versions.get(ALL, 0),
+        _local_versions.get(scope, 0),
+        None if db is None else db.get(ALL, 0),
+        None if db is None else db.get(_db_row(scope), 0),
+    )
+
+
+def bump_version(*scopes):
+    """
+    Bumps the given scopes (default: ALL) in cache_versions and
+    in this process. Call after the write has committed.
+    """
+    scopes = set(scopes) or {ALL}
+    rows = sorted({_db_row(scope) for scope in scopes})
+
+    try:
+        with db_session() as cur:
+            cur.execute(
+                f"""
+                INSERT INTO cache_versions (scope, version)
+                VALUES {', '.join(['(%s, 1)'] * len(rows))}
+                ON DUPLICATE KEY UPDATE version = version + 1
+                """,
+                rows,
+            )
+    except Error as e:
+        print(f"❌ Cache version not bumped: {e}")
+
+    with _version_lock:
+        for scope in scopes:
+            _local_versions[scope] = _local_versions.get(scope, 0) + 1
+
+
+_touched = threading.local()
+
+
+def touch(*scopes):
+    """
+    Names scopes the current write_session changes. A session
+    that never calls touch bumps ALL; touch() alone marks it
+    as having changed nothing.
+    """
+    _touched.scopes = (getattr(_touched, "scopes", None) or set()) | set(scopes)
+
+
+@contextmanager
+def write_session(dictionary=False):
+    """
+    db_session() for writes to client_queries: after commit,
+    bumps the scopes named with touch() (default ALL).
+    """
+    outer = getattr(_touched, "scopes", None)
+    _touched.scopes = None
+    try:
+        with db_session(dictionary=dictionary) as cur:
+            yield cur
+        scopes = _touched.scopes
+    finally:
+        _touched.scopes = outer
+
+    # after commit: readers can't re-cache pre-write rows
+    if scopes is None:
+        bump_version()
+    elif scopes:
+        bump_version(*scopes)
+
+
+# --------------------------------------------------
+# LRU + TTL STORE
+# --------------------------------------------------
+_MISS = object()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of (version, expires_at, value) entries.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return _MISS
+
+            entry_version, expires_at, value = entry
+            if entry_version != version or time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._stats["stale"] += 1
+                return _MISS
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def put(self, key, version, value, ttl):
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["entries"] = len(self._entries)
+        return snapshot
+
+
+_cache = ResultCache()
+register_collector("result_cache", _cache.stats)
+
+
+def cache_stats():
+    """
+    Hit / miss / stale / eviction counters and current size.
+    """
+    return _cache.stats()
+
+
+def clear_cache():
+    _cache.clear()
+
+
+# --------------------------------------------------
+# DECORATOR
+# --------------------------------------------------
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def _share(value):
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    return value
+
+
+def cached_read(ttl=CACHE_TTL, scope=QUERIES):
+    """
+    Caches a read function's result per arguments until the
+    TTL runs out or a write bumps its scope. scope may be a
+    function of the call's arguments.
+    """
+
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if CACHE_DISABLED:
+                return fn(*args, **kwargs)
+
+            try:
+                key = (name, _freeze(args), _freeze(kwargs))
+                hash(key)
+            except TypeError:   # unhashable argument: don't cache
+                return fn(*args, **kwargs)
+
+            # version read *before* the query: a write committing
+            # meanwhile makes this entry stale, never the reverse
+            version = current_version(scope(*args, **kwargs) if callable(scope) else scope)
+            value = _cache.get(key, version)
+            if value is _MISS:
+                value = fn(*args, **kwargs)
+                _cache.put(key, version, value, ttl)
+
+            return _share(value)
+
+        wrapper.uncached = fn
+        return wrapper
+
+    return decorator
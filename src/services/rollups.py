@@ -0,0 +1,389 @@
+"""
+rollups.py
+--------------------------------------------------
+Transactionally maintained summary tables for
+CQMS analytics:
+
+- status_rollup   : queries per status
+- category_rollup : queries per category
+- agent_rollup    : closed count + total resolution
+                    days per support agent
+- daily_rollup    : queries opened / closed per day
+- daily_category_rollup / daily_agent_rollup :
+                    the same per category / agent, plus
+                    resolution days (trend charts)
+
+The record_* helpers take the caller's cursor so the
+rollup change commits (or rolls back) together with
+the insert / pick / close (or bulk-loaded chunk)
+that caused it.
+
+Backfill / repair:
+    python -m src.services.rollups
+--------------------------------------------------
+"""
+
+import pandas as pd
+from .db_connection import db_session
+from .result_cache import cached_read, write_session
+
+
+GENERATION_SCOPE = "rollups"   # cache_versions row bumped by every rebuild
+
+
+# --------------------------------------------------
+# INCREMENTAL UPDATES (same transaction as the write)
+# --------------------------------------------------
+def _bump_status(cur, status, delta):
+    cur.execute(
+        """
+        INSERT INTO status_rollup (status, query_count)
+        VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE query_count = query_count + %s
+        """,
+        (status, delta, delta),
+    )
+
+
+def record_new_query(cur, query_id, status="Open"):
+    """
+    Counts a freshly inserted query (status, category, day opened).
+    """
+    cur.execute(
+        """
+        INSERT INTO category_rollup (category, query_count)
+        SELECT * FROM (
+            SELECT category, 1 AS n FROM client_queries WHERE query_id = %s
+        ) AS src
+        ON DUPLICATE KEY UPDATE query_count = category_rollup.query_count + src.n
+        """,
+        (query_id,),
+    )
+    cur.execute(
+        """
+        INSERT INTO daily_rollup (day, opened, closed)
+        SELECT * FROM (
+            SELECT DATE(query_created_time) AS day, 1 AS opened, 0 AS closed
+            FROM client_queries WHERE query_id = %s
+        ) AS src
+        ON DUPLICATE KEY UPDATE opened = daily_rollup.opened + src.opened
+        """,
+        (query_id,),
+    )
+    cur.execute(
+        """
+        INSERT INTO daily_category_rollup (day, category, opened)
+        SELECT * FROM (
+            SELECT DATE(query_created_time) AS day, category, 1 AS opened
+            FROM client_queries WHERE query_id = %s
+        ) AS src
+        ON DUPLICATE KEY UPDATE opened = daily_category_rollup.opened + src.opened
+        """,
+        (query_id,),
+    )
+    _bump_status(cur, status, 1)
+
+
+def record_status_change(cur, old_status, new_status, count=1):
+    """
+    Moves `count` queries from one status bucket to another.
+    """
+    if old_status == new_status or count == 0:
+        return
+    _bump_status(cur, old_status, -count)
+    _bump_status(cur, new_status, count)
+
+
+def record_close(cur, query_id, old_status):
+    """
+    Counts a query that was just closed (agent totals, day closed).
+    Must run after the UPDATE that set query_closed_time.
+    """
+    record_status_change(cur, old_status, "Closed")
+
+    cur.execute(
+        """
+        INSERT INTO daily_rollup (day, opened, closed)
+        SELECT * FROM (
+            SELECT DATE(query_closed_time) AS day, 0 AS opened, 1 AS closed
+            FROM client_queries WHERE query_id = %s
+        ) AS src
+        ON DUPLICATE KEY UPDATE closed = daily_rollup.closed + src.closed
+        """,
+        (query_id,),
+    )
+    cur.execute(
+        """
+        INSERT INTO agent_rollup (support_id, closed_count, total_resolution_days)
+        SELECT * FROM (
+            SELECT assigned_support_id AS support_id,
+                   1 AS closed_count,
+                   TIMESTAMPDIFF(DAY, query_created_time, query_closed_time) AS days
+            FROM client_queries
+            WHERE query_id = %s AND assigned_support_id IS NOT NULL
+        ) AS src
+        ON DUPLICATE KEY UPDATE
+            closed_count = agent_rollup.closed_count + src.closed_count,
+            total_resolution_days = agent_rollup.total_resolution_days + src.days
+        """,
+        (query_id,),
+    )
+    cur.execute(
+        """
+        INSERT INTO daily_category_rollup (day, category, closed, total_resolution_days)
+        SELECT * FROM (
+            SELECT DATE(query_closed_time) AS day, category, 1 AS closed,
+                   TIMESTAMPDIFF(DAY, query_created_time, query_closed_time) AS days
+            FROM client_queries WHERE query_id = %s
+        ) AS src
+        ON DUPLICATE KEY UPDATE
+            closed = daily_category_rollup.closed + src.closed,
+            total_resolution_days = daily_category_rollup.total_resolution_days + src.days
+        """,
+        (query_id,),
+    )
+    cur.execute(
+        """
+        INSERT INTO daily_agent_rollup (day, support_id, closed, total_resolution_days)
+        SELECT * FROM (
+            SELECT DATE(query_closed_time) AS day, assigned_support_id AS support_id,
+                   1 AS closed,
+                   TIMESTAMPDIFF(DAY, query_created_time, query_closed_time) AS days
+            FROM client_queries
+            WHERE query_id = %s AND assigned_support_id IS NOT NULL
+        ) AS src
+        ON DUPLICATE KEY UPDATE
+            closed = daily_agent_rollup.closed + src.closed,
+            total_resolution_days = daily_agent_rollup.total_resolution_days + src.days
+        """,
+        (query_id,),
+    )
+
+
+# --------------------------------------------------
+# SET-BASED UPDATES (bulk loads, full rebuild)
+# --------------------------------------------------
+# table -> (columns, SELECT over the client_queries rows matching
+#           {where}, upsert that adds the SELECT's row `src`)
+ROLLUP_SOURCES = {
+    "status_rollup": (
+        "status, query_count",
+        "SELECT status, COUNT(*) AS n FROM client_queries WHERE {where} GROUP BY status",
+        "query_count = status_rollup.query_count + src.n",
+    ),
+    "category_rollup": (
+        "category, query_count",
+        "SELECT category, COUNT(*) AS n FROM client_queries WHERE {where} GROUP BY category",
+        "query_count = category_rollup.query_count + src.n",
+    ),
+    "agent_rollup": (
+        "support_id, closed_count, total_resolution_days",
+        """
+        SELECT assigned_support_id AS support_id,
+               COUNT(*) AS n,
+               SUM(TIMESTAMPDIFF(DAY, query_created_time, query_closed_time)) AS days
+        FROM client_queries
+        WHERE status = 'Closed' AND assigned_support_id IS NOT NULL AND {where}
+        GROUP BY assigned_support_id
+        """,
+        """
+        closed_count = agent_rollup.closed_count + src.n,
+        total_resolution_days = agent_rollup.total_resolution_days + src.days
+        """,
+    ),
+    "daily_rollup": (
+        "day, opened, closed",
+        """
+        SELECT day, SUM(opened) AS opened, SUM(closed) AS closed FROM (
+            SELECT DATE(query_created_time) AS day, COUNT(*) AS opened, 0 AS closed
+            FROM client_queries WHERE {where} GROUP BY DATE(query_created_time)
+            UNION ALL
+            SELECT DATE(query_closed_time), 0, COUNT(*)
+            FROM client_queries
+            WHERE status = 'Closed' AND query_closed_time IS NOT NULL AND {where}
+            GROUP BY DATE(query_closed_time)
+        ) AS t
+        GROUP BY day
+        """,
+        """
+        opened = daily_rollup.opened + src.opened,
+        closed = daily_rollup.closed + src.closed
+        """,
+    ),
+    "daily_category_rollup": (
+        "day, category, opened, closed, total_resolution_days",
+        """
+        SELECT day, category, SUM(opened) AS opened, SUM(closed) AS closed,
+               SUM(days) AS days
+        FROM (
+            SELECT DATE(query_created_time) AS day, category,
+                   COUNT(*) AS opened, 0 AS closed, 0 AS days
+            FROM client_queries WHERE {where}
+            GROUP BY DATE(query_created_time), category
+            UNION ALL
+            SELECT DATE(query_closed_time), category,
+                   0, COUNT(*), SUM(TIMESTAMPDIFF(DAY, query_created_time, query_closed_time))
+            FROM client_queries
+            WHERE status = 'Closed' AND query_closed_time IS NOT NULL AND {where}
+            GROUP BY DATE(query_closed_time), category
+        ) AS t
+        GROUP BY day, category
+        """,
+        """
+        opened = daily_category_rollup.opened + src.opened,
+        closed = daily_category_rollup.closed + src.closed,
+        total_resolution_days = daily_category_rollup.total_resolution_days + src.days
+        """,
+    ),
+    "daily_agent_rollup": (
+        "day, support_id, closed, total_resolution_days",
+        """
+        SELECT DATE(query_closed_time) AS day, assigned_support_id AS support_id,
+               COUNT(*) AS closed,
+               SUM(TIMESTAMPDIFF(DAY, query_created_time, query_closed_time)) AS days
+        FROM client_queries
+        WHERE status = 'Closed' AND query_closed_time IS NOT NULL
+          AND assigned_support_id IS NOT NULL AND {where}
+        GROUP BY DATE(query_closed_time), assigned_support_id
+        """,
+        """
+        closed = daily_agent_rollup.closed + src.closed,
+        total_resolution_days = daily_agent_rollup.total_resolution_days + src.days
+        """,
+    ),
+}
+
+# history may have changed anywhere: incremental trend caches reload
+BUMP_GENERATION_SQL = (
+    f"UPDATE cache_versions SET version = version + 1 WHERE scope = '{GENERATION_SCOPE}'"
+)
+
+REBUILD_SQL = [
+    sql
+    for table, (columns, select, _) in ROLLUP_SOURCES.items()
+    for sql in (
+        f"DELETE FROM {table}",
+        f"INSERT INTO {table} ({columns}) {select.format(where='TRUE')}",
+    )
+] + [BUMP_GENERATION_SQL]
+
+
+def record_loaded(cur, query_ids):
+    """
+    Adds bulk-inserted queries (any status, e.g. a CSV chunk) to
+    every rollup on the caller's cursor. Costs O(len(query_ids)).
+    """
+    if not query_ids:
+        return
+
+    where = f"query_id IN ({','.join(['%s'] * len(query_ids))})"
+    for table, (columns, select, upsert) in ROLLUP_SOURCES.items():
+        select = select.format(where=where)
+        cur.execute(
+            f"""
+            INSERT INTO {table} ({columns})
+            SELECT * FROM ({select}) AS src
+            ON DUPLICATE KEY UPDATE {upsert}
+            """,
+            tuple(query_ids) * select.count(where),
+        )
+    cur.execute(BUMP_GENERATION_SQL)
+
+
+def rebuild_rollups():
+    """
+    Recomputes every rollup table from client_queries in one transaction
+    (and bumps the result-cache version, e.g. after a CSV load).
+    """
+    with write_session() as cur:
+        for sql in REBUILD_SQL:
+            cur.execute(sql)
+
+
+# --------------------------------------------------
+# READERS (primary-key / tiny table reads, cached)
+# --------------------------------------------------
+@cached_read()
+def read_status_counts():
+    """
+    Returns {status: count}.
+    """
+    with db_session() as cur:
+        cur.execute("SELECT status, query_count FROM status_rollup")
+        return {status: int(count) for status, count in cur.fetchall()}
+
+
+@cached_read()
+def read_category_counts():
+    """
+    Same shape as analytics.support_load_metrics().
+    """
+    with db_session() as cur:
+        cur.execute(
+            """
+            SELECT category, query_count FROM category_rollup
+            WHERE query_count > 0
+            ORDER BY query_count DESC
+            """
+        )
+        rows = cur.fetchall()
+
+    return pd.DataFrame(rows, columns=["category", "query_count"])
+
+
+@cached_read()
+def read_agent_leaderboard():
+    """
+    Same shape as analytics.agent_workload().
+    """
+    with db_session() as cur:
+        cur.execute(
+            """
+            SELECT support_id, closed_count,
+                   total_resolution_days / closed_count
+            FROM agent_rollup
+            WHERE closed_count > 0
+            ORDER BY closed_count DESC
+            """
+        )
+        rows = cur.fetchall()
+
+    leaderboard = pd.DataFrame(
+        rows,
+        columns=["assigned_support_id", "closed_queries", "avg_resolution_days"],
+    )
+    leaderboard["avg_resolution_days"] = (
+        leaderboard["avg_resolution_days"].astype(float).round(1)
+    )
+    return leaderboard
+
+
+def read_generation():
+    """
+    Rollup rebuild counter (None if the row is missing).
+    """
+    with db_session() as cur:
+        cur.execute("SELECT version FROM cache_versions WHERE scope = %s", (GENERATION_SCOPE,))
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+@cached_read()
+def read_daily_counts():
+    """
+    Returns per-day opened / closed counts ordered by day.
+    """
+    with db_session() as cur:
+        cur.execute("SELECT day, opened, closed FROM daily_rollup ORDER BY day")
+        rows = cur.fetchall()
+
+    return pd.DataFrame(rows, columns=["day", "opened", "closed"])
+
+
+# --------------------------------------------------
+# RUN
+# --------------------------------------------------
+if __name__ == "__main__":
+    print("🔁 Rebuilding rollup tables...")
+    rebuild_rollups()
+    print("✅ Rollups rebuilt:", read_status_counts())
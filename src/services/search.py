@@ -0,0 +1,132 @@
+"""
+search.py
+--------------------------------------------------
+Full-text search over client query headings and
+descriptions.
+
+Backed by the InnoDB FULLTEXT index ft_query_text
+(migration 0010): MySQL ranks the matches and only
+the top-k rows (with a short description snippet)
+cross the wire, so a search stays in the
+milliseconds on multi-million-row tables. InnoDB
+updates the index on every insert, so a new query
+is searchable as soon as it commits.
+
+Modes:
+- all : every term must match, terms also match as
+        prefixes ("pay fail" finds "payment failed")
+- any : natural-language relevance ranking, any term
+
+Terms shorter than MIN_TERM (innodb_ft_min_token_size)
+and FULLTEXT stopwords are ignored by MySQL.
+
+Run using:
+    python -m src.services.search "payment failed" -k 10
+--------------------------------------------------
+"""
+
+import argparse
+import re
+
+import pandas as pd
+
+from .db_connection import db_session
+from .result_cache import cached_read
+
+
+MIN_TERM = 3
+SNIPPET_CHARS = 160
+MODES = ("all", "any")
+
+SEARCH_COLUMNS = [
+    "query_id",
+    "query_heading",
+    "snippet",
+    "category",
+    "status",
+    "assigned_support_id",
+    "query_created_time",
+    "score",
+]
+
+# boolean-mode operators are stripped from user input
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(text):
+    """
+    Lower-cased search words long enough for the FULLTEXT index.
+    """
+    return [t for t in _TERM.findall(text.lower()) if len(t) >= MIN_TERM]
+
+
+def _against(terms, mode):
+    if mode == "all":
+        return " ".join(f"+{t}*" for t in terms), "IN BOOLEAN MODE"
+    return " ".join(terms), "IN NATURAL LANGUAGE MODE"
+
+
+# --------------------------------------------------
+# SEARCH
+# --------------------------------------------------
+@cached_read()
+def search_queries(text, k=20, mode="all", status=None, category=None):
+    """
+    Top-k queries matching `text`, best first.
+    status / category (None or "All" = any) narrow the matches.
+    Returns a DataFrame with SEARCH_COLUMNS.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    terms = search_terms(text)
+    if not terms:
+        return pd.DataFrame(columns=SEARCH_COLUMNS)
+
+    against, modifier = _against(terms, mode)
+    match = f"MATCH(query_heading, query_description) AGAINST (%s {modifier})"
+
+    where, params = [match], [against]
+    for column, value in (("status", status), ("category", category)):
+        if value not in (None, "All"):
+            where.append(f"{column} = %s")
+            params.append(value)
+
+    with db_session() as cur:
+        cur.execute(
+            f"""
+            SELECT query_id, query_heading,
+                   LEFT(query_description, {SNIPPET_CHARS}),
+                   category, status, assigned_support_id,
+                   query_created_time, {match} AS score
+            FROM client_queries
+            WHERE {" AND ".join(where)}
+            ORDER BY score DESC, query_id
+            LIMIT %s
+            """,
+            (against, *params, int(k)),
+        )
+        rows = cur.fetchall()
+
+    df = pd.DataFrame(rows, columns=SEARCH_COLUMNS)
+    df["score"] = df["score"].astype(float).round(3)
+    return df
+
+
+# --------------------------------------------------
+# RUN
+# --------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search client queries")
+    parser.add_argument("text")
+    parser.add_argument("-k", type=int, default=20)
+    parser.add_argument("--mode", choices=MODES, default="all")
+    parser.add_argument("--status")
+    parser.add_argument("--category")
+    args = parser.parse_args()
+
+    results = search_queries(args.text, args.k, args.mode, args.status, args.category)
+    if results.empty:
+        print("No matches.")
+    else:
+        print(results.drop(columns=["snippet"]).to_string(index=False))
@@ -0,0 +1,302 @@
+"""
+sketches.py
+--------------------------------------------------
+Mergeable resolution-time quantile sketches (DDSketch)
+for CQMS analytics.
+
+- Resolution time (close - create, in fractional days)
+  is counted in logarithmic buckets: bucket i holds
+  values in (gamma^(i-1), gamma^i], so any quantile
+  read back is within RELATIVE_ACCURACY of the true
+  value. Sub-minute resolutions share ZERO_BUCKET
+- resolution_sketches keeps one sketch per agent and
+  per category for every close month. A close adds 1
+  to two bucket rows (same transaction as the close),
+  a CSV chunk adds its closed rows (record_loaded)
+- Sketches merge by adding bucket counts, so roll-ups
+  across agents, categories or months are a SUM(n)
+  GROUP BY bucket. Size is bounded by the number of
+  buckets (a few hundred for minutes..years), not by
+  the number of closed queries
+
+Run using:
+    python -m src.services.sketches --rebuild     # backfill / repair
+    python -m src.services.sketches --dimension agent
+--------------------------------------------------
+"""
+
+import argparse
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .db_connection import db_session
+from .result_cache import cached_read, write_session
+
+
+# Changing the accuracy (or MIN_SECONDS) re-defines the buckets: run --rebuild
+# afterwards. Migration 0013 backfills with these values inlined
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+MIN_SECONDS = 60                       # faster resolutions count as 0 days
+ZERO_BUCKET = -32768
+QUANTILES = (0.5, 0.9, 0.99)
+DIMENSIONS = ("agent", "category")
+
+_SECONDS = "TIMESTAMPDIFF(SECOND, query_created_time, query_closed_time)"
+BUCKET_SQL = (
+    f"CASE WHEN {_SECONDS} < {MIN_SECONDS} THEN {ZERO_BUCKET} "
+    f"ELSE CEIL(LN({_SECONDS} / 86400) / {LOG_GAMMA!r}) END"
+)
+_DIMENSION_KEYS = {"agent": "assigned_support_id", "category": "category"}
+
+# bucket counts of the closed queries matching {where}, per dimension
+_SKETCH_SELECT = " UNION ALL ".join(
+    f"""
+    SELECT '{dimension}' AS dimension, {column} AS dim_key,
+           EXTRACT(YEAR_MONTH FROM query_closed_time) AS month,
+           {BUCKET_SQL} AS bucket, COUNT(*) AS n
+    FROM client_queries
+    WHERE status = 'Closed' AND query_closed_time IS NOT NULL
+      AND {column} IS NOT NULL AND {{where}}
+    GROUP BY dim_key, month, bucket
+    """
+    for dimension, column in _DIMENSION_KEYS.items()
+)
+
+
+# --------------------------------------------------
+# SKETCH
+# --------------------------------------------------
+class QuantileSketch:
+    """
+    In-memory DDSketch: {bucket: count}.
+    """
+
+    def __init__(self, buckets=None):
+        self.buckets = Counter(buckets or {})
+
+    @staticmethod
+    def bucket_of(days):
+        if days * 86400 < MIN_SECONDS:
+            return ZERO_BUCKET
+        return math.ceil(math.log(days) / LOG_GAMMA)
+
+    @staticmethod
+    def value_of(bucket):
+        if bucket == ZERO_BUCKET:
+            return 0.0
+        return 2 * GAMMA ** bucket / (GAMMA + 1)
+
+    def add(self, days, n=1):
+        self.buckets[self.bucket_of(days)] += n
+        return self
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+        return self
+
+    @property
+    def count(self):
+        return sum(self.buckets.values())
+
+    def quantiles(self, qs=QUANTILES):
+        """
+        [value] for each q in qs (None when empty).
+        """
+        if not self.buckets:
+            return [None] * len(qs)
+
+        keys = np.array(sorted(self.buckets))
+        cumulative = np.cumsum([self.buckets[k] for k in keys])
+        ranks = np.asarray(qs, dtype=float) * (cumulative[-1] - 1)
+        picked = keys[np.searchsorted(cumulative, ranks, side="right")]
+        return [self.value_of(int(k)) for k in picked]
+
+    def quantile(self, q):
+        return self.quantiles((q,))[0]
+
+    def mean(self):
+        """
+        Approximate mean (each bucket at its representative value).
+        """
+        total = self.count
+        if not total:
+            return None
+        return sum(self.value_of(k) * n for k, n in self.buckets.items()) / total
+
+
+# --------------------------------------------------
+# INCREMENTAL UPDATE (same transaction as the close)
+# --------------------------------------------------
+def record_resolution(cur, query_id):
+    """
+    Adds a just-closed query to its agent and category sketches.
+    Must run after the UPDATE that set query_closed_time.
+    """
+    cur.execute(
+        f"""
+        INSERT INTO resolution_sketches (dimension, dim_key, month, bucket, n)
+        SELECT * FROM (
+            SELECT 'agent' AS dimension, assigned_support_id AS dim_key,
+                   EXTRACT(YEAR_MONTH FROM query_closed_time) AS month,
+                   {BUCKET_SQL} AS bucket, 1 AS n
+            FROM client_queries
+            WHERE query_id = %s AND assigned_support_id IS NOT NULL
+            UNION ALL
+            SELECT 'category', category,
+                   EXTRACT(YEAR_MONTH FROM query_closed_time),
+                   {BUCKET_SQL}, 1
+            FROM client_queries
+            WHERE query_id = %s
+        ) AS src
+        ON DUPLICATE KEY UPDATE n = resolution_sketches.n + src.n
+        """,
+        (query_id, query_id),
+    )
+
+
+def record_loaded(cur, query_ids):
+    """
+    Adds bulk-inserted queries (closed ones count) to their
+    sketches on the caller's cursor.
+    """
+    if not query_ids:
+        return
+
+    where = f"query_id IN ({','.join(['%s'] * len(query_ids))})"
+    cur.execute(
+        f"""
+        INSERT INTO resolution_sketches (dimension, dim_key, month, bucket, n)
+        SELECT * FROM ({_SKETCH_SELECT.format(where=where)}) AS src
+        ON DUPLICATE KEY UPDATE n = resolution_sketches.n + src.n
+        """,
+        tuple(query_ids) * len(DIMENSIONS),
+    )
+
+
+def rebuild_sketches():
+    """
+    Recomputes every sketch from client_queries (repair, or
+    after a load with --rebuild).
+    """
+    with write_session() as cur:
+        cur.execute("DELETE FROM resolution_sketches")
+        cur.execute(
+            "INSERT INTO resolution_sketches (dimension, dim_key, month, bucket, n) "
+            + _SKETCH_SELECT.format(where="TRUE")
+        )
+
+
+# --------------------------------------------------
+# READERS (merged in SQL, cached)
+# --------------------------------------------------
+def _filters(dimension, keys=None, months=None):
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown sketch dimension: {dimension}")
+
+    where = ["dimension = %s"]
+    params = [dimension]
+    if keys:
+        where.append(f"dim_key IN ({','.join(['%s'] * len(keys))})")
+        params.extend(keys)
+    if months:
+        where.append("month BETWEEN %s AND %s")
+        params.extend(months)
+    return " AND ".join(where), params
+
+
+def read_sketch(dimension="category", keys=None, months=None):
+    """
+    One merged sketch over the given keys (default: all) and
+    (first, last) YYYYMM months (default: all).
+    """
+    where, params = _filters(dimension, keys, months)
+
+    with db_session() as cur:
+        cur.execute(
+            f"SELECT bucket, SUM(n) FROM resolution_sketches WHERE {where} GROUP BY bucket",
+            tuple(params),
+        )
+        return QuantileSketch({bucket: int(n) for bucket, n in cur.fetchall()})
+
+
+def _percentile_frame(rows, group, quantiles):
+    sketches = {}
+    for key, bucket, n in rows:
+        sketches.setdefault(key, QuantileSketch()).buckets[bucket] += int(n)
+
+    columns = [group, "closed"] + [f"p{round(q * 100):d}" for q in quantiles]
+    records = [
+        [key, sketch.count] + [round(v, 1) for v in sketch.quantiles(quantiles)]
+        for key, sketch in sketches.items()
+    ]
+    return pd.DataFrame(records, columns=columns)
+
+
+@cached_read()
+def read_percentiles(dimension="category", months=None, quantiles=QUANTILES):
+    """
+    DataFrame of dim_key, closed, p50 / p90 / p99 resolution days
+    per agent or category, largest first.
+    """
+    where, params = _filters(dimension, months=months)
+
+    with db_session() as cur:
+        cur.execute(
+            f"""
+            SELECT dim_key, bucket, SUM(n) FROM resolution_sketches
+            WHERE {where}
+            GROUP BY dim_key, bucket
+            """,
+            tuple(params),
+        )
+        rows = cur.fetchall()
+
+    frame = _percentile_frame(rows, "dim_key", quantiles)
+    return frame.sort_values("closed", ascending=False, ignore_index=True)
+
+
+@cached_read()
+def read_monthly_percentiles(dimension="category", keys=None, quantiles=QUANTILES):
+    """
+    DataFrame of month, closed, p50 / p90 / p99 resolution days,
+    merged across the given keys (default: all).
+    """
+    where, params = _filters(dimension, keys)
+
+    with db_session() as cur:
+        cur.execute(
+            f"""
+            SELECT month, bucket, SUM(n) FROM resolution_sketches
+            WHERE {where}
+            GROUP BY month, bucket
+            """,
+            tuple(params),
+        )
+        rows = cur.fetchall()
+
+    frame = _percentile_frame(rows, "month", quantiles)
+    frame["month"] = pd.to_datetime(frame["month"].astype(str), format="%Y%m")
+    return frame.sort_values("month", ignore_index=True)
+
+
+# --------------------------------------------------
+# RUN
+# --------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CQMS resolution-time sketches")
+    parser.add_argument("--rebuild", action="store_true", help="recompute from client_queries")
+    parser.add_argument("--dimension", choices=DIMENSIONS, default="category")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_sketches()
+        print("✅ Resolution sketches rebuilt")
+
+    overall = read_sketch()
+    print(f"Closed: {overall.count:,}  p50/p90/p99 days: {overall.quantiles()}")
+    print(read_percentiles(args.dimension).to_string(index=False))
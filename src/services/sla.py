@@ -0,0 +1,359 @@
+"""
+sla.py
+--------------------------------------------------
+Deadline-indexed SLA engine for CQMS.
+
+- sla_targets holds the target (hours from creation)
+  per category and status; category '*' is the
+  default for categories without their own row
+- Every unresolved query stores its due time in
+  client_queries.sla_due_at (indexed). Write paths
+  keep it current: set on submit, moved on pick,
+  cleared on close
+- "Breached now" and "breaching within N hours" are
+  range lookups on that index, so SLA views cost
+  O(breaches), not O(all queries)
+- A background sweep records breaches in
+  sla_breach_events (one row per query per missed
+  due time; repeated sweeps are no-ops). It reads
+  without locks and only the due times passed since
+  its previous sweep; every CATCHUP_SWEEPS sweeps (and
+  after a recompute) it re-checks every breach, for
+  due times moved into the past by a pick elsewhere
+
+Run using:
+    python -m src.services.sla --sweep            # one sweep
+    python -m src.services.sla --sweep --loop     # every CQMS_SLA_SWEEP_SECONDS
+    python -m src.services.sla --set-target "Login Issue" Open 24
+    python -m src.services.sla --recompute        # after bulk loads / target edits
+--------------------------------------------------
+"""
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+from mysql.connector import Error
+
+from .db_connection import db_session
+from .result_cache import bump_version, cached_read, write_session
+
+
+DEFAULT_CATEGORY = "*"
+SLA_STATUSES = ("Open", "In Progress")
+SWEEP_SECONDS = float(os.environ.get("CQMS_SLA_SWEEP_SECONDS", 300))   # 0 = no background sweep
+CATCHUP_SWEEPS = 12       # full re-check every 12th sweep (hourly at the default interval)
+EVENTS_SCOPE = "sla_events"   # result-cache scope of the breach log
+
+SLA_COLUMNS = [
+    "query_id",
+    "category",
+    "status",
+    "assigned_support_id",
+    "query_created_time",
+    "sla_due_at",
+]
+
+# Due time from the category's own target, else the '*' default
+DUE_AT_SQL = """
+    UPDATE client_queries q
+    LEFT JOIN sla_targets t ON t.category = q.category AND t.status = q.status
+    LEFT JOIN sla_targets d ON d.category = '*' AND d.status = q.status
+    SET q.sla_due_at = CASE
+        WHEN q.status = 'Closed' THEN NULL
+        ELSE q.query_created_time + INTERVAL COALESCE(t.target_hours, d.target_hours) HOUR
+    END
+"""
+
+
+# --------------------------------------------------
+# DUE TIMES (same transaction as the write)
+# --------------------------------------------------
+def assign_due(cur, query_ids):
+    """
+    Recomputes sla_due_at for the given queries on the caller's
+    cursor (after an insert or a status change).
+    """
+    if not query_ids:
+        return
+    placeholders = ",".join(["%s"] * len(query_ids))
+    cur.execute(f"{DUE_AT_SQL} WHERE q.query_id IN ({placeholders})", tuple(query_ids))
+
+
+def recompute_due(category=None):
+    """
+    Recomputes due times of every unresolved query (optionally one
+    category), e.g. after a CSV load or a target change.
+    Returns rows updated.
+    """
+    where = " WHERE q.status IN ('Open', 'In Progress')"
+    params = ()
+    if category not in (None, DEFAULT_CATEGORY):
+        where += " AND q.category = %s"
+        params = (category,)
+
+    with write_session() as cur:
+        cur.execute(DUE_AT_SQL + where, params)
+        updated = cur.rowcount
+
+    reset_sweep_mark()   # due times may now lie before it
+    return updated
+
+
+# --------------------------------------------------
+# TARGETS
+# --------------------------------------------------
+@cached_read()
+def read_targets():
+    """
+    DataFrame of category, status, target_hours ('*' = default).
+    """
+    with db_session() as cur:
+        cur.execute(
+            "SELECT category, status, target_hours FROM sla_targets ORDER BY category, status"
+        )
+        rows = cur.fetchall()
+    return pd.DataFrame(rows, columns=["category", "status", "target_hours"])
+
+
+def set_target(category, status, target_hours):
+    """
+    Upserts one target and moves the due times it affects.
+    Returns the number of queries re-dated.
+    """
+    if status not in SLA_STATUSES:
+        raise ValueError(f"SLA targets apply to {SLA_STATUSES}, not {status!r}")
+    if target_hours <= 0:
+        raise ValueError("target_hours must be positive")
+
+    with write_session() as cur:
+        cur.execute(
+            """
+            INSERT INTO sla_targets (category, status, target_hours)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE target_hours = VALUES(target_hours)
+            """,
+            (category, status, int(target_hours)),
+        )
+
+    return recompute_due(category)
+
+
+# --------------------------------------------------
+# VIEWS (index range lookups)
+# --------------------------------------------------
+def _due_frame(rows, now):
+    df = pd.DataFrame(rows, columns=SLA_COLUMNS)
+    df["sla_due_at"] = pd.to_datetime(df["sla_due_at"])
+    df["hours_past_due"] = ((now - df["sla_due_at"]).dt.total_seconds() / 3600).round(1)
+    return df
+
+
+@cached_read()
+def breached_now(now=None):
+    """
+    Unresolved queries past their due time, most overdue first.
+    """
+    now = now or datetime.now()
+
+    with db_session() as cur:
+        cur.execute(
+            f"""
+            SELECT {", ".join(SLA_COLUMNS)}
+            FROM client_queries
+            WHERE sla_due_at <= %s
+            ORDER BY sla_due_at
+            """,
+            (now,),
+        )
+        rows = cur.fetchall()
+
+    return _due_frame(rows, now)
+
+
+@cached_read()
+def breaching_within(hours, now=None):
+    """
+    Unresolved queries that breach in the next `hours` hours,
+    soonest first (hours_past_due is negative: time left).
+    """
+    now = now or datetime.now()
+
+    with db_session() as cur:
+        cur.execute(
+            f"""
+            SELECT {", ".join(SLA_COLUMNS)}
+            FROM client_queries
+            WHERE sla_due_at > %s AND sla_due_at <= %s
+            ORDER BY sla_due_at
+            """,
+            (now, now + timedelta(hours=hours)),
+        )
+        rows = cur.fetchall()
+
+    return _due_frame(rows, now)
+
+
+@cached_read(scope=EVENTS_SCOPE)
+def recent_breach_events(limit=100):
+    """
+    Latest recorded breach events, newest first.
+    """
+    with db_session() as cur:
+        cur.execute(
+            """
+            SELECT query_id, status, category, assigned_support_id,
+                   sla_due_at, detected_at
+            FROM sla_breach_events
+            ORDER BY detected_at DESC, event_id DESC
+            LIMIT %s
+            """,
+            (limit,),
+        )
+        rows = cur.fetchall()
+
+    return pd.DataFrame(
+        rows,
+        columns=["query_id", "status", "category", "assigned_support_id",
+                 "sla_due_at", "detected_at"],
+    )
+
+
+# --------------------------------------------------
+# SWEEP
+# --------------------------------------------------
+_swept_until = None       # due times up to here are logged (this process)
+_sweeps = 0
+_resets = 0
+_sweep_lock = threading.Lock()
+
+
+def reset_sweep_mark():
+    """
+    Makes the next sweep re-check every breach.
+    """
+    global _swept_until, _resets
+    with _sweep_lock:
+        _swept_until = None
+        _resets += 1
+
+
+def sweep(now=None, full=False):
+    """
+    Records breaches not logged yet: a plain (non-locking) read
+    of the due-time range since the previous sweep, or of every
+    breach on a full sweep, then an insert of the new ones.
+    Returns new events.
+    """
+    global _swept_until, _sweeps
+    now = now or datetime.now()
+
+    with _sweep_lock:
+        since = None if full or _sweeps % CATCHUP_SWEEPS == 0 else _swept_until
+        resets = _resets
+        _sweeps += 1
+
+    where, params = "q.sla_due_at <= %s", [now]
+    if since is not None:
+        where += " AND q.sla_due_at > %s"
+        params.append(since)
+
+    with db_session() as cur:
+        cur.execute(
+            f"""
+            SELECT q.query_id, q.status, q.category, q.assigned_support_id, q.sla_due_at
+            FROM client_queries q
+            LEFT JOIN sla_breach_events e
+                ON e.query_id = q.query_id AND e.status = q.status
+               AND e.sla_due_at = q.sla_due_at
+            WHERE {where} AND e.event_id IS NULL
+            """,
+            tuple(params),
+        )
+        rows = cur.fetchall()
+
+        recorded = 0
+        if rows:
+            cur.executemany(
+                """
+                INSERT IGNORE INTO sla_breach_events
+                    (query_id, status, category, assigned_support_id, sla_due_at, detected_at)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                """,
+                [(*row, now) for row in rows],
+            )
+            recorded = max(cur.rowcount, 0)
+
+    with _sweep_lock:
+        # a reset during this sweep wins: the next one is full
+        if resets == _resets and (_swept_until is None or now > _swept_until):
+            _swept_until = now
+
+    if recorded:
+        bump_version(EVENTS_SCOPE)   # only the event log changed
+
+    return recorded
+
+
+def _sweep_loop(interval):
+    while True:
+        try:
+            recorded = sweep()
+            if recorded:
+                print(f"⏱ SLA sweep: {recorded} new breach(es) recorded")
+        except Error as e:
+            print(f"❌ SLA sweep failed: {e}")
+        time.sleep(interval)
+
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def start_sweeper(interval=SWEEP_SECONDS):
+    """
+    Runs sweep() every `interval` seconds in a daemon thread,
+    once per process. No-op when interval is 0.
+    """
+    global _sweeper
+
+    if not interval:
+        return None
+
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(
+                target=_sweep_loop, args=(interval,), name="cqms-sla-sweep", daemon=True
+            )
+            _sweeper.start()
+
+    return _sweeper
+
+
+# --------------------------------------------------
+# RUN
+# --------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CQMS SLA engine")
+    parser.add_argument("--sweep", action="store_true", help="record current breaches")
+    parser.add_argument("--loop", action="store_true", help="keep sweeping")
+    parser.add_argument("--recompute", action="store_true", help="re-date unresolved queries")
+    parser.add_argument("--set-target", nargs=3, metavar=("CATEGORY", "STATUS", "HOURS"))
+    args = parser.parse_args()
+
+    if args.set_target:
+        category, status, hours = args.set_target
+        moved = set_target(category, status, int(hours))
+        print(f"✅ Target set: {category} / {status} = {hours}h ({moved} queries re-dated)")
+    if args.recompute:
+        print(f"✅ Due times recomputed for {recompute_due()} queries")
+    if args.sweep:
+        if args.loop:
+            _sweep_loop(SWEEP_SECONDS or 300)
+        else:
+            print(f"✅ SLA sweep: {sweep()} new breach(es) recorded")
+    if not (args.set_target or args.recompute or args.sweep):
+        print(read_targets().to_string(index=False))
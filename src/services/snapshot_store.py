@@ -0,0 +1,305 @@
+"""
+snapshot_store.py
+--------------------------------------------------
+Columnar on-disk snapshots of client_queries, so
+analytics can run off local files instead of
+loading the OLTP database.
+
+Layout (one partition per month of query_created_time):
+
+    data/snapshots/client_queries/
+        manifest.json
+        month=2025-01/
+            query_created_time.npy      datetime64[s]
+            is_valid_mobile.npy         bool
+            status.codes.npy            int32 dictionary codes
+            status.dict.json            dictionary values
+            ...
+
+Every column is a plain .npy file opened with
+np.load(mmap_mode="r"): a read touches only the
+requested columns of the requested months, and the
+datetime / flag / code arrays are not copied.
+Text columns are dictionary-encoded per partition
+and come back as pandas Categoricals.
+
+Exports are incremental: only months holding rows
+whose updated_at moved since the previous export are
+re-read (by month range on idx_query_created) and
+rewritten. Each partition is written to a temp
+directory and swapped in.
+
+Run using:
+    python -m src.services.snapshot_store            # incremental
+    python -m src.services.snapshot_store --full     # rewrite all months
+    python -m src.services.snapshot_store --status
+--------------------------------------------------
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .db_connection import db_session, pooled_connection
+
+
+SNAPSHOT_DIR = Path(os.environ.get(
+    "CQMS_SNAPSHOT_DIR",
+    Path(__file__).resolve().parents[2] / "data" / "snapshots",
+)) / "client_queries"
+
+# column -> storage kind (text: dictionary-encoded, flag: bool, datetime: datetime64[s])
+COLUMN_KINDS = {
+    "query_id": "text",
+    "client_email": "text",
+    "client_mobile": "text",
+    "normalized_mobile": "text",
+    "is_valid_mobile": "flag",
+    "is_valid_email": "flag",
+    "category": "text",
+    "query_heading": "text",
+    "query_description": "text",
+    "status": "text",
+    "assigned_support_id": "text",
+    "query_created_time": "datetime",
+    "query_closed_time": "datetime",
+    "issue_image_path": "text",
+}
+
+OVERLAP = timedelta(seconds=5)   # same late-commit window as delta_cache
+
+
+# --------------------------------------------------
+# MANIFEST
+# --------------------------------------------------
+def read_manifest(root=SNAPSHOT_DIR):
+    """
+    Returns the manifest dict, or None if no snapshot was exported yet.
+    """
+    path = Path(root) / "manifest.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _write_manifest(root, manifest):
+    tmp = root / "manifest.json.tmp"
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, root / "manifest.json")
+
+
+# --------------------------------------------------
+# EXPORT
+# --------------------------------------------------
+def _month_bounds(month):
+    period = pd.Period(month, freq="M")
+    return period.start_time.to_pydatetime(), (period + 1).start_time.to_pydatetime()
+
+
+def _months_to_export(cur, since):
+    """
+    All months on a full export, otherwise the months of rows changed since `since`.
+    """
+    if since is None:
+        cur.execute("SELECT MIN(query_created_time), MAX(query_created_time) FROM client_queries")
+        first, last = cur.fetchone()
+        if first is None:
+            return []
+        return [str(p) for p in pd.period_range(first, last, freq="M")]
+
+    cur.execute(
+        """
+        SELECT DISTINCT YEAR(query_created_time), MONTH(query_created_time)
+        FROM client_queries
+        WHERE updated_at >= %s
+        """,
+        (since,),
+    )
+    return sorted(f"{year:04d}-{month:02d}" for year, month in cur.fetchall())
+
+
+def _fetch_month(month):
+    start, end = _month_bounds(month)
+    with pooled_connection() as conn:
+        return pd.read_sql(
+            f"""
+            SELECT {", ".join(COLUMN_KINDS)}
+            FROM client_queries
+            WHERE query_created_time >= %s AND query_created_time < %s
+            """,
+            conn,
+            params=(start, end),
+        )
+
+
+def _write_column(path, name, kind, values):
+    if kind == "datetime":
+        array = pd.to_datetime(values, errors="coerce").to_numpy(dtype="datetime64[s]")
+        np.save(path / f"{name}.npy", array)
+    elif kind == "flag":
+        np.save(path / f"{name}.npy", values.fillna(0).astype(bool).to_numpy())
+    else:
+        codes, uniques = pd.factorize(values)   # NULL -> -1
+        np.save(path / f"{name}.codes.npy", codes.astype(np.int32))
+        (path / f"{name}.dict.json").write_text(
+            json.dumps([str(u) for u in uniques]), encoding="utf-8"
+        )
+
+
+def _write_partition(root, month, df):
+    final = root / f"month={month}"
+    tmp = root / f".month={month}.tmp"
+    old = root / f".month={month}.old"
+
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, kind in COLUMN_KINDS.items():
+        _write_column(tmp, name, kind, df[name])
+
+    # swap in; readers opening files mid-swap simply retry
+    shutil.rmtree(old, ignore_errors=True)
+    if final.exists():
+        final.rename(old)
+    tmp.rename(final)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def export_snapshot(full=False, root=SNAPSHOT_DIR):
+    """
+    Writes / refreshes the month partitions. Returns a summary dict.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = None if full else read_manifest(root)
+    started = time.perf_counter()
+
+    with db_session() as cur:
+        # watermark first: rows changed during the export are picked up next time
+        cur.execute("SELECT MAX(updated_at) FROM client_queries")
+        watermark = cur.fetchone()[0]
+
+        since = None
+        if manifest and manifest.get("watermark"):
+            since = datetime.fromisoformat(manifest["watermark"]) - OVERLAP
+        months = _months_to_export(cur, since)
+
+    partitions = dict(manifest["partitions"]) if manifest else {}
+    rows = 0
+    for month in months:
+        df = _fetch_month(month)
+        if df.empty:
+            continue
+        _write_partition(root, month, df)
+        partitions[month] = len(df)
+        rows += len(df)
+        print(f"   ↳ month={month}: {len(df):,} rows")
+
+    _write_manifest(root, {
+        "table": "client_queries",
+        "columns": COLUMN_KINDS,
+        "partitions": dict(sorted(partitions.items())),
+        "watermark": watermark.isoformat() if watermark else None,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+    })
+
+    summary = {
+        "months_written": len(months),
+        "rows_written": rows,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    print(f"✅ Snapshot export: {summary}")
+    return summary
+
+
+# --------------------------------------------------
+# READ
+# --------------------------------------------------
+def _read_column(path, name, kind):
+    if kind in ("datetime", "flag"):
+        return np.load(path / f"{name}.npy", mmap_mode="r")
+
+    codes = np.load(path / f"{name}.codes.npy", mmap_mode="r")
+    categories = json.loads((path / f"{name}.dict.json").read_text(encoding="utf-8"))
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def read_snapshot(columns=None, months=None, start=None, end=None, root=SNAPSHOT_DIR):
+    """
+    Loads a DataFrame from the snapshot.
+
+    columns    : subset of COLUMN_KINDS (default: all)
+    months     : explicit "YYYY-MM" partitions, or
+    start, end : inclusive "YYYY-MM" range
+    """
+    root = Path(root)
+    manifest = read_manifest(root)
+    if manifest is None:
+        raise FileNotFoundError(
+            f"No snapshot in {root}; run python -m src.services.snapshot_store"
+        )
+
+    kinds = manifest["columns"]
+    columns = list(columns or kinds)
+    unknown = [c for c in columns if c not in kinds]
+    if unknown:
+        raise ValueError(f"Columns not in snapshot: {unknown}")
+
+    selected = [
+        m for m in manifest["partitions"]
+        if (months is None or m in months)
+        and (start is None or m >= start)
+        and (end is None or m <= end)
+    ]
+
+    data = {}
+    for name in columns:
+        kind = kinds[name]
+        parts = [_read_column(root / f"month={m}", name, kind) for m in selected]
+
+        if kind == "text":
+            data[name] = (
+                union_categoricals(parts) if len(parts) > 1
+                else parts[0] if parts
+                else pd.Categorical([])
+            )
+        elif len(parts) == 1:
+            data[name] = parts[0]   # memory-mapped, no copy
+        else:
+            dtype = "datetime64[s]" if kind == "datetime" else bool
+            data[name] = np.concatenate(parts) if parts else np.array([], dtype=dtype)
+
+    return pd.DataFrame(data, columns=columns, copy=False)
+
+
+def print_status(root=SNAPSHOT_DIR):
+    manifest = read_manifest(root)
+    if manifest is None:
+        print("⏳ No snapshot exported yet.")
+        return
+
+    print(f"📦 {root}  (watermark {manifest['watermark']}, exported {manifest['exported_at']})")
+    for month, rows in manifest["partitions"].items():
+        print(f"   month={month}: {rows:,} rows")
+
+
+# --------------------------------------------------
+# RUN
+# --------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export client_queries snapshots")
+    parser.add_argument("--full", action="store_true", help="rewrite every month")
+    parser.add_argument("--status", action="store_true", help="list partitions")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+    else:
+        export_snapshot(full=args.full)
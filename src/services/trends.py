@@ -0,0 +1,261 @@
+"""
+trends.py
+--------------------------------------------------
+Daily / weekly trend series for CQMS analytics.
+
+- Reads the date-bucketed rollups (daily_rollup,
+  daily_category_rollup, daily_agent_rollup), never
+  client_queries itself
+- Each series is kept in process as a dense day x key
+  frame. The first refresh loads every bucket; later
+  refreshes only fetch the last OVERLAP_DAYS known
+  days and anything newer, and append them
+- Open backlog is a cumulative sum of opened - closed;
+  new days continue from the last known backlog
+  instead of re-summing history
+- Rolling resolution averages divide windowed sums of
+  resolution days by windowed sums of closes, over
+  just the requested tail of days
+- A rollup rebuild (e.g. after a CSV load) bumps the
+  'rollups' version, which makes every series reload
+
+Run using:
+    python -m src.services.trends
+    python -m src.services.trends --weekly --days 180
+--------------------------------------------------
+"""
+
+import argparse
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+
+from .db_connection import db_session
+from .instrumentation import register_collector
+from .result_cache import cached_read
+from .rollups import read_generation
+
+
+OVERLAP_DAYS = 1      # today's bucket (and a late-committed yesterday) keep growing
+DEFAULT_DAYS = 90
+WEEK = "W-SUN"
+
+
+# --------------------------------------------------
+# INCREMENTAL DAILY SERIES
+# --------------------------------------------------
+class DailySeries:
+    """
+    Dense frame of one daily rollup table: a row per calendar
+    day (gaps are zeros), columns `values`, or (value, key)
+    pairs when the table is split by `key`.
+    """
+
+    def __init__(self, table, values, key=None):
+        self.table = table
+        self.values = list(values)
+        self.key = key
+        self._frame = None
+        self._generation = None
+        self._lock = threading.Lock()
+        self.full_loads = 0
+        self.delta_loads = 0
+
+    # ----------------------------------------------
+    # DB access
+    # ----------------------------------------------
+    def _fetch(self, since=None):
+        columns = ["day"] + ([self.key] if self.key else []) + self.values
+        sql = f"SELECT {', '.join(columns)} FROM {self.table}"
+        params = ()
+
+        if since is not None:
+            sql += " WHERE day >= %s"
+            params = (since.date(),)
+
+        with db_session() as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+
+        df = pd.DataFrame(rows, columns=columns)
+        df["day"] = pd.to_datetime(df["day"])
+        return df
+
+    # ----------------------------------------------
+    # Dense frames
+    # ----------------------------------------------
+    def _dense(self, rows, start, end):
+        days = pd.date_range(start, end, freq="D", name="day", unit="ns")
+
+        if self.key is None:
+            wide = rows.set_index("day")[self.values]
+        elif rows.empty:
+            wide = pd.DataFrame(
+                index=days, columns=pd.MultiIndex.from_product([self.values, []])
+            )
+        else:
+            wide = rows.pivot_table(
+                index="day", columns=self.key, values=self.values,
+                aggfunc="sum", fill_value=0,
+            )
+
+        return wide.reindex(days, fill_value=0).astype("int64")
+
+    def _extend(self, frame, tail):
+        """
+        Appends dense new days to frame (None on a full load).
+        Subclasses add running columns here.
+        """
+        if frame is None:
+            return tail
+        # a key first seen in the tail (new category / agent) is 0 before it
+        return pd.concat([frame, tail]).fillna(0).astype("int64")
+
+    # ----------------------------------------------
+    # Public API
+    # ----------------------------------------------
+    def refresh(self, today=None):
+        """
+        Loads every bucket on first use (or after a rollup
+        rebuild), afterwards only the overlap and newer days.
+        Returns the dense frame up to today.
+        """
+        today = pd.Timestamp(today or date.today()).normalize()
+        generation = read_generation()
+
+        with self._lock:
+            if self._frame is None or generation != self._generation:
+                rows = self._fetch()
+                start = rows["day"].min() if not rows.empty else today
+                end = max(today, rows["day"].max()) if not rows.empty else today
+                self._frame = self._extend(None, self._dense(rows, start, end))
+                self._generation = generation
+                self.full_loads += 1
+            else:
+                since = self._frame.index[-1] - timedelta(days=OVERLAP_DAYS)
+                rows = self._fetch(since)
+                end = max(today, rows["day"].max()) if not rows.empty else today
+                kept = self._frame.loc[: since - timedelta(days=1)]
+                self._frame = self._extend(kept, self._dense(rows, since, max(end, since)))
+                self.delta_loads += 1
+
+            return self._frame
+
+    def stats(self):
+        frame = self._frame
+        return {
+            "days": 0 if frame is None else len(frame),
+            "full_loads": self.full_loads,
+            "delta_loads": self.delta_loads,
+        }
+
+
+class BacklogSeries(DailySeries):
+    """
+    daily_rollup plus a running `backlog` (queries still
+    unresolved at the end of each day).
+    """
+
+    def __init__(self):
+        super().__init__("daily_rollup", ["opened", "closed"])
+
+    def _extend(self, frame, tail):
+        base = 0 if frame is None or frame.empty else int(frame["backlog"].iloc[-1])
+        tail["backlog"] = base + (tail["opened"] - tail["closed"]).cumsum()
+        if frame is None:
+            return tail
+        return pd.concat([frame, tail])
+
+
+_totals = BacklogSeries()
+_by_category = DailySeries(
+    "daily_category_rollup", ["opened", "closed", "total_resolution_days"], key="category"
+)
+_by_agent = DailySeries(
+    "daily_agent_rollup", ["closed", "total_resolution_days"], key="support_id"
+)
+
+def trend_stats():
+    """
+    Flat gauges per series, e.g. totals_full_loads.
+    """
+    series = {"totals": _totals, "category": _by_category, "agent": _by_agent}
+    return {
+        f"{name}_{key}": value
+        for name, s in series.items()
+        for key, value in s.stats().items()
+    }
+
+
+register_collector("trends", trend_stats)
+
+
+# --------------------------------------------------
+# VIEWS (cached until the next write)
+# --------------------------------------------------
+@cached_read()
+def backlog_trend(days=DEFAULT_DAYS, weekly=False):
+    """
+    Opened / closed per period and open backlog at its end,
+    for the last `days` days (index: day, or week end).
+    """
+    trend = _totals.refresh().iloc[-days:]
+
+    if weekly:
+        trend = trend.resample(WEEK).agg(
+            {"opened": "sum", "closed": "sum", "backlog": "last"}
+        )
+    return trend
+
+
+def _rolling_resolution(series, days, window, weekly):
+    frame = series.refresh()
+    # only the displayed days plus one window of history are summed
+    tail = frame.iloc[-(days + window - 1):]
+    closed = tail["closed"]
+    resolution = tail["total_resolution_days"]
+
+    if weekly:
+        closed = closed.resample(WEEK).sum()
+        resolution = resolution.resample(WEEK).sum()
+        window = max(1, round(window / 7))
+
+    closed_sum = closed.rolling(window, min_periods=1).sum()
+    resolution_sum = resolution.rolling(window, min_periods=1).sum()
+    average = (resolution_sum / closed_sum.where(closed_sum > 0)).round(2)
+
+    periods = max(1, round(days / 7)) if weekly else days
+    return average.iloc[-periods:]
+
+
+@cached_read()
+def resolution_trend_by_category(days=DEFAULT_DAYS, window=7, weekly=False):
+    """
+    Rolling average resolution days per category
+    (columns: categories; NaN where nothing closed in the window).
+    """
+    return _rolling_resolution(_by_category, days, window, weekly)
+
+
+@cached_read()
+def resolution_trend_by_agent(days=DEFAULT_DAYS, window=7, weekly=False):
+    """
+    Rolling average resolution days per support agent.
+    """
+    return _rolling_resolution(_by_agent, days, window, weekly)
+
+
+# --------------------------------------------------
+# RUN
+# --------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CQMS trend series")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    parser.add_argument("--weekly", action="store_true")
+    parser.add_argument("--window", type=int, default=7, help="rolling window (days)")
+    args = parser.parse_args()
+
+    print(backlog_trend(args.days, args.weekly).tail(15).to_string())
+    print()
+    print(resolution_trend_by_category(args.days, args.window, args.weekly).tail(15).to_string())
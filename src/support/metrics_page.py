@@ -0,0 +1,86 @@
+import streamlit as st
+import pandas as pd
+from services.db_connection import pool_stats
+from services.instrumentation import (
+    SLOW_QUERY_MS,
+    read_slow_log,
+    render_exposition,
+    reset,
+    snapshot,
+)
+from services.result_cache import cache_stats
+
+
+# ===================================================
+# HOT-PATH METRICS (hidden admin page: ?admin=metrics)
+# ===================================================
+def _stats_table(kind):
+    stats = pd.DataFrame(snapshot(kind))
+    if stats.empty:
+        return stats
+    stats["total_s"] = stats["total_s"].round(3)
+    stats["mb"] = (stats.pop("bytes") / 1024**2).round(2)
+    return stats.set_index("name")
+
+
+def metrics_page():
+
+    # ---------------------------------------------------
+    # SESSION VALIDATION
+    # ---------------------------------------------------
+    user = st.session_state.get("user")
+
+    if not user or user.get("role") != "Support":
+        st.error("Unauthorized access.")
+        st.stop()
+
+    st.markdown("## ⏱ Hot-Path Metrics")
+    st.caption(
+        "Rolling p50 / p95 / p99 over the last samples of this server process."
+    )
+
+    if st.button("♻ Reset metrics"):
+        reset()
+        st.rerun()
+
+    # ---------------------------------------------------
+    # PAGES + DB STATEMENTS
+    # ---------------------------------------------------
+    st.markdown("### 🖥 Page Renders")
+    pages = _stats_table("page")
+    if pages.empty:
+        st.info("No pages timed yet.")
+    else:
+        st.dataframe(pages.drop(columns=["rows", "mb", "errors"]), use_container_width=True)
+
+    st.markdown("### 🗄 DB Statements")
+    statements = _stats_table("db")
+    if statements.empty:
+        st.info("No statements timed yet.")
+    else:
+        st.dataframe(statements, use_container_width=True)
+
+    st.markdown("### 🔌 Connection Pool")
+    st.json(pool_stats())
+
+    st.markdown("### 🧠 Result Cache")
+    st.json(cache_stats())
+
+    # ---------------------------------------------------
+    # SLOW QUERIES
+    # ---------------------------------------------------
+    st.markdown(f"### 🐢 Slow Queries (≥ {SLOW_QUERY_MS:g} ms)")
+    slow = read_slow_log(50)
+    if slow:
+        st.code("\n".join(reversed(slow)), language=None)
+    else:
+        st.success("No slow queries logged 🎉")
+
+    # ---------------------------------------------------
+    # TEXT EXPOSITION
+    # ---------------------------------------------------
+    st.markdown("### 📄 Text Exposition")
+    exposition = render_exposition()
+    st.download_button("⬇ metrics.txt", exposition, "metrics.txt", "text/plain")
+    with st.expander("Show"):
+        st.code(exposition, language=None)
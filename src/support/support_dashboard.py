@@ -1,7 +1,109 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from services.db_connection import get_db_connection
+from services.image_store import get_thumbnail
+from services.query_actions import claim_next_queries, claim_query, close_query
+from services.query_frames import apply_query_dtypes
+from services.query_pages import QUEUES, count_queue, fetch_page
+from services.search import search_queries
+from services.rollups import (
+    read_agent_leaderboard,
+    read_category_counts,
+    read_status_counts,
+)
+from services.sketches import (
+    read_monthly_percentiles,
+    read_percentiles,
+    read_sketch,
+)
+from services.trends import (
+    backlog_trend,
+    resolution_trend_by_agent,
+    resolution_trend_by_category,
+)
+from services.sla import (
+    breached_now,
+    breaching_within,
+    read_targets,
+    recent_breach_events,
+)
+from utils.date_utils import derive_columns
+from utils.export_widgets import export_controls
+
+
+# ===================================================
+# PAGINATION HELPERS
+# ===================================================
+def _paged_queue(queue, support_id, page_size):
+    """
+    Fetches the current page of a queue using keyset pagination
+    and renders Prev / Next controls. Returns the page DataFrame.
+
+    Session state keeps the stack of page-start cursors per queue,
+    so moving forward or back is always a single seek query.
+    """
+    state_key = f"pager_{queue}"
+    pager = st.session_state.get(state_key)
+
+    if not pager or pager["page_size"] != page_size:
+        pager = {"page_size": page_size, "cursors": [None]}
+        st.session_state[state_key] = pager
+
+    cursors = pager["cursors"]
+    # shared queues: one cache entry for every agent
+    agent = support_id if QUEUES[queue][1] else None
+    total = count_queue(queue, agent)
+    rows, next_cursor = fetch_page(queue, agent, cursors[-1], page_size)
+
+    # Page emptied under us (e.g. rows picked by others) — restart
+    if not rows and len(cursors) > 1:
+        pager["cursors"] = [None]
+        st.rerun()
+
+    page_no = len(cursors)
+    pages = max(1, -(-total // page_size))
+
+    c1, c2, c3 = st.columns([1, 3, 1])
+    if c1.button("◀ Prev", key=f"{queue}_prev", disabled=page_no == 1):
+        cursors.pop()
+        st.rerun()
+    c2.caption(f"Page {page_no} of {pages} • {total} queries")
+    if c3.button("Next ▶", key=f"{queue}_next", disabled=next_cursor is None):
+        cursors.append(next_cursor)
+        st.rerun()
+
+    page_df = pd.DataFrame(rows)
+    if page_df.empty:
+        return page_df
+
+    page_df = apply_query_dtypes(page_df)   # datetimes, categoricals
+
+    # Query age (page rows only)
+    return derive_columns(page_df, "query_age_days")
+
+
+def _duplicate_note(row):
+    """
+    Near-duplicate link set at submit time (services.duplicates).
+    """
+    dup = row.get("duplicate_of")
+    return f"🔁 Similar to **{dup}**" if isinstance(dup, str) and dup else ""
+
+
+def _show_thumbnail(col, image_path):
+    """
+    Screenshot preview for a row on screen. Thumbnails not built
+    yet are queued in the background and show a placeholder.
+    """
+    if not isinstance(image_path, str) or not image_path:
+        col.caption("No screenshot")
+        return
+
+    thumb = get_thumbnail(image_path)
+    if thumb is None:
+        col.caption("🖼 Preparing preview...")
+    else:
+        col.image(str(thumb), use_container_width=True)
 
 
 # ===================================================
@@ -22,33 +124,21 @@ def support_dashboard():
 
     st.markdown(f"## 🧑‍💻 Support Dashboard — {support_id}")
 
-    # ---------------------------------------------------
-    # FETCH ALL QUERIES
-    # ---------------------------------------------------
-    conn = get_db_connection()
-    df = pd.read_sql("SELECT * FROM client_queries", conn)
-    conn.close()
-
-    if df.empty:
-        st.info("No queries available.")
-        return
-
-    df["query_created_time"] = pd.to_datetime(df["query_created_time"])
-    df["query_closed_time"] = pd.to_datetime(
-        df["query_closed_time"], errors="coerce"
+    page_size = st.selectbox(
+        "Rows per page", [10, 25, 50, 100], index=1, key="support_page_size"
     )
 
-    # Query age
-    df["query_age_days"] = (
-        (df["query_closed_time"].fillna(pd.Timestamp.now()))
-        - df["query_created_time"]
-    ).dt.days
-
     # ---------------------------------------------------
     # TABS
     # ---------------------------------------------------
-    tab_open, tab_progress, tab_closed, tab_analytics = st.tabs(
-        ["🟢 Open Queue", "🟡 My In Progress", "🔵 Closed Queries", "📊 Team Analytics"]
+    tab_open, tab_progress, tab_closed, tab_search, tab_analytics = st.tabs(
+        [
+            "🟢 Open Queue",
+            "🟡 My In Progress",
+            "🔵 Closed Queries",
+            "🔎 Search",
+            "📊 Team Analytics",
+        ]
     )
 
     # ===================================================
@@ -57,15 +147,24 @@ def support_dashboard():
     with tab_open:
         st.subheader("🟢 Open Queue")
 
-        open_df = df[
-            (df["status"] == "Open")
-            & (df["assigned_support_id"].isna())
-        ]
+        # Batch claim: oldest N unassigned queries in one round trip
+        c1, c2 = st.columns([1, 3])
+        claim_n = c1.number_input(
+            "Claim next", min_value=1, max_value=50, value=5, key="claim_n"
+        )
+        if c2.button(f"📥 Claim next {claim_n} oldest"):
+            claimed = claim_next_queries(support_id, int(claim_n))
+            if claimed:
+                st.success(f"Claimed {len(claimed)}: {', '.join(claimed)}")
+            else:
+                st.info("Nothing left to claim.")
+
+        open_df = _paged_queue("open", support_id, page_size)
 
         if open_df.empty:
             st.success("No unassigned open queries 🎉")
         else:
-            for _, row in open_df.iterrows():
+            for row in open_df.to_dict("records"):
                 with st.container(border=True):
                     c1, c2, c3 = st.columns([4, 2, 2])
 
@@ -73,31 +172,23 @@ def support_dashboard():
                         f"""
                         **{row['query_id']}**  
                         📂 {row['category']}  
-                        ⏳ {row['query_age_days']} days
+                        ⏳ {row['query_age_days']} days  
+                        {_duplicate_note(row)}
                         """
                     )
+                    _show_thumbnail(c2, row["issue_image_path"])
 
                     if c3.button(
                         "Pick",
                         key=f"pick_{row['query_id']}",
                     ):
-                        conn = get_db_connection()
-                        cur = conn.cursor()
-                        cur.execute(
-                            """
-                            UPDATE client_queries
-                            SET assigned_support_id=%s,
-                                status='In Progress'
-                            WHERE query_id=%s
-                            """,
-                            (support_id, row["query_id"]),
-                        )
-                        conn.commit()
-                        cur.close()
-                        conn.close()
-
-                        st.success("Query picked successfully.")
-                        st.rerun()
+                        if claim_query(support_id, row["query_id"]):
+                            st.success("Query picked successfully.")
+                            st.rerun()
+                        else:
+                            st.warning(
+                                f"{row['query_id']} was already picked by another agent."
+                            )
 
     # ===================================================
     # 🟡 MY IN PROGRESS
@@ -105,15 +196,12 @@ def support_dashboard():
     with tab_progress:
         st.subheader("🟡 My In Progress")
 
-        progress_df = df[
-            (df["status"] == "In Progress")
-            & (df["assigned_support_id"] == support_id)
-        ]
+        progress_df = _paged_queue("in_progress", support_id, page_size)
 
         if progress_df.empty:
             st.info("No queries in progress.")
         else:
-            for _, row in progress_df.iterrows():
+            for row in progress_df.to_dict("records"):
                 with st.container(border=True):
                     c1, c2, c3 = st.columns([4, 2, 2])
 
@@ -121,31 +209,23 @@ def support_dashboard():
                         f"""
                         **{row['query_id']}**  
                         📂 {row['category']}  
-                        ⏳ {row['query_age_days']} days
+                        ⏳ {row['query_age_days']} days  
+                        {_duplicate_note(row)}
                         """
                     )
+                    _show_thumbnail(c2, row["issue_image_path"])
 
                     if c3.button(
                         "Close",
                         key=f"close_{row['query_id']}",
                     ):
-                        conn = get_db_connection()
-                        cur = conn.cursor()
-                        cur.execute(
-                            """
-                            UPDATE client_queries
-                            SET status='Closed',
-                                query_closed_time=NOW()
-                            WHERE query_id=%s
-                            """,
-                            (row["query_id"],),
-                        )
-                        conn.commit()
-                        cur.close()
-                        conn.close()
-
-                        st.success("Query closed.")
-                        st.rerun()
+                        if close_query(row["query_id"]):
+                            st.success("Query closed.")
+                            st.rerun()
+                        else:
+                            st.warning(
+                                f"{row['query_id']} was already closed by another agent."
+                            )
 
     # ===================================================
     # 🔵 CLOSED QUERIES
@@ -153,15 +233,12 @@ def support_dashboard():
     with tab_closed:
         st.subheader("🔵 Closed Queries")
 
-        closed_df = df[df["status"] == "Closed"].copy()
+        closed_df = _paged_queue("closed", support_id, page_size)
 
         if closed_df.empty:
             st.info("No closed queries.")
         else:
-            closed_df["resolution_days"] = (
-                closed_df["query_closed_time"]
-                - closed_df["query_created_time"]
-            ).dt.days
+            derive_columns(closed_df, "resolution_days", "resolution_business_hours")
 
             st.dataframe(
                 closed_df[
@@ -170,22 +247,62 @@ def support_dashboard():
                         "category",
                         "assigned_support_id",
                         "resolution_days",
+                        "resolution_business_hours",
                     ]
-                ]
-                .sort_values("resolution_days", ascending=False),
+                ],
                 use_container_width=True,
             )
 
+    # ===================================================
+    # 🔎 SEARCH (FULLTEXT index, top-k only)
+    # ===================================================
+    with tab_search:
+        st.subheader("🔎 Search Queries")
+
+        s1, s2, s3 = st.columns([4, 1, 1])
+        search_text = s1.text_input(
+            "Heading / description", key="search_text",
+            placeholder="e.g. payment failed",
+        )
+        search_status = s2.selectbox(
+            "Status", ["All", "Open", "In Progress", "Closed"], key="search_status"
+        )
+        match_all = s3.toggle("All words", value=True, key="search_all")
+
+        if search_text.strip():
+            results = search_queries(
+                search_text,
+                k=50,
+                mode="all" if match_all else "any",
+                status=search_status,
+            )
+
+            if results.empty:
+                st.info("No matching queries (words need 3+ letters).")
+            else:
+                st.caption(f"Top {len(results)} matches")
+                st.dataframe(
+                    results.set_index("query_id"), use_container_width=True
+                )
+
     # ===================================================
     # 📊 TEAM ANALYTICS
     # ===================================================
     with tab_analytics:
         st.subheader("📊 Support Team Analytics")
 
-        total_agents = df["assigned_support_id"].nunique()
-        open_q = (df["status"] == "Open").sum()
-        in_prog_q = (df["status"] == "In Progress").sum()
-        closed_q = (df["status"] == "Closed").sum()
+        # Rollup tables: a handful of tiny primary-key reads
+        status_counts = read_status_counts()
+        leaderboard = read_agent_leaderboard()
+
+        if not status_counts:
+            st.info("No queries available.")
+            return
+
+        total_agents = len(leaderboard)
+        open_q = status_counts.get("Open", 0)
+        in_prog_q = status_counts.get("In Progress", 0)
+        closed_q = status_counts.get("Closed", 0)
 
         c1, c2, c3, c4 = st.columns(4)
         c1.metric("Agents", total_agents)
@@ -196,41 +313,144 @@ def support_dashboard():
         # Agent leaderboard
         st.markdown("### 🏆 Agent Leaderboard")
 
-        leaderboard = (
-            df[df["status"] == "Closed"]
-            .groupby("assigned_support_id")
-            .agg(
-                closed_queries=("query_id", "count"),
-                avg_days=("query_age_days", "mean"),
-            )
-            .reset_index()
-            .sort_values("closed_queries", ascending=False)
-        )
+        leaderboard = leaderboard.rename(columns={"avg_resolution_days": "avg_days"})
 
-        leaderboard["avg_days"] = leaderboard["avg_days"].round(1)
+        # p50 / p90 resolution days from the per-agent sketches
+        agent_pct = read_percentiles("agent")[["dim_key", "p50", "p90"]]
+        leaderboard = leaderboard.merge(
+            agent_pct.rename(columns={"dim_key": "assigned_support_id"}),
+            on="assigned_support_id",
+            how="left",
+        )
         leaderboard.index += 1
 
         st.dataframe(leaderboard, use_container_width=True)
 
-        # SLA
-        st.markdown("### ⏱ SLA Breaches (Target: 3 days)")
+        # Support load by category
+        st.markdown("### 📂 Support Load by Category")
+        category_counts = read_category_counts()
+        st.bar_chart(category_counts.set_index("category"))
+
+        # Resolution percentiles (merged quantile sketches)
+        st.markdown("### ⏳ Resolution Time Percentiles")
+
+        overall = read_sketch("category")
+        p50, p90, p99 = overall.quantiles()
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Closed", f"{overall.count:,}")
+        c2.metric("p50 days", "-" if p50 is None else f"{p50:.1f}")
+        c3.metric("p90 days", "-" if p90 is None else f"{p90:.1f}")
+        c4.metric("p99 days", "-" if p99 is None else f"{p99:.1f}")
+
+        category_pct = read_percentiles("category").rename(columns={"dim_key": "category"})
+        st.dataframe(category_pct.set_index("category"), use_container_width=True)
 
-        sla_df = df[
-            (df["status"] != "Closed") & (df["query_age_days"] > 3)
+        monthly_pct = read_monthly_percentiles()
+        if not monthly_pct.empty:
+            st.caption("Resolution days by close month")
+            st.line_chart(monthly_pct.set_index("month")[["p50", "p90", "p99"]])
+
+        # Trends (daily rollups, extended incrementally with new days)
+        st.markdown("### 📈 Trends")
+
+        t1, t2, t3 = st.columns(3)
+        granularity = t1.radio(
+            "Granularity", ["Daily", "Weekly"], horizontal=True, key="trend_granularity"
+        )
+        trend_days = t2.slider("Days", 14, 365, 90, step=7, key="trend_days")
+        window = t3.selectbox("Rolling window (days)", [7, 14, 28], key="trend_window")
+        weekly = granularity == "Weekly"
+
+        backlog = backlog_trend(trend_days, weekly)
+        st.caption("Open backlog at the end of each period")
+        st.line_chart(backlog[["backlog"]])
+        st.caption("Opened vs closed")
+        st.bar_chart(backlog[["opened", "closed"]])
+
+        st.caption(f"Average resolution days by category ({window}-day rolling)")
+        st.line_chart(resolution_trend_by_category(trend_days, window, weekly))
+
+        agent_trend = resolution_trend_by_agent(trend_days, window, weekly)
+        trend_agents = st.multiselect(
+            "Agents",
+            agent_trend.columns.tolist(),
+            default=[
+                a for a in leaderboard["assigned_support_id"].head(5)
+                if a in agent_trend.columns
+            ],
+            key="trend_agents",
+        )
+        if trend_agents:
+            st.caption(f"Average resolution days by agent ({window}-day rolling)")
+            st.line_chart(agent_trend[trend_agents])
+
+        # SLA (indexed due times: cost follows breaches, not table size)
+        st.markdown("### ⏱ SLA")
+
+        horizon = st.slider(
+            "Breaching within (hours)", 1, 72, 24, key="sla_horizon"
+        )
+        sla_df = breached_now()
+        upcoming_df = breaching_within(horizon)
+
+        c1, c2 = st.columns(2)
+        c1.metric("Breached now", len(sla_df))
+        c2.metric(f"Due within {horizon}h", len(upcoming_df))
+
+        sla_view = [
+            "query_id",
+            "category",
+            "status",
+            "assigned_support_id",
+            "sla_due_at",
+            "hours_past_due",
         ]
 
         if sla_df.empty:
             st.success("No SLA breaches 🎉")
         else:
             st.warning("SLA Breaches Detected")
+            st.dataframe(sla_df[sla_view], use_container_width=True)
+
+        if not upcoming_df.empty:
+            st.markdown(f"**⚠ Breaching within {horizon}h**")
+            upcoming_df["hours_left"] = -upcoming_df["hours_past_due"]
             st.dataframe(
-                sla_df[
-                    [
-                        "query_id",
-                        "assigned_support_id",
-                        "query_age_days",
-                        "status",
-                    ]
-                ],
+                upcoming_df[sla_view[:-1] + ["hours_left"]],
                 use_container_width=True,
             )
+
+        with st.expander("SLA targets & breach log"):
+            st.caption("Hours from query creation; category * is the default.")
+            st.dataframe(read_targets(), use_container_width=True)
+            st.dataframe(recent_breach_events(50), use_container_width=True)
+
+        # Bulk export (streamed to a file, bounded memory)
+        st.markdown("### ⬇ Bulk Export")
+
+        f1, f2, f3, f4 = st.columns(4)
+        exp_status = f1.selectbox(
+            "Status", ["All", "Open", "In Progress", "Closed"], key="export_status"
+        )
+        exp_category = f2.selectbox(
+            "Category",
+            ["All"] + category_counts["category"].tolist(),
+            key="export_category",
+        )
+        exp_agent = f3.selectbox(
+            "Agent",
+            ["All"] + leaderboard["assigned_support_id"].tolist(),
+            key="export_agent",
+        )
+        exp_range = f4.date_input("Created between", [], key="export_range")
+        start, end = exp_range if len(exp_range) == 2 else (None, None)
+
+        export_controls(
+            "support_export",
+            "queries_export",
+            status=exp_status,
+            category=exp_category,
+            assigned_support_id=exp_agent,
+            start=start,
+            end=end,
+        )
@@ -1,7 +1,42 @@
-# utils/date_utils.py
-import pandas as pd
+"""
+date_utils.py
+--------------------------------------------------
+Date helpers and the derived-column engine for
+CQMS query frames.
+
+- derive_columns(df, *names) adds query age /
+  resolution columns (calendar days or business
+  hours), vectorized over the whole frame
+- Every derived column of a frame uses one clock
+  snapshot, taken at the frame's first derivation and
+  kept in df.attrs (filtered copies inherit it)
+- Columns already present are not recomputed, so a
+  frame passed between helpers pays for each column
+  once per render
+- Business hours: CQMS_BUSINESS_HOURS ("9-18") on
+  CQMS_BUSINESS_DAYS ("Mon Tue Wed Thu Fri")
+- Scalar helpers remain for single values
+
+Used by analytics.load_queries, the support and
+client dashboards and the data cleaning notebook.
+--------------------------------------------------
+"""
+
+import os
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+from services.query_frames import compact_days
+
+
+_open, _close = os.environ.get("CQMS_BUSINESS_HOURS", "9-18").split("-")
+BUSINESS_OPEN = float(_open)          # hour of day
+BUSINESS_CLOSE = float(_close)
+BUSINESS_DAYS = os.environ.get("CQMS_BUSINESS_DAYS", "Mon Tue Wed Thu Fri")
+
+CLOCK_ATTR = "cqms_clock"
+
 
 # -----------------------------
 # Safe datetime conversion
@@ -26,3 +61,103 @@ def calculate_query_age(created):
     if pd.isna(created):
         return None
     return (datetime.now() - created).days
+
+
+# -----------------------------
+# Vectorized durations
+# -----------------------------
+def resolution_days(created, closed):
+    """
+    Whole days from created to closed (NaN where not closed).
+    """
+    return compact_days((closed - created).dt.days)
+
+
+def query_age_days(created, closed, now):
+    """
+    Whole days from created to closed, or to `now` if unresolved.
+    """
+    return compact_days((closed.fillna(now) - created).dt.days)
+
+
+def business_hours_between(start, end):
+    """
+    Business hours between two datetime Series (NaN where
+    either is missing or end < start).
+    """
+    hours = pd.Series(np.nan, index=start.index)
+    valid = (start.notna() & end.notna() & (end >= start)).to_numpy()
+    if not valid.any():
+        return hours
+
+    s, e = start[valid], end[valid]
+    s_day, e_day = s.dt.normalize(), e.dt.normalize()
+    s_hour = ((s - s_day).dt.total_seconds() / 3600).clip(BUSINESS_OPEN, BUSINESS_CLOSE).to_numpy()
+    e_hour = ((e - e_day).dt.total_seconds() / 3600).clip(BUSINESS_OPEN, BUSINESS_CLOSE).to_numpy()
+    s_d = s_day.to_numpy().astype("datetime64[D]")
+    e_d = e_day.to_numpy().astype("datetime64[D]")
+
+    s_open = np.is_busday(s_d, weekmask=BUSINESS_DAYS)
+    e_open = np.is_busday(e_d, weekmask=BUSINESS_DAYS)
+    same_day = s_d == e_d
+
+    # whole business days strictly between the two dates
+    between = np.busday_count(s_d + 1, e_d, weekmask=BUSINESS_DAYS).clip(min=0)
+    first = np.where(s_open, BUSINESS_CLOSE - s_hour, 0.0)
+    last = np.where(e_open, e_hour - BUSINESS_OPEN, 0.0)
+    within = np.where(s_open, e_hour - s_hour, 0.0)
+
+    hours[valid] = np.where(
+        same_day,
+        within,
+        first + between * (BUSINESS_CLOSE - BUSINESS_OPEN) + last,
+    ).round(2)
+    return hours
+
+
+# -----------------------------
+# Derived-column engine
+# -----------------------------
+DERIVED_COLUMNS = {
+    "query_age_days": lambda df, now: query_age_days(
+        df["query_created_time"], df["query_closed_time"], now
+    ),
+    "resolution_days": lambda df, now: resolution_days(
+        df["query_created_time"], df["query_closed_time"]
+    ),
+    "query_age_business_hours": lambda df, now: business_hours_between(
+        df["query_created_time"], df["query_closed_time"].fillna(now)
+    ),
+    "resolution_business_hours": lambda df, now: business_hours_between(
+        df["query_created_time"], df["query_closed_time"]
+    ),
+}
+
+
+def frame_clock(df, now=None):
+    """
+    The frame's clock snapshot (set from `now`, default the
+    current time, on first use).
+    """
+    if CLOCK_ATTR not in df.attrs:
+        df.attrs[CLOCK_ATTR] = pd.Timestamp(now) if now is not None else pd.Timestamp.now()
+    return df.attrs[CLOCK_ATTR]
+
+
+def derive_columns(df, *names, now=None):
+    """
+    Adds the named DERIVED_COLUMNS to df in place (those not
+    present yet) and returns df. Needs query_created_time and
+    query_closed_time as datetimes.
+    """
+    unknown = set(names) - DERIVED_COLUMNS.keys()
+    if unknown:
+        raise ValueError(f"Unknown derived column(s): {sorted(unknown)}")
+
+    missing = [name for name in names if name not in df.columns]
+    if missing:
+        clock = frame_clock(df, now)
+        for name in missing:
+            df[name] = DERIVED_COLUMNS[name](df, clock)
+
+    return df
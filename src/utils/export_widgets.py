@@ -0,0 +1,39 @@
+# utils/export_widgets.py
+import os
+
+import streamlit as st
+
+from services.export_service import FORMATS, MIME_TYPES, export_queries
+
+
+# -----------------------------
+# Export + download controls
+# -----------------------------
+def export_controls(key, file_stem, **filters):
+    """
+    Streams the export to a file only when asked (never on
+    every rerun), then offers the finished file for download.
+    """
+    c1, c2 = st.columns([1, 2])
+    fmt = c1.selectbox("Format", list(FORMATS), key=f"{key}_fmt")
+
+    if c2.button("📦 Prepare export", key=f"{key}_run"):
+        try:
+            with st.spinner("Exporting..."):
+                path, rows = export_queries(fmt, **filters)
+            st.session_state[key] = (path, rows, fmt, filters)
+        except RuntimeError as e:
+            st.error(str(e))
+
+    # offer only an export that still matches the current filters
+    export = st.session_state.get(key)
+    if export and export[3] == filters and os.path.exists(export[0]):
+        path, rows, fmt, _ = export
+        with open(path, "rb") as f:
+            st.download_button(
+                f"⬇ Download {fmt.upper()} ({rows} rows)",
+                f,
+                f"{file_stem}{FORMATS[fmt]}",
+                MIME_TYPES[fmt],
+                key=f"{key}_download",
+            )
@@ -1,28 +1,220 @@
-# utils/date_utils.py
+"""
+regex_utils.py
+--------------------------------------------------
+Contact & status validation for CQMS.
+
+One set of rules (the data cleaning notebook's) for
+every entry point:
+- Series helpers are vectorized (numpy character
+  matrices / pandas .str) for the loader / notebook
+- Scalar helpers validate single submissions
+  (client dashboard, registration, login)
+
+Mobile rules:
+- digits only (a float export's ".0" is dropped)
+- more than 10 digits with a leading 91 / 0
+  -> keep the last 10
+- valid = 10 digits starting with 6-9
+--------------------------------------------------
+"""
+
+import re
+
+import numpy as np
 import pandas as pd
-from datetime import datetime
 
 
-# -----------------------------
-# Safe datetime conversion
-# -----------------------------
-def to_datetime(series):
-    return pd.to_datetime(series, errors="coerce")
+# --------------------------------------------------
+# PATTERNS
+# --------------------------------------------------
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+MOBILE_PATTERN = re.compile(r"^[6-9]\d{9}$", re.ASCII)
+PHONE_CHARS = re.compile(r"^[\d\s()+\-]+$")
+NON_DIGITS = re.compile(r"\D", re.ASCII)
+FLOAT_SUFFIX = re.compile(r"\.\s*0[0\s]*$", re.ASCII)
+
+STATUS_ALIASES = {
+    "open": "Open",
+    "opened": "Open",
+    "new": "Open",
+    "in progress": "In Progress",
+    "in_progress": "In Progress",
+    "inprogress": "In Progress",
+    "closed": "Closed",
+    "resolved": "Closed",
+}
+
+
+# --------------------------------------------------
+# SCALAR HELPERS (single submissions)
+# --------------------------------------------------
+def normalize_email(email):
+    return str(email).strip().lower()
+
+
+def is_valid_email(email):
+    return bool(EMAIL_PATTERN.match(normalize_email(email)))
+
+
+def normalize_mobile(mobile):
+    """
+    Digits only; drop a leading 91 / 0 when longer than 10 digits.
+    """
+    digits = NON_DIGITS.sub("", FLOAT_SUFFIX.sub("", str(mobile).strip()))
+    if len(digits) > 10 and digits.startswith(("91", "0")):
+        digits = digits[-10:]
+    return digits
+
+
+def is_valid_mobile(mobile):
+    """
+    Validates an already-normalized mobile number.
+    """
+    return bool(MOBILE_PATTERN.match(str(mobile)))
+
+
+def looks_like_phone(value):
+    return bool(PHONE_CHARS.match(str(value).strip()))
+
+
+def normalize_status(status):
+    """
+    Maps free-text status onto the DB enum; unknown values are returned stripped.
+    """
+    status = str(status).strip()
+    return STATUS_ALIASES.get(status.lower(), status)
+
+
+# --------------------------------------------------
+# VECTORIZED HELPERS (whole Series)
+# --------------------------------------------------
+# Mobiles are processed as a fixed-width character-code
+# matrix in numpy (one C-level pass, no per-row Python);
+# emails keep pandas .str with pattern strings so the
+# pyarrow string kernels are used when available.
+DIGIT_0, DIGIT_6, DIGIT_9, DOT = ord("0"), ord("6"), ord("9"), ord(".")
+WHITESPACE = [ord(c) for c in " \t\n\r\f\v"]
+
+
+def _char_matrix(series):
+    """
+    Returns (codes, missing): an (n, width) uint8 matrix of
+    character codes (0 = padding, non-ASCII clipped to 255)
+    and the missing-value mask.
+    """
+    missing = series.isna().to_numpy()
+    values = series.astype(object).where(~missing, "").astype(str).to_numpy(dtype=object)
+    chars = np.array(values, dtype=str) if len(values) else np.array([], dtype="U1")
+    width = max(chars.dtype.itemsize // 4, 1)
+    codes = chars.astype(f"U{width}").view(np.uint32).reshape(len(chars), width)
+    return np.minimum(codes, 255).astype(np.uint8), missing
+
+
+def _from_char_matrix(codes, missing, index):
+    out = codes.view(f"S{codes.shape[1]}").ravel().astype(str)
+    return pd.Series(out, index=index, dtype="string").mask(missing)
+
+
+def _normalize_codes(codes, is_digit):
+    """
+    normalize_mobile on a character-code matrix of the rows that need it.
+    """
+    n, width = codes.shape
+    positions = np.arange(width)
+
+    # float export suffix: last "." followed only by zeros / whitespace
+    is_dot = codes == DOT
+    if is_dot.any():
+        last_dot = width - 1 - np.argmax(is_dot[:, ::-1], axis=1)
+        after_dot = positions > last_dot[:, None]
+        is_zero = codes == DIGIT_0
+        padding = (codes == 0) | np.isin(codes, WHITESPACE)
+        tail_ok = (is_zero | padding | ~after_dot).all(axis=1)
+        float_suffix = is_dot.any(axis=1) & tail_ok & (is_zero & after_dot).any(axis=1)
+        is_digit &= ~(float_suffix[:, None] & (positions >= last_dot[:, None]))
+
+    # pack digits to the left, keeping order
+    length = is_digit.sum(axis=1)
+    rows, cols = np.nonzero(is_digit)
+    packed = np.zeros_like(codes)
+    packed[rows, np.cumsum(is_digit, axis=1)[rows, cols] - 1] = codes[rows, cols]
+
+    second = packed[:, 1] if width > 1 else packed[:, 0]
+    prefixed = (length > 10) & (
+        (packed[:, 0] == DIGIT_0) | ((packed[:, 0] == DIGIT_9) & (second == DIGIT_0 + 1))
+    )
+    if not prefixed.any():
+        return packed
+
+    # keep the last 10 digits of prefixed numbers
+    take = np.where(prefixed, length - 10, 0)[:, None] + positions
+    out = np.take_along_axis(packed, np.minimum(take, width - 1), axis=1)
+    out[prefixed[:, None] & (positions >= 10)] = 0
+    return out
+
+
+def normalize_mobile_series(series):
+    """
+    Vectorized normalize_mobile (identical results).
+    """
+    codes, missing = _char_matrix(series)
+    is_digit = (codes >= DIGIT_0) & (codes <= DIGIT_9)
+
+    # fast path: rows that are only digits need no rewriting
+    length = is_digit.sum(axis=1)
+    dirty = (length != (codes != 0).sum(axis=1)) | (length > 10)
+    if dirty.any():
+        codes[dirty] = _normalize_codes(codes[dirty], is_digit[dirty])
+    return _from_char_matrix(codes, missing, series.index)
+
+
+def valid_mobile_series(normalized):
+    """
+    Vectorized is_valid_mobile: exactly 10 digits, first 6-9.
+    """
+    codes, missing = _char_matrix(normalized)
+    if codes.shape[1] < 10:
+        return pd.Series(False, index=normalized.index)
+
+    head = codes[:, :10]
+    valid = (
+        ((head >= DIGIT_0) & (head <= DIGIT_9)).all(axis=1)
+        & (head[:, 0] >= DIGIT_6)
+        & (codes[:, 10:] == 0).all(axis=1)
+        & ~missing
+    )
+    return pd.Series(valid, index=normalized.index)
+
+
+def normalize_email_series(series):
+    return series.astype("string").str.strip().str.lower()
+
+
+def valid_email_series(emails):
+    """
+    Validates already-normalized emails (see normalize_email_series).
+    """
+    return emails.astype("string").str.match(EMAIL_PATTERN.pattern).fillna(False).astype(bool)
 
 
-# -----------------------------
-# Resolution Time (days)
-# -----------------------------
-def calculate_resolution_days(created, closed):
-    if pd.isna(created) or pd.isna(closed):
-        return None
-    return (closed - created).days
+def normalize_status_series(series):
+    """
+    Status columns have a handful of distinct values:
+    normalize the uniques once and map back.
+    """
+    codes, uniques = pd.factorize(series)
+    mapped = np.array([normalize_status(u) for u in uniques] + [None], dtype=object)
+    return pd.Series(mapped[codes], index=series.index, dtype="string")
 
 
-# -----------------------------
-# Query Age (Open / In Progress)
-# -----------------------------
-def calculate_query_age(created):
-    if pd.isna(created):
-        return None
-    return (datetime.now() - created).days
+def validate_contacts(df, email_col="client_email", mobile_col="client_mobile"):
+    """
+    Returns a copy of df with the email normalized and
+    normalized_mobile / is_valid_mobile / is_valid_email added.
+    """
+    out = df.copy()
+    out[email_col] = normalize_email_series(out[email_col])
+    out["normalized_mobile"] = normalize_mobile_series(out[mobile_col])
+    out["is_valid_mobile"] = valid_mobile_series(out["normalized_mobile"])
+    out["is_valid_email"] = valid_email_series(out[email_col])
+    return out